@@ -0,0 +1,156 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from db_manager import db_manager
+from work_calendar import work_calendar
+from config import WORK_START_TIME, ALERT_LATE_GRACE_MINUTES, ALERT_NO_IN_DEADLINE, ALERT_OPEN_IN_HOURS
+
+logger = logging.getLogger(__name__)
+
+class AttendanceRulesEngine:
+    """Moteur de règles en flux sur les pointages ingérés.
+
+    Chaque employé n'a qu'un petit état (jour, premier IN, IN ouvert) mis à
+    jour à chaque pointage; les échéances (absence d'IN, IN sans OUT) sont
+    vérifiées périodiquement sur cet état, jamais en relisant attendance_logs.
+    Règles:
+    - late_arrival: premier IN du jour après le début de journée + tolérance (jours ouvrés seulement)
+    - missing_in: aucun IN à l'échéance configurée (jours ouvrés seulement), évaluée
+      seulement après une synchronisation des pointages réussie depuis l'échéance
+    - missing_out: IN ouvert depuis plus de ALERT_OPEN_IN_HOURS heures
+    """
+
+    def __init__(self, db=None, clock=datetime.now):
+        self.db = db or db_manager
+        self.clock = clock
+        self.work_start = datetime.strptime(WORK_START_TIME, '%H:%M:%S').time()
+        self.late_after = (datetime.combine(datetime.min, self.work_start)
+                           + timedelta(minutes=ALERT_LATE_GRACE_MINUTES)).time()
+        self.no_in_deadline = datetime.strptime(ALERT_NO_IN_DEADLINE, '%H:%M:%S').time()
+        self.open_in_limit = timedelta(hours=ALERT_OPEN_IN_HOURS)
+        self._lock = threading.Lock()
+        self._states = {}
+        self._raised = set()
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Enregistrer une fonction appelée avec chaque alerte émise"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def seed(self, last_punches):
+        """Initialiser l'état à partir des derniers pointages du jour {employé: (type, horodatage)}"""
+        with self._lock:
+            for employee_id, (punch_type, timestamp) in last_punches.items():
+                timestamp = self._to_datetime(timestamp)
+                state = self._get_state(employee_id, timestamp.strftime('%Y-%m-%d'))
+                state['first_in'] = state['first_in'] or timestamp
+                state['open_in'] = timestamp if punch_type == 'IN' else None
+
+    def on_punch(self, employee_id, punch_type, timestamp):
+        """Traiter un pointage ingéré"""
+        timestamp = self._to_datetime(timestamp)
+        day = timestamp.strftime('%Y-%m-%d')
+        # Les pointages historiques (première synchronisation, rattrapage) ne déclenchent rien
+        if day < self.clock().strftime('%Y-%m-%d'):
+            return
+
+        alerts = []
+        with self._lock:
+            state = self._get_state(employee_id, day)
+            if punch_type == 'IN':
+                if state['first_in'] is None:
+                    state['first_in'] = timestamp
+                    # Week-ends et jours fériés (work_calendar): pas d'horaire, pas de retard
+                    if timestamp.time() > self.late_after and work_calendar.working_mask(day, day):
+                        delay = timestamp - datetime.combine(timestamp.date(), self.work_start)
+                        alerts.append((employee_id, 'late_arrival', day,
+                                       f"Arrivée à {timestamp.strftime('%H:%M')} "
+                                       f"({int(delay.total_seconds() // 60)} min de retard)"))
+                state['open_in'] = timestamp
+            elif punch_type == 'OUT':
+                state['open_in'] = None
+
+        for alert in alerts:
+            self._emit(*alert)
+
+    def check_deadlines(self, now=None):
+        """Vérifier les échéances: IN manquant et IN sans OUT"""
+        now = now or self.clock()
+        day = now.strftime('%Y-%m-%d')
+        alerts = []
+
+        deadline = datetime.combine(now.date(), self.no_in_deadline)
+        # Sans synchronisation depuis l'échéance, l'absence de pointage ne prouve rien
+        if (now >= deadline and work_calendar.working_mask(day, day)
+                and self.db.has_sync_since('attendance', deadline.strftime('%Y-%m-%d %H:%M:%S'))):
+            roster = [emp['id'] for emp in self.db.get_employees(status='active')]
+            with self._lock:
+                for employee_id in roster:
+                    state = self._states.get(employee_id)
+                    if state is None or state['day'] != day or state['first_in'] is None:
+                        alerts.append((employee_id, 'missing_in', day,
+                                       f"Aucune entrée à {self.no_in_deadline.strftime('%H:%M')}"))
+
+        with self._lock:
+            for employee_id, state in self._states.items():
+                open_in = state['open_in']
+                if open_in is not None and now - open_in > self.open_in_limit:
+                    alerts.append((employee_id, 'missing_out', open_in.strftime('%Y-%m-%d'),
+                                   f"Entrée à {open_in.strftime('%H:%M')} sans sortie depuis plus de {ALERT_OPEN_IN_HOURS} h"))
+
+        emitted = 0
+        for alert in alerts:
+            emitted += self._emit(*alert)
+        
+        # Oublier les alertes déjà émises des jours passés
+        cutoff = (now - self.open_in_limit - timedelta(days=1)).strftime('%Y-%m-%d')
+        self._raised = {key for key in self._raised if key[2] >= cutoff}
+        return emitted
+
+    def _get_state(self, employee_id, day):
+        state = self._states.get(employee_id)
+        if state is None:
+            state = self._states[employee_id] = {'day': day, 'first_in': None, 'open_in': None}
+        elif state['day'] < day:
+            # Nouvelle journée: l'IN ouvert éventuel reste suivi jusqu'au prochain pointage
+            state['day'] = day
+            state['first_in'] = None
+        return state
+
+    def _emit(self, employee_id, alert_type, day, message):
+        """Persister une alerte (une seule par employé, type et jour) et notifier les abonnés"""
+        key = (employee_id, alert_type, day)
+        if key in self._raised:
+            return 0
+        self._raised.add(key)
+
+        alert_id = self.db.add_alert(employee_id, alert_type, day, message)
+        if not alert_id:
+            return 0
+
+        alert = {
+            'id': alert_id,
+            'employee_id': employee_id,
+            'alert_type': alert_type,
+            'alert_date': day,
+            'message': message
+        }
+        for callback in list(self._listeners):
+            try:
+                callback(alert)
+            except Exception as e:
+                logger.error(f"Erreur dans un abonné aux alertes: {e}")
+        return 1
+
+    @staticmethod
+    def _to_datetime(value):
+        if isinstance(value, datetime):
+            return value
+        return datetime.fromisoformat(str(value))
+
+# Instance globale du moteur de règles
+alert_engine = AttendanceRulesEngine()
@@ -0,0 +1,302 @@
+"""
+API HTTP locale en lecture seule (JSON) pour les outils internes.
+
+    GET /api/health
+    GET /api/employees?department_id=&status=
+    GET /api/attendance/daily?date=AAAA-MM-JJ
+    GET /api/stats?start=AAAA-MM-JJ&end=AAAA-MM-JJ&employee_id=&department_id=
+    GET /api/sync/status
+
+Les requêtes sont traitées par un pool de connexions en lecture seule: elles
+ne bloquent ni ne sont bloquées par la synchronisation (journal WAL). Les
+réponses portent un ETag (réponse 304 si If-None-Match correspond) et sont
+conservées API_CACHE_TTL secondes, seul cache utilisé (les synchronisations
+d'un autre processus sont donc visibles après ce délai); les requêtes
+identiques simultanées ne sont calculées qu'une fois.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qsl
+from config import API_HOST, API_PORT, API_POOL_SIZE, API_CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+# Taille maximale de la ligne de requête et des en-têtes
+MAX_REQUEST_LINE = 8192
+MAX_HEADERS = 100
+
+STATUS_TEXTS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+                405: 'Method Not Allowed', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+class ApiError(Exception):
+    """Erreur retournée au client avec un code HTTP"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def _to_json(value):
+    if isinstance(value, sqlite3.Row):
+        return dict(value)
+    return str(value)
+
+def _date_param(params, name, default=None):
+    value = params.get(name, default)
+    if value is None:
+        raise ApiError(400, f"Paramètre manquant: {name}")
+    try:
+        datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ApiError(400, f"Date invalide pour {name} (AAAA-MM-JJ attendu): {value}")
+    return value
+
+def _int_param(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ApiError(400, f"Entier attendu pour {name}: {value}")
+
+class ReaderPool:
+    """Pool de couples (DatabaseManager en lecture seule, AttendanceManager)"""
+
+    def __init__(self, size=API_POOL_SIZE):
+        from db_manager import DatabaseManager
+        from attendance_manager import AttendanceManager
+        from stats_cache import StatsCache
+
+        self._readers = queue.Queue()
+        for _ in range(size):
+            db = DatabaseManager(read_only=True)
+            # Sans le cache de statistiques du processus: il n'est invalidé que par les
+            # synchronisations de ce processus et resterait périmé indéfiniment. Le cache
+            # à durée limitée de l'API (API_CACHE_TTL) le remplace.
+            self._readers.put((db, AttendanceManager(db, cache=StatsCache(max_entries=0, max_bytes=0))))
+        self.size = size
+
+    def run(self, func, *args):
+        """Exécuter func(db, attendance, *args) avec un lecteur du pool"""
+        reader = self._readers.get()
+        try:
+            return func(*reader, *args)
+        finally:
+            self._readers.put(reader)
+
+    def close(self):
+        while not self._readers.empty():
+            db, _ = self._readers.get_nowait()
+            db.close()
+
+def _employees(db, attendance, params):
+    return db.get_employees(_int_param(params, 'department_id'), params.get('status'))
+
+def _daily_attendance(db, attendance, params):
+    day = _date_param(params, 'date', datetime.now().strftime('%Y-%m-%d'))
+    return attendance.get_daily_attendance(day)
+
+def _stats(db, attendance, params):
+    start = _date_param(params, 'start')
+    end = _date_param(params, 'end')
+    if start > end:
+        raise ApiError(400, "La date de début doit précéder la date de fin")
+    stats = attendance.calculate_attendance_stats(start, end, _int_param(params, 'employee_id'),
+                                                  _int_param(params, 'department_id'))
+    if stats is None:
+        raise ApiError(500, "Statistiques indisponibles")
+    return stats
+
+def _sync_status(db, attendance, params):
+    return {
+        'last_syncs': db.get_sync_logs(limit=_int_param(params, 'limit') or 20),
+        'scheduled_runs': db.get_scheduler_runs()
+    }
+
+def _health(db, attendance, params):
+    return {'status': 'ok'}
+
+ROUTES = {
+    '/api/health': _health,
+    '/api/employees': _employees,
+    '/api/attendance/daily': _daily_attendance,
+    '/api/stats': _stats,
+    '/api/sync/status': _sync_status,
+}
+
+class ApiServer:
+    """Serveur HTTP asyncio minimal (GET et HEAD, connexions persistantes)"""
+
+    def __init__(self, host=API_HOST, port=API_PORT, pool_size=API_POOL_SIZE, cache_ttl=API_CACHE_TTL):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.cache_ttl = cache_ttl
+        self.pool = None
+        self._executor = None
+        self._cache = {}
+        self._pending = {}
+        self._server = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix='api')
+        # Ouverture des connexions hors de la boucle d'événements
+        self.pool = await loop.run_in_executor(self._executor, ReaderPool, self.pool_size)
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("API disponible sur http://%s:%s/api/", self.host, self.port)
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        if self._server:
+            self._server.close()
+        if self._executor:
+            self._executor.shutdown(wait=False)
+        if self.pool:
+            self.pool.close()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                if len(request_line) > MAX_REQUEST_LINE:
+                    await self._send(writer, 400, self._error_body("Requête trop longue"), close=True)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    if len(headers) >= MAX_HEADERS:
+                        raise ApiError(400, "Trop d'en-têtes")
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                parts = request_line.decode('latin-1').split()
+                keep_alive = (len(parts) == 3 and parts[2] == 'HTTP/1.1'
+                              and headers.get('connection', '').lower() != 'close')
+                status, body, extra = await self._respond(parts, headers)
+                await self._send(writer, status, body, extra, close=not keep_alive,
+                                 head=parts[:1] == ['HEAD'])
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError:
+            # Ligne plus longue que la limite du flux (LimitOverrunError convertie par readline)
+            await self._send(writer, 400, self._error_body("Ligne d'en-tête trop longue"), close=True)
+        except ApiError as e:
+            await self._send(writer, e.status, self._error_body(str(e)), close=True)
+        finally:
+            writer.close()
+
+    async def _respond(self, parts, headers):
+        """Calculer (statut, corps, en-têtes supplémentaires) d'une requête"""
+        if len(parts) != 3:
+            return 400, self._error_body("Ligne de requête invalide"), {}
+        method, target, _ = parts
+        if method not in ('GET', 'HEAD'):
+            return 405, self._error_body(f"Méthode non supportée: {method}"), {'Allow': 'GET, HEAD'}
+
+        url = urlsplit(target)
+        handler = ROUTES.get(url.path.rstrip('/') or '/')
+        if handler is None:
+            return 404, self._error_body(f"Ressource inconnue: {url.path}"), {}
+
+        # Clé de cache indépendante de l'ordre des paramètres
+        params = dict(parse_qsl(url.query))
+        key = (url.path, tuple(sorted(params.items())))
+        try:
+            body, etag = await self._cached(key, handler, params)
+        except ApiError as e:
+            return e.status, self._error_body(str(e)), {}
+        except Exception as e:
+            logger.error(f"Erreur de l'API sur {target}: {e}")
+            return 500, self._error_body("Erreur interne"), {}
+
+        extra = {'ETag': etag, 'Cache-Control': f'max-age={self.cache_ttl}'}
+        if etag in (tag.strip() for tag in headers.get('if-none-match', '').split(',')):
+            return 304, b'', extra
+        return 200, body, extra
+
+    async def _cached(self, key, handler, params):
+        """Corps JSON et ETag d'une réponse, depuis le cache si elle est encore fraîche"""
+        now = time.monotonic()
+        entry = self._cache.get(key)
+        if entry and entry[0] > now:
+            return entry[1], entry[2]
+
+        # Requêtes identiques simultanées: un seul calcul
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._compute(handler, params))
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+        body, etag = await asyncio.shield(pending)
+
+        if self.cache_ttl:
+            self._cache[key] = (time.monotonic() + self.cache_ttl, body, etag)
+            if len(self._cache) > 1000:
+                self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+        return body, etag
+
+    async def _compute(self, handler, params):
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._executor, self.pool.run, handler, params)
+        body = json.dumps(result, default=_to_json, ensure_ascii=False).encode('utf-8')
+        etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        return body, etag
+
+    @staticmethod
+    def _error_body(message):
+        return json.dumps({'error': message}, ensure_ascii=False).encode('utf-8')
+
+    @staticmethod
+    async def _send(writer, status, body, extra=None, close=False, head=False):
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXTS.get(status, '')}",
+                 f"Content-Length: {len(body)}",
+                 "Connection: close" if close else "Connection: keep-alive"]
+        if status != 304:
+            lines.append("Content-Type: application/json; charset=utf-8")
+        lines.extend(f"{name}: {value}" for name, value in (extra or {}).items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1'))
+        if not head and status != 304:
+            writer.write(body)
+        await writer.drain()
+
+def run_api_server(host=API_HOST, port=API_PORT):
+    """Lancer l'API (bloquant)"""
+    try:
+        asyncio.run(ApiServer(host, port).serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+def start_api_server_thread(host=API_HOST, port=API_PORT):
+    """Lancer l'API dans un thread en arrière-plan (application principale)"""
+    thread = threading.Thread(target=run_api_server, args=(host, port), name='api-server', daemon=True)
+    thread.start()
+    return thread
+
+if __name__ == "__main__":
+    from logging_config import setup_logging
+    setup_logging(log_file=None)
+    run_api_server()
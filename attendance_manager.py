@@ -1,21 +1,46 @@
 import logging
-from datetime import datetime, timedelta
-from db_manager import db_manager
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, time
+from db_manager import db_manager, DatabaseManager
 from employee_manager import employee_manager
+from work_calendar import work_calendar
+from punch_filter import PunchDebouncer
+from occupancy import occupancy_index
+from alert_rules import alert_engine
+from stats_cache import stats_cache
+from lazy import LazyInstance
+from metrics import metrics, instrument_methods
+from config import BATCH_WORKERS, WORK_START_TIME, WORK_END_TIME, STANDARD_WORK_HOURS
 
-# Configuration du logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Seuils des retards et départs anticipés
+LATE_THRESHOLD = time.fromisoformat(WORK_START_TIME)
+EARLY_DEPARTURE_THRESHOLD = time.fromisoformat(WORK_END_TIME)
+
+@instrument_methods('attendance_call_seconds')
 class AttendanceManager:
-    def __init__(self):
-        self.db = db_manager
+    def __init__(self, db=None, cache=None):
+        self.db = db or db_manager
+        # Cache des statistiques: celui du processus par défaut
+        self.cache = cache if cache is not None else stats_cache
     
-    def sync_attendance_data(self, zk_attendance_data):
-        """Synchroniser les données de pointage depuis la pointeuse"""
+    def sync_attendance_data(self, zk_attendance_data, debouncer=None):
+        """Synchroniser les données de pointage depuis la pointeuse
+
+        Les pointages répétés sont fusionnés au fil de l'eau par le debouncer
+        (dont les compteurs restent consultables par l'appelant).
+        """
+        if debouncer is None:
+            debouncer = PunchDebouncer()
+        
         try:
             synced_count = 0
-            for attendance in zk_attendance_data:
+            ingested = []
+            received_before = debouncer.received_count
+            suppressed_before = debouncer.suppressed_count
+            for attendance in debouncer.filter(zk_attendance_data):
                 # Vérifier si le log existe déjà
                 cursor = self.db.connection.cursor()
                 cursor.execute("""
@@ -28,13 +53,44 @@ class AttendanceManager:
                     # Ajouter le nouveau log
                     self.db.add_attendance_log(attendance.user_id, attendance.timestamp, attendance.status)
                     synced_count += 1
+                    ingested.append((attendance.user_id, attendance.timestamp, attendance.status))
+            
+            if ingested:
+                self._on_punches_ingested(ingested)
             
-            logger.info(f"{synced_count} nouveaux logs de présence synchronisés")
+            # Compteurs de cet appel: le debouncer peut servir à plusieurs synchronisations
+            suppressed_count = debouncer.suppressed_count - suppressed_before
+            metrics.inc('punches_received_total', debouncer.received_count - received_before)
+            metrics.inc('punches_suppressed_total', suppressed_count)
+            metrics.inc('punches_ingested_total', synced_count)
+            logger.info("%s nouveaux logs de présence synchronisés, %s doublons ignorés",
+                        synced_count, suppressed_count)
             return synced_count
         except Exception as e:
             logger.error(f"Erreur lors de la synchronisation des données de présence: {e}")
             return 0
     
+    def _on_punches_ingested(self, punches):
+        """Propager les nouveaux pointages (employé, horodatage, type) aux résultats dérivés"""
+        # Identifiants tels que stockés par SQLite (affinité INTEGER de la colonne)
+        punches = [(self._employee_key(emp_id), timestamp, punch_type) for emp_id, timestamp, punch_type in punches]
+        employee_ids = {emp_id for emp_id, _, _ in punches}
+        dates = {str(timestamp)[:10] for _, timestamp, _ in punches}
+        departments = self.db.get_employee_departments(employee_ids)
+        self.cache.invalidate(dates, employee_ids, set(departments.values()))
+        self.db.refresh_department_rollup(dates)
+        
+        for emp_id, timestamp, punch_type in punches:
+            occupancy_index.apply_punch(emp_id, departments.get(emp_id), punch_type, timestamp)
+            alert_engine.on_punch(emp_id, punch_type, timestamp)
+    
+    @staticmethod
+    def _employee_key(employee_id):
+        try:
+            return int(employee_id)
+        except (TypeError, ValueError):
+            return employee_id
+    
     def get_daily_attendance(self, date=None):
         """Récupérer les présences pour une journée spécifique"""
         if date is None:
@@ -64,8 +120,20 @@ class AttendanceManager:
             return {}
     
     def calculate_attendance_stats(self, start_date, end_date, employee_id=None, department_id=None):
-        """Calculer les statistiques de présence"""
+        """Calculer les statistiques de présence
+
+        present_employees + absent_employees = total_employees: un employé est
+        absent s'il n'a aucune journée de présence sur la période.
+        employees_with_absences compte les employés actifs ayant manqué au moins
+        un jour ouvré (absent_days jours au total).
+        """
+        cache_key = self.cache.make_key('stats', start_date, end_date, employee_id, department_id)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
+            generation = self.cache.generation
             logs = self.db.get_attendance_logs(start_date, end_date, employee_id, department_id)
             
             stats = {
@@ -73,6 +141,7 @@ class AttendanceManager:
                 'present_employees': 0,
                 'late_employees': 0,
                 'absent_employees': 0,
+                'employees_with_absences': 0,
                 'overtime_hours': 0,
                 'total_work_hours': 0
             }
@@ -99,7 +168,6 @@ class AttendanceManager:
             
             # Calculer les statistiques
             for emp_id, emp_data in employee_days.items():
-                stats['total_employees'] += 1
                 present_days = 0
                 
                 for day, times in emp_data['days'].items():
@@ -112,78 +180,222 @@ class AttendanceManager:
                         stats['total_work_hours'] += work_hours
                         
                         # Vérifier les heures supplémentaires
-                        if work_hours > 8:
-                            stats['overtime_hours'] += work_hours - 8
+                        if work_hours > STANDARD_WORK_HOURS:
+                            stats['overtime_hours'] += work_hours - STANDARD_WORK_HOURS
                         
                         # Vérifier les retards
-                        if in_time.time() > datetime.strptime('09:00:00', '%H:%M:%S').time():
+                        if in_time.time() > LATE_THRESHOLD:
                             stats['late_employees'] += 1
                 
                 if present_days > 0:
                     stats['present_employees'] += 1
-                else:
-                    stats['absent_employees'] += 1
             
+            # Absences: croiser l'effectif actif avec les jours ouvrés de la période
+            roster, working_mask, presence = self._get_presence_masks(start_date, end_date, employee_id, department_id)
+            stats['working_days'] = work_calendar.count_days(working_mask)
+            stats['absent_days'] = 0
+            for emp_id in roster:
+                missed_mask = working_mask & ~presence[emp_id]
+                if missed_mask:
+                    stats['employees_with_absences'] += 1
+                    stats['absent_days'] += work_calendar.count_days(missed_mask)
+            
+            stats['total_employees'] = len(roster.keys() | employee_days.keys())
+            stats['absent_employees'] = stats['total_employees'] - stats['present_employees']
+            self.cache.put(cache_key, stats, generation)
             return stats
         except Exception as e:
             logger.error(f"Erreur lors du calcul des statistiques de présence: {e}")
             return {}
     
+    def get_department_dashboard(self, start_date, end_date, period='day'):
+        """Indicateurs par département (présents, retards, heures) par jour, semaine ou mois"""
+        try:
+            return [dict(row) for row in self.db.get_department_rollup(start_date, end_date, period)]
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération du tableau de bord des départements: {e}")
+            return []
+    
+    def _get_presence_masks(self, start_date, end_date, employee_id=None, department_id=None):
+        """Construire l'effectif actif, le masque des jours ouvrés et les masques de présence"""
+        roster = {emp['id']: emp for emp in self.db.get_employees(department_id=department_id, status='active')}
+        if employee_id:
+            roster = {emp_id: emp for emp_id, emp in roster.items() if emp_id == int(employee_id)}
+        
+        working_mask = work_calendar.working_mask(start_date, end_date)
+        day_bits = work_calendar.day_bits(start_date, end_date)
+        presence = dict.fromkeys(roster, 0)
+        for emp_id, days in self.db.get_presence_days(start_date, end_date, employee_id, department_id):
+            if emp_id in presence:
+                mask = 0
+                for day in days.split(','):
+                    mask |= day_bits[day]
+                presence[emp_id] = mask
+        
+        return roster, working_mask, presence
+    
+    def get_absences(self, start_date, end_date, employee_id=None, department_id=None):
+        """Détecter les absences des employés actifs sur les jours ouvrés de la période"""
+        try:
+            roster, working_mask, presence = self._get_presence_masks(start_date, end_date, employee_id, department_id)
+            
+            absences = {}
+            for emp_id, emp in roster.items():
+                missed_mask = working_mask & ~presence[emp_id]
+                if missed_mask:
+                    absences[emp_id] = {
+                        'employee': f"{emp['first_name']} {emp['last_name']}",
+                        'department': emp['department_name'],
+                        'absent_days': work_calendar.count_days(missed_mask),
+                        'dates': work_calendar.dates_from_mask(start_date, missed_mask)
+                    }
+            
+            return absences
+        except Exception as e:
+            logger.error(f"Erreur lors de la détection des absences: {e}")
+            return {}
+    
     def get_employee_attendance_summary(self, employee_id, start_date, end_date):
         """Récupérer le résumé de présence d'un employé"""
+        cache_key = self.cache.make_key('summary', start_date, end_date, employee_id)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
+            generation = self.cache.generation
             logs = self.db.get_attendance_logs(start_date, end_date, employee_id)
+            working_mask = work_calendar.working_mask(start_date, end_date)
+            day_bits = work_calendar.day_bits(start_date, end_date)
+            summary = self._summarize_logs(logs, working_mask, day_bits)
             
-            summary = {
-                'total_days': 0,
-                'present_days': 0,
-                'absent_days': 0,
-                'late_days': 0,
-                'early_departures': 0,
-                'total_hours': 0,
-                'overtime_hours': 0
+            self.cache.put(cache_key, summary, generation)
+            return summary
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération du résumé de présence: {e}")
+            return {}
+    
+    def get_employee_attendance_summaries(self, employee_ids, start_date, end_date):
+        """Calculer les résumés de présence d'un lot d'employés avec une seule requête"""
+        try:
+            working_mask = work_calendar.working_mask(start_date, end_date)
+            day_bits = work_calendar.day_bits(start_date, end_date)
+            
+            # Les logs sont triés par employé: les regrouper au fil de l'eau
+            logs_by_employee = {emp_id: [] for emp_id in employee_ids}
+            for log in self.db.get_attendance_logs_for_employees(employee_ids, start_date, end_date):
+                logs_by_employee.setdefault(log['employee_id'], []).append(log)
+            
+            return {
+                emp_id: self._summarize_logs(logs, working_mask, day_bits)
+                for emp_id, logs in logs_by_employee.items()
             }
+        except Exception as e:
+            logger.error(f"Erreur lors du calcul des résumés de présence par lot: {e}")
+            return {}
+    
+    def get_period_summaries(self, start_date, end_date, department_id=None, workers=None, shard_size=None):
+        """Calculer les résumés de présence de tout l'effectif actif en parallèle
+
+        L'effectif est découpé en lots calculés dans un pool de processus, chaque
+        processus ouvrant sa propre connexion en lecture seule.
+        """
+        try:
+            generation = self.cache.generation
+            employee_ids = [emp['id'] for emp in self.db.get_employees(department_id=department_id, status='active')]
+            if not employee_ids:
+                return {}
             
-            days_data = {}
-            for log in logs:
-                log_date = log['datetime'].split()[0]
-                if log_date not in days_data:
-                    days_data[log_date] = {'in': None, 'out': None}
-                
-                if log['type'] == 'IN':
-                    days_data[log_date]['in'] = log['datetime']
-                elif log['type'] == 'OUT':
-                    days_data[log_date]['out'] = log['datetime']
-            
-            summary['total_days'] = len(days_data)
-            
-            for day, times in days_data.items():
-                if times['in'] and times['out']:
-                    summary['present_days'] += 1
-                    
-                    in_time = datetime.strptime(times['in'], '%Y-%m-%d %H:%M:%S')
-                    out_time = datetime.strptime(times['out'], '%Y-%m-%d %H:%M:%S')
-                    work_hours = (out_time - in_time).total_seconds() / 3600
-                    summary['total_hours'] += work_hours
-                    
-                    # Vérifier les retards
-                    if in_time.time() > datetime.strptime('09:00:00', '%H:%M:%S').time():
-                        summary['late_days'] += 1
-                    
-                    # Vérifier les départs anticipés
-                    if out_time.time() < datetime.strptime('17:00:00', '%H:%M:%S').time():
-                        summary['early_departures'] += 1
-                    
-                    # Vérifier les heures supplémentaires
-                    if work_hours > 8:
-                        summary['overtime_hours'] += work_hours - 8
-                else:
-                    summary['absent_days'] += 1
+            workers = workers or BATCH_WORKERS or os.cpu_count() or 1
+            if shard_size is None:
+                # Plusieurs lots par processus pour lisser les écarts de charge
+                shard_size = max(1, -(-len(employee_ids) // (workers * 4)))
+            shards = [employee_ids[offset:offset + shard_size] for offset in range(0, len(employee_ids), shard_size)]
             
-            return summary
+            summaries = {}
+            if workers == 1 or len(shards) == 1:
+                for shard in shards:
+                    summaries.update(self.get_employee_attendance_summaries(shard, start_date, end_date))
+            else:
+                with ProcessPoolExecutor(max_workers=min(workers, len(shards)), initializer=_init_summary_worker) as executor:
+                    futures = [executor.submit(_compute_summary_shard, shard, start_date, end_date) for shard in shards]
+                    for future in futures:
+                        summaries.update(future.result())
+            
+            for emp_id, summary in summaries.items():
+                self.cache.put(self.cache.make_key('summary', start_date, end_date, emp_id), summary, generation)
+            
+            logger.info("%s résumés de présence calculés en %s lots", len(summaries), len(shards))
+            return summaries
         except Exception as e:
-            logger.error(f"Erreur lors de la récupération du résumé de présence: {e}")
+            logger.error(f"Erreur lors du calcul des résumés de présence de la période: {e}")
             return {}
+    
+    @staticmethod
+    def _summarize_logs(logs, working_mask, day_bits):
+        """Construire le résumé de présence à partir des logs d'un employé"""
+        summary = {
+            'total_days': 0,
+            'present_days': 0,
+            'absent_days': 0,
+            'late_days': 0,
+            'early_departures': 0,
+            'total_hours': 0,
+            'overtime_hours': 0
+        }
+        
+        days_data = {}
+        for log in logs:
+            log_date = log['datetime'].split()[0]
+            if log_date not in days_data:
+                days_data[log_date] = {'in': None, 'out': None}
+            
+            if log['type'] == 'IN':
+                days_data[log_date]['in'] = log['datetime']
+            elif log['type'] == 'OUT':
+                days_data[log_date]['out'] = log['datetime']
+        
+        # Jours ouvrés de la période et jours ouvrés sans aucun pointage
+        presence_mask = 0
+        for day in days_data:
+            presence_mask |= day_bits.get(day, 0)
+        summary['total_days'] = work_calendar.count_days(working_mask)
+        summary['absent_days'] = work_calendar.count_days(working_mask & ~presence_mask)
+        
+        for day, times in days_data.items():
+            if times['in'] and times['out']:
+                summary['present_days'] += 1
+                
+                in_time = datetime.fromisoformat(times['in'])
+                out_time = datetime.fromisoformat(times['out'])
+                work_hours = (out_time - in_time).total_seconds() / 3600
+                summary['total_hours'] += work_hours
+                
+                # Vérifier les retards
+                if in_time.time() > LATE_THRESHOLD:
+                    summary['late_days'] += 1
+                
+                # Vérifier les départs anticipés
+                if out_time.time() < EARLY_DEPARTURE_THRESHOLD:
+                    summary['early_departures'] += 1
+                
+                # Vérifier les heures supplémentaires
+                if work_hours > STANDARD_WORK_HOURS:
+                    summary['overtime_hours'] += work_hours - STANDARD_WORK_HOURS
+        
+        return summary
+
+# Gestionnaire propre à chaque processus de calcul (connexion en lecture seule)
+_worker_manager = None
+
+def _init_summary_worker():
+    """Initialiser un processus de calcul avec sa propre connexion en lecture seule"""
+    global _worker_manager
+    _worker_manager = AttendanceManager(DatabaseManager(read_only=True))
+
+def _compute_summary_shard(employee_ids, start_date, end_date):
+    """Calculer les résumés d'un lot d'employés dans un processus de calcul"""
+    return _worker_manager.get_employee_attendance_summaries(employee_ids, start_date, end_date)
 
 # Instance globale du gestionnaire de présence
-attendance_manager = AttendanceManager()
+attendance_manager = LazyInstance(AttendanceManager)
@@ -0,0 +1,178 @@
+"""
+Mesure des performances des requêtes, calculs et rapports sur une base de référence.
+
+Exemples:
+    python generate_dataset.py bench.db --employees 2000 --years 1 --end 2025-12-31
+    python benchmark.py bench.db --save            # enregistrer les références
+    python benchmark.py bench.db                   # comparer aux références
+
+Chaque cas est exécuté une fois à vide puis --repeat fois; la médiane est
+comparée à celle des références (benchmark_baselines.json). Le code de
+sortie est 1 si un cas ralentit au-delà de la tolérance (--tolerance).
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+BASELINE_FILE = 'benchmark_baselines.json'
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_REPEAT = 5
+
+EXIT_OK = 0
+EXIT_REGRESSION = 1
+EXIT_USAGE = 2
+
+def _build_cases(db, period_start, period_end, employee_id, output_dir):
+    """Cas mesurés: nom -> fonction sans argument"""
+    from attendance_manager import AttendanceManager
+    from employee_manager import EmployeeManager
+    from report_manager import ReportManager
+    from stats_cache import stats_cache
+
+    attendance = AttendanceManager(db)
+    employees = EmployeeManager(db)
+    reports = ReportManager(db)
+    year_start = (date.fromisoformat(period_end) - timedelta(days=364)).isoformat()
+
+    def uncached(func):
+        # Les résultats mis en cache ne mesureraient que le cache
+        def run():
+            stats_cache.clear()
+            return func()
+        return run
+
+    return {
+        'get_attendance_logs': lambda: db.get_attendance_logs(period_start, period_end),
+        'calculate_attendance_stats': uncached(
+            lambda: attendance.calculate_attendance_stats(period_start, period_end)),
+        'get_employee_attendance_summary': uncached(
+            lambda: attendance.get_employee_attendance_summary(employee_id, year_start, period_end)),
+        'search_employees': lambda: employees.search_employees('ma'),
+        'report_excel_monthly': lambda: reports.build_report(
+            'excel', 'monthly', period_start, period_end, file_path=os.path.join(output_dir, 'bench.xlsx')),
+        'report_pdf_daily': lambda: reports.build_report(
+            'pdf', 'daily', period_start, period_end, file_path=os.path.join(output_dir, 'bench.pdf')),
+    }
+
+def _dataset_info(db):
+    """Caractéristiques de la base mesurée (pour vérifier que les références sont comparables)"""
+    cursor = db.connection.cursor()
+    employees = cursor.execute("SELECT COUNT(*) FROM employees").fetchone()[0]
+    punches, first, last = cursor.execute(
+        "SELECT COUNT(*), MIN(datetime), MAX(datetime) FROM attendance_logs").fetchone()
+    return {'employees': employees, 'punches': punches, 'first_punch': first, 'last_punch': last}
+
+def run_benchmarks(db, repeat=DEFAULT_REPEAT, only=None, period_days=30):
+    """Exécuter les cas et retourner {nom: {median, min, max, runs}}"""
+    info = _dataset_info(db)
+    if not info['punches']:
+        raise ValueError("La base ne contient aucun pointage")
+    period_end = info['last_punch'][:10]
+    period_start = (date.fromisoformat(period_end) - timedelta(days=period_days - 1)).isoformat()
+    employee_id = db.connection.execute(
+        "SELECT employee_id FROM attendance_logs WHERE datetime >= ? LIMIT 1", (period_start,)).fetchone()[0]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for name, case in _build_cases(db, period_start, period_end, employee_id, output_dir).items():
+            if only and name not in only:
+                continue
+            case()
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                case()
+                timings.append(time.perf_counter() - start)
+            results[name] = {
+                'median': round(statistics.median(timings), 6),
+                'min': round(min(timings), 6),
+                'max': round(max(timings), 6),
+                'runs': repeat
+            }
+            print(f"{name:<34} médiane {results[name]['median'] * 1000:>10.1f} ms  "
+                  f"(min {results[name]['min'] * 1000:.1f}, max {results[name]['max'] * 1000:.1f})", flush=True)
+    return info, results
+
+def compare(results, baseline, tolerance):
+    """Cas plus lents que la référence au-delà de la tolérance: [(nom, référence, mesure)]"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get('results', {}).get(name)
+        if reference and result['median'] > reference['median'] * (1 + tolerance):
+            regressions.append((name, reference['median'], result['median']))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesurer les performances sur une base de référence")
+    parser.add_argument('database', help="base à mesurer (voir generate_dataset.py)")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="fichier des références (JSON)")
+    parser.add_argument('--save', action='store_true', help="enregistrer les mesures comme références")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="ralentissement toléré (0.25 = +25 %%)")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--only', nargs='+', metavar='CAS', help="ne mesurer que ces cas")
+    args = parser.parse_args(argv)
+
+    if args.tolerance < 0 or args.repeat < 1:
+        parser.error("la tolérance doit être positive et --repeat au moins 1")
+    if not os.path.exists(args.database):
+        print(f"Base introuvable: {args.database}", file=sys.stderr)
+        return EXIT_USAGE
+
+    # Mesurer la base indiquée et non celle de la configuration
+    os.environ['ZKATT_DB_PATH'] = args.database
+    from logging_config import setup_logging
+    from db_manager import DatabaseManager
+    setup_logging('WARNING', log_file=None)
+
+    db = DatabaseManager()
+    try:
+        info, results = run_benchmarks(db, args.repeat, args.only)
+    finally:
+        db.close()
+
+    environment = {'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version,
+                   'machine': platform.machine(), 'cpus': os.cpu_count()}
+
+    if args.save:
+        baseline = {'dataset': info, 'environment': environment, 'results': results}
+        if args.only and os.path.exists(args.baseline):
+            # Mise à jour partielle: conserver les autres cas
+            with open(args.baseline, encoding='utf-8') as f:
+                previous = json.load(f)
+            baseline['results'] = {**previous.get('results', {}), **results}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"Références enregistrées dans {args.baseline}")
+        return EXIT_OK
+
+    if not os.path.exists(args.baseline):
+        print(f"Aucune référence ({args.baseline}): lancer d'abord avec --save", file=sys.stderr)
+        return EXIT_USAGE
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('dataset') != info:
+        print("Attention: la base mesurée diffère de celle des références", file=sys.stderr)
+    if baseline.get('environment') != environment:
+        print("Attention: environnement différent de celui des références", file=sys.stderr)
+
+    regressions = compare(results, baseline, args.tolerance)
+    for name, reference, measured in regressions:
+        print(f"RÉGRESSION {name}: {reference * 1000:.1f} ms -> {measured * 1000:.1f} ms "
+              f"(+{(measured / reference - 1) * 100:.0f} %)", file=sys.stderr)
+    if regressions:
+        return EXIT_REGRESSION
+    print(f"Aucune régression au-delà de {args.tolerance * 100:.0f} %")
+    return EXIT_OK
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+import json
+import logging
+from db_manager import db_manager
+from config import CHANGE_FEED_BATCH_SIZE, CHANGE_FEED_RETENTION_DAYS
+
+logger = logging.getLogger(__name__)
+
+class ChangeFeed:
+    """Flux des modifications (employés, pointages) pour les consommateurs en aval.
+
+    Les événements sont écrits par déclencheur dans la transaction de la
+    modification: un pointage ou un employé enregistré a toujours son
+    événement, et inversement. Chaque consommateur a une position (dernier
+    événement acquitté); il lit les événements suivants par lots puis acquitte
+    le dernier traité. Livraison au moins une fois: un lot non acquitté (arrêt,
+    erreur) est relu à l'appel suivant, le consommateur doit donc ignorer les
+    doublons (identifiant d'événement croissant).
+    """
+
+    def __init__(self, db=None):
+        self.db = db or db_manager
+
+    def register(self, consumer, from_start=False):
+        """Inscrire un consommateur (sans effet s'il l'est déjà).
+
+        from_start: recevoir tout le flux conservé, c'est-à-dire les événements
+        non encore acquittés par tous les autres consommateurs ou, s'il n'y en
+        a aucun, ceux des retention_days derniers jours (voir compact)."""
+        return self.db.add_feed_consumer(consumer, from_start)
+
+    def unregister(self, consumer):
+        """Désinscrire un consommateur: ses événements non lus pourront être compactés"""
+        return self.db.remove_feed_consumer(consumer)
+
+    def fetch(self, consumer, limit=CHANGE_FEED_BATCH_SIZE):
+        """Prochain lot d'événements non acquittés (la position n'avance pas).
+
+        Retourne une liste de dict {id, entity, entity_id, operation, payload,
+        created_at}, payload étant la ligne modifiée (ou supprimée) décodée."""
+        rows = self.db.get_feed_events(consumer, limit)
+        if rows is None:
+            raise KeyError(f"Consommateur du flux inconnu ou flux illisible: {consumer}")
+        events = []
+        for row in rows:
+            event = dict(row)
+            event['payload'] = json.loads(event['payload'])
+            events.append(event)
+        return events
+
+    def ack(self, consumer, position):
+        """Acquitter les événements jusqu'à position (identifiant) incluse"""
+        return self.db.ack_feed_events(consumer, position)
+
+    def consume(self, consumer, handler, limit=CHANGE_FEED_BATCH_SIZE, max_batches=None):
+        """Transmettre à handler(events) les lots en attente, chacun acquitté après son traitement.
+
+        Si handler lève une exception, le lot n'est pas acquitté (il sera
+        retransmis) et l'exception est propagée. Retourne le nombre
+        d'événements traités."""
+        processed = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            events = self.fetch(consumer, limit)
+            if not events:
+                break
+            handler(events)
+            self.ack(consumer, events[-1]['id'])
+            processed += len(events)
+            batches += 1
+            if len(events) < limit:
+                break
+        return processed
+
+    def status(self):
+        """Consommateurs: [{name, position, updated_at, pending}]"""
+        return [dict(row) for row in self.db.get_feed_consumers()]
+
+    def compact(self, retention_days=CHANGE_FEED_RETENTION_DAYS):
+        """Supprimer les événements acquittés par tous les consommateurs.
+
+        Sans consommateur inscrit: ceux de plus de retention_days jours."""
+        deleted = self.db.compact_change_feed(retention_days)
+        if deleted:
+            logger.info("Flux des modifications compacté: %s événements supprimés", deleted)
+        return deleted
+
+# Instance globale du flux des modifications
+change_feed = ChangeFeed()
@@ -0,0 +1,312 @@
+"""
+Mode ligne de commande (sans interface graphique) de l'application de présence.
+
+Exemples:
+    zkatt-cli sync --yes
+    zkatt-cli stats --start 2025-01-01 --end 2025-01-31 --json
+    zkatt-cli report monthly --format pdf --start 2025-01-01 --end 2025-01-31
+    zkatt-cli report daily --format pdf --start 2025-01-01 --end 2025-01-31 --per-employee --zip
+    zkatt-cli export punches --format csv --start 2025-01-01 --end 2025-01-31 -o - | gzip > pointages.csv.gz
+    zkatt-cli replay --device principale --start 2025-01-01
+    zkatt-cli feed fetch paie --limit 500 > lot.jsonl && zkatt-cli feed ack paie 12345
+
+Chaque sous-commande n'importe que les modules dont elle a besoin (la
+synchronisation seule charge la pointeuse, les rapports seuls openpyxl et
+reportlab). Codes de sortie: 0 succès, 1 erreur, 2 usage invalide,
+3 avertissement (par exemple synchronisation partielle).
+"""
+
+import argparse
+import json
+import logging
+import sys
+from datetime import datetime
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_WARNING = 3
+
+def _date(value):
+    """Type argparse: date au format AAAA-MM-JJ"""
+    try:
+        datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"date invalide (AAAA-MM-JJ attendu): {value}")
+    return value
+
+def _print(args, result, text=None):
+    """Afficher le résultat en JSON (--json) ou sous forme lisible"""
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2, default=str))
+    elif text is not None:
+        print(text)
+    elif isinstance(result, dict):
+        for key, value in result.items():
+            print(f"{key}: {value}")
+    else:
+        print(result)
+
+def _check_period(args):
+    if args.start > args.end:
+        print("La date de début doit précéder la date de fin", file=sys.stderr)
+        return False
+    return True
+
+def cmd_sync(args):
+    """Synchroniser utilisateurs et pointages depuis la pointeuse"""
+    from main import AttendanceApp
+
+    app = AttendanceApp()
+    try:
+        result = app._synchronize_all(confirmed=args.yes, device=args.device)
+    finally:
+        for zk in app.devices.values():
+            if zk.is_connected():
+                zk.disconnect()
+    _print(args, result, f"{result['status']}: {result['message']}")
+    return {'success': EXIT_OK, 'warning': EXIT_WARNING}.get(result['status'], EXIT_ERROR)
+
+def cmd_stats(args):
+    """Statistiques de présence de la période"""
+    from attendance_manager import attendance_manager
+
+    if not _check_period(args):
+        return EXIT_USAGE
+    stats = attendance_manager.calculate_attendance_stats(args.start, args.end, args.employee, args.department)
+    if not stats:
+        print("Aucune statistique disponible pour la période", file=sys.stderr)
+        return EXIT_ERROR
+    _print(args, stats)
+    return EXIT_OK
+
+def cmd_summary(args):
+    """Résumé de présence d'un employé"""
+    from attendance_manager import attendance_manager
+    from employee_manager import employee_manager
+
+    if not _check_period(args):
+        return EXIT_USAGE
+    if employee_manager.get_employee(args.employee) is None:
+        print(f"Employé inconnu: {args.employee}", file=sys.stderr)
+        return EXIT_ERROR
+    summary = attendance_manager.get_employee_attendance_summary(args.employee, args.start, args.end)
+    if not summary:
+        print(f"Aucun résumé disponible pour l'employé {args.employee}", file=sys.stderr)
+        return EXIT_ERROR
+    _print(args, summary)
+    return EXIT_OK
+
+def cmd_report(args):
+    """Générer un rapport Excel ou PDF (ou un rapport par employé)"""
+    if not _check_period(args):
+        return EXIT_USAGE
+
+    if args.per_employee:
+        from report_batch import batch_report_generator
+        path = batch_report_generator.generate(args.format, args.start, args.end, args.department,
+                                               archive=args.zip)
+    else:
+        from report_manager import report_manager
+        generate = (report_manager.generate_excel_report if args.format == 'excel'
+                    else report_manager.generate_pdf_report)
+        path = generate(args.type, args.start, args.end, args.employee, args.department)
+
+    if not path:
+        print("Échec de la génération du rapport", file=sys.stderr)
+        return EXIT_ERROR
+    _print(args, {'file_path': path}, path)
+    return EXIT_OK
+
+def cmd_export(args):
+    """Exporter des données brutes (CSV, JSONL, Parquet)"""
+    from data_exporter import data_exporter
+
+    if not _check_period(args):
+        return EXIT_USAGE
+    count = data_exporter.export(args.dataset, args.format, args.output, args.start, args.end,
+                                 args.employee, args.department, args.compression)
+    if count is None:
+        return EXIT_ERROR
+    # Sur la sortie standard, les données exportées sont le résultat: rien d'autre à afficher
+    if args.output != '-':
+        _print(args, {'rows': count, 'output': args.output}, f"{count} lignes exportées vers {args.output}")
+    return EXIT_OK
+
+def cmd_api(args):
+    """Lancer l'API JSON locale en lecture seule (jusqu'à Ctrl+C)"""
+    from api_server import run_api_server
+    from config import API_HOST, API_PORT
+
+    run_api_server(args.host or API_HOST, args.port or API_PORT)
+    return EXIT_OK
+
+def cmd_replay(args):
+    """Réinjecter les lectures brutes journalisées, sans la pointeuse"""
+    from device_journal import replay_journals
+
+    if args.start and args.end and not _check_period(args):
+        return EXIT_USAGE
+    result = replay_journals(args.device, args.start, args.end, args.workers, args.dry_run)
+    _print(args, result, f"{result['files']} fichiers, {result['punches']} pointages lus, "
+                         f"{result['ingested']} ajoutés ({result.get('seconds', 0)} s)")
+    return EXIT_OK
+
+def cmd_feed(args):
+    """Flux des modifications: inscription, lecture par lots, acquittement, compactage"""
+    from change_feed import change_feed
+    from config import CHANGE_FEED_BATCH_SIZE, CHANGE_FEED_RETENTION_DAYS
+
+    if args.action == 'register':
+        created = change_feed.register(args.consumer, args.from_start)
+        _print(args, {'consumer': args.consumer, 'created': created},
+               f"Consommateur {args.consumer} {'inscrit' if created else 'déjà inscrit'}")
+    elif args.action == 'unregister':
+        if not change_feed.unregister(args.consumer):
+            print(f"Consommateur inconnu: {args.consumer}", file=sys.stderr)
+            return EXIT_ERROR
+    elif args.action == 'fetch':
+        # Un événement JSON par ligne; la position n'avance qu'avec 'ack'
+        for event in change_feed.fetch(args.consumer, args.limit or CHANGE_FEED_BATCH_SIZE):
+            print(json.dumps(event, ensure_ascii=False, default=str))
+    elif args.action == 'ack':
+        if not change_feed.ack(args.consumer, args.position):
+            print(f"Consommateur inconnu: {args.consumer}", file=sys.stderr)
+            return EXIT_ERROR
+    elif args.action == 'status':
+        consumers = change_feed.status()
+        _print(args, consumers, "\n".join(f"{c['name']}: position {c['position']}, {c['pending']} en attente"
+                                          for c in consumers) or "Aucun consommateur")
+    elif args.action == 'compact':
+        deleted = change_feed.compact(CHANGE_FEED_RETENTION_DAYS if args.retention_days is None
+                                      else args.retention_days)
+        _print(args, {'deleted': deleted}, f"{deleted} événements supprimés")
+    return EXIT_OK
+
+def _common_options(default=False):
+    """Options acceptées avant comme après la sous-commande.
+
+    Les sous-commandes utilisent default=argparse.SUPPRESS: sans l'option,
+    elles n'écrasent pas la valeur lue avant la sous-commande."""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--json', action='store_true', default=default, help="résultat au format JSON")
+    common.add_argument('-v', '--verbose', action='store_true', default=default,
+                        help="afficher les journaux d'information")
+    common.add_argument('--profile-sql', action='store_true', default=default,
+                        help="afficher les requêtes SQL les plus coûteuses (sortie d'erreur)")
+    return common
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='zkatt-cli', parents=[_common_options()],
+                                     description="Gestion de présence ZKTeco en ligne de commande")
+    common = _common_options(argparse.SUPPRESS)
+    subparsers = parser.add_subparsers(dest='command', metavar='commande')
+    subparsers.required = True
+
+    def add_parser(parsers, name, **kwargs):
+        return parsers.add_parser(name, parents=[common], **kwargs)
+
+    def period(sub, employee=True):
+        sub.add_argument('--start', type=_date, required=True, help="date de début (AAAA-MM-JJ)")
+        sub.add_argument('--end', type=_date, required=True, help="date de fin (AAAA-MM-JJ)")
+        if employee:
+            sub.add_argument('--employee', type=int, help="identifiant de l'employé")
+        sub.add_argument('--department', type=int, help="identifiant du département")
+
+    sub = add_parser(subparsers, 'sync', help="synchroniser depuis la pointeuse")
+    sub.add_argument('-y', '--yes', action='store_true',
+                     help="confirmer la synchronisation (si REQUIRE_SYNC_CONFIRMATION)")
+    sub.add_argument('--device', help="nom de la pointeuse (ZK_DEVICES), la principale par défaut")
+    sub.set_defaults(handler=cmd_sync)
+
+    sub = add_parser(subparsers, 'stats', help="statistiques de présence")
+    period(sub)
+    sub.set_defaults(handler=cmd_stats)
+
+    sub = add_parser(subparsers, 'summary', help="résumé de présence d'un employé")
+    sub.add_argument('--employee', type=int, required=True, help="identifiant de l'employé")
+    sub.add_argument('--start', type=_date, required=True, help="date de début (AAAA-MM-JJ)")
+    sub.add_argument('--end', type=_date, required=True, help="date de fin (AAAA-MM-JJ)")
+    sub.set_defaults(handler=cmd_summary)
+
+    sub = add_parser(subparsers, 'report', help="générer un rapport Excel ou PDF")
+    sub.add_argument('type', choices=['daily', 'monthly'], help="type de rapport")
+    sub.add_argument('--format', choices=['excel', 'pdf'], default='excel')
+    period(sub)
+    sub.add_argument('--per-employee', action='store_true', help="un rapport quotidien par employé")
+    sub.add_argument('--zip', action='store_true', help="avec --per-employee: archive ZIP")
+    sub.set_defaults(handler=cmd_report)
+
+    sub = add_parser(subparsers, 'export', help="exporter des données brutes")
+    sub.add_argument('dataset', choices=['punches', 'daily', 'monthly'], help="jeu de données")
+    sub.add_argument('--format', choices=['csv', 'jsonl', 'parquet'], default='csv')
+    period(sub)
+    sub.add_argument('-o', '--output', default='-', help="fichier de sortie ('-' pour la sortie standard)")
+    sub.add_argument('--compression', help="gzip, bz2, xz (texte) ou snappy, zstd... (Parquet)")
+    sub.set_defaults(handler=cmd_export)
+
+    sub = add_parser(subparsers, 'api', help="lancer l'API JSON locale en lecture seule")
+    sub.add_argument('--host', help="adresse d'écoute (API_HOST par défaut)")
+    sub.add_argument('--port', type=int, help="port d'écoute (API_PORT par défaut)")
+    sub.set_defaults(handler=cmd_api)
+
+    sub = add_parser(subparsers, 'replay', help="réinjecter le journal des pointeuses (sans pointeuse)")
+    sub.add_argument('--device', action='append', help="nom de la pointeuse (répétable), toutes par défaut")
+    sub.add_argument('--start', type=_date, help="premier jour du journal (AAAA-MM-JJ)")
+    sub.add_argument('--end', type=_date, help="dernier jour du journal (AAAA-MM-JJ)")
+    sub.add_argument('--workers', type=int, help="processus de décodage (BATCH_WORKERS par défaut)")
+    sub.add_argument('--dry-run', action='store_true', help="décoder sans réinjecter (mesure)")
+    sub.set_defaults(handler=cmd_replay)
+
+    sub = add_parser(subparsers, 'feed', help="flux des modifications pour les consommateurs en aval")
+    actions = sub.add_subparsers(dest='action', metavar='action')
+    actions.required = True
+    action = add_parser(actions, 'register', help="inscrire un consommateur")
+    action.add_argument('consumer')
+    action.add_argument('--from-start', action='store_true', help="recevoir tout le flux conservé")
+    action = add_parser(actions, 'unregister', help="désinscrire un consommateur")
+    action.add_argument('consumer')
+    action = add_parser(actions, 'fetch', help="lire le prochain lot (JSON, un événement par ligne)")
+    action.add_argument('consumer')
+    action.add_argument('--limit', type=int, default=None, help="taille du lot (CHANGE_FEED_BATCH_SIZE par défaut)")
+    action = add_parser(actions, 'ack', help="acquitter les événements jusqu'à une position incluse")
+    action.add_argument('consumer')
+    action.add_argument('position', type=int)
+    add_parser(actions, 'status', help="position et retard des consommateurs")
+    action = add_parser(actions, 'compact', help="supprimer les événements consommés par tous")
+    action.add_argument('--retention-days', type=int, default=None,
+                        help="conservation sans consommateur inscrit (CHANGE_FEED_RETENTION_DAYS par défaut)")
+    sub.set_defaults(handler=cmd_feed)
+
+    return parser
+
+def main(argv=None):
+    """Point d'entrée de la ligne de commande"""
+    args = build_parser().parse_args(argv)
+
+    # Les journaux vont sur la sortie d'erreur; seuls les avertissements par défaut
+    from logging_config import setup_logging
+    setup_logging(logging.INFO if args.verbose else logging.WARNING, log_file=None)
+
+    if getattr(args, 'per_employee', False) and args.type != 'daily':
+        print("--per-employee ne s'applique qu'aux rapports quotidiens", file=sys.stderr)
+        return EXIT_USAGE
+
+    if args.profile_sql:
+        # Avant toute connexion: les connexions sont ouvertes au premier accès
+        from sql_profiler import sql_profiler
+        sql_profiler.enabled = True
+
+    try:
+        return args.handler(args)
+    except KeyboardInterrupt:
+        return EXIT_ERROR
+    except Exception as e:
+        print(f"Erreur: {e}", file=sys.stderr)
+        return EXIT_ERROR
+    finally:
+        if args.profile_sql:
+            print(sql_profiler.format_report(), file=sys.stderr)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
 # Configuration de l'application de gestion de présence biométrique
+import os
 
 # Configuration ZKTeco
 ZK_IP = "10.0.0.4"
@@ -6,7 +7,7 @@ ZK_PORT = 4370
 ZK_TIMEOUT = 30
 
 # Configuration base de données
-DB_PATH = "attendance.db"
+DB_PATH = os.environ.get("ZKATT_DB_PATH", "attendance.db")  # ZKATT_DB_PATH: autre base (tests de charge)
 
 # Configuration des rapports
 REPORTS_DIR = "reports"
@@ -17,10 +18,94 @@ SYNC_INTERVAL = 3600  # 1 heure en secondes
 AUTO_SYNC_TIME = "08:00"  # Synchronisation automatique à 8h00
 AUTO_SYNC_ENABLED = False  # Désactiver la synchronisation automatique par défaut
 REQUIRE_SYNC_CONFIRMATION = True  # Demander confirmation avant synchronisation
+SYNC_JITTER = 60  # Délai aléatoire (secondes) ajouté à chaque synchronisation planifiée
+SCHEDULER_WORKERS = 2  # Tâches planifiées exécutées en parallèle
+
+# Pointeuses synchronisées automatiquement. Planifications possibles par pointeuse:
+# "interval" (secondes), "daily" ("HH:MM") et "cron" ("minute heure jour mois jour_semaine");
+# si plusieurs sont indiquées, la synchronisation a lieu à la première échéance de chacune;
+# sans planification: toutes les SYNC_INTERVAL secondes
+ZK_DEVICES = [
+    {"name": "principale", "ip": ZK_IP, "port": ZK_PORT, "interval": SYNC_INTERVAL, "daily": AUTO_SYNC_TIME},
+]
+PUNCH_DEBOUNCE_SECONDS = 60  # Fusionner les pointages d'un employé à moins de 60 secondes d'intervalle
+
+# Journal des données brutes lues sur les pointeuses (rejouable sans la pointeuse)
+JOURNAL_ENABLED = True
+JOURNAL_DIR = "journal"  # Un fichier par pointeuse et par jour
+JOURNAL_COMPRESSION_LEVEL = 6  # zlib, 1 (rapide) à 9 (compact)
+JOURNAL_RETENTION_DAYS = 180  # Fichiers plus anciens supprimés chaque jour (0 = conservés)
+JOURNAL_PRUNE_TIME = "03:30"
+
+# Calendrier de travail
+WORK_START_TIME = "09:00:00"  # Heure de début de journée (au-delà: retard)
+WORK_END_TIME = "17:00:00"  # Heure de fin de journée (en deçà: départ anticipé)
+STANDARD_WORK_HOURS = 8  # Heures journalières au-delà desquelles on compte des heures supplémentaires
+WORKING_DAYS = [0, 1, 2, 3, 4]  # Jours ouvrés (0 = lundi ... 6 = dimanche)
+HOLIDAYS = []  # Jours fériés au format "YYYY-MM-DD"
+
+# Alertes de présence en temps réel
+ALERT_LATE_GRACE_MINUTES = 10  # Tolérance avant une alerte de retard
+ALERT_NO_IN_DEADLINE = "10:00:00"  # Alerte si aucune entrée à cette heure (jours ouvrés)
+ALERT_OPEN_IN_HOURS = 12  # Alerte si une entrée reste sans sortie plus longtemps
+ALERT_CHECK_INTERVAL = 300  # Vérification des échéances toutes les 5 minutes
+
+# Cache des statistiques de présence
+STATS_CACHE_MAX_ENTRIES = 256
+STATS_CACHE_MAX_BYTES = 16 * 1024 * 1024  # 16 Mo
+
+# Calculs par lots (clôture de période)
+BATCH_WORKERS = None  # Nombre de processus de calcul (None = nombre de cœurs)
+
+# Génération des rapports
+REPORT_FETCH_SIZE = 1000  # Lignes lues par lot depuis la base
+REPORT_WIDTH_SAMPLE_ROWS = 500  # Lignes utilisées pour estimer la largeur des colonnes Excel/PDF
+EXPORT_BATCH_SIZE = 5000  # Lignes écrites par lot lors des exports CSV/JSONL/Parquet
+REPORT_THREAD_WORKERS = 2  # Rapports Excel générés en parallèle (threads)
+REPORT_PROCESS_WORKERS = None  # Processus de mise en page PDF (None = nombre de cœurs)
+REPORT_CACHE_MAX_BYTES = 500 * 1024 * 1024  # Taille maximale du dossier des rapports (500 Mo)
+REPORT_BATCH_CHUNK_SIZE = 25  # Employés mis en page par tâche lors des rapports individuels
+
+# Métriques de performance
+METRICS_ENABLED = True  # Compteurs et histogrammes de latence (pointeuse, base, calculs, rapports)
+METRICS_HOST = "127.0.0.1"  # Adresse d'écoute du point /metrics (format Prometheus)
+METRICS_PORT = 9108  # Port du point /metrics (None = pas de serveur)
+METRICS_SNAPSHOT_INTERVAL = 900  # Enregistrement des métriques en base toutes les 15 minutes
+METRICS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)  # Bornes (secondes)
+
+# API locale en lecture seule (JSON)
+API_ENABLED = False  # Lancer l'API avec l'application
+API_HOST = "127.0.0.1"
+API_PORT = 8765
+API_POOL_SIZE = 4  # Connexions en lecture seule du pool
+API_CACHE_TTL = 5  # Durée de conservation des réponses (secondes)
+
+# Tableaux de l'interface (chargement par pages)
+TABLE_PAGE_SIZE = 200  # Lignes par page
+TABLE_CACHE_PAGES = 50  # Pages conservées en mémoire par tableau
+TABLE_PREFETCH_PAGES = 2  # Pages voisines préchargées de chaque côté
+TABLE_KEY_INDEX_MIN_PAGES = 50  # Au-delà, index des clés de pages calculé en arrière-plan
+
+# Flux des modifications (consommateurs en aval: paie...)
+CHANGE_FEED_BATCH_SIZE = 500  # Événements transmis par lot
+CHANGE_FEED_RETENTION_DAYS = 7  # Sans consommateur inscrit: jours d'événements conservés (rejeu)
+CHANGE_FEED_COMPACT_TIME = "03:00"  # Compactage quotidien
+
+# Profilage SQL (diagnostic, désactivé par défaut)
+SQL_PROFILING_ENABLED = False  # Mesurer chaque requête (appels, temps total et maximal, lignes)
+SQL_SLOW_QUERY_MS = 200  # Requêtes journalisées avec leur plan d'exécution au-delà de ce seuil
+SQL_PROGRESS_INTERVAL = 1000  # Instructions SQLite entre deux appels du gestionnaire de progression
 
 # Chemins des fichiers
 LOG_FILE = "app.log"
 
+# Journalisation
+LOG_LEVEL = "INFO"
+LOG_MAX_BYTES = 10 * 1024 * 1024  # Rotation du fichier journal à 10 Mo
+LOG_BACKUP_COUNT = 5  # Fichiers journaux conservés après rotation
+LOG_RATE_LIMIT = 20  # Messages identiques écrits au plus par fenêtre (0 = pas de limite)
+LOG_RATE_INTERVAL = 60  # Durée de la fenêtre en secondes
+
 # Configuration interface
 THEME = "light"  # dark, light, system
 COLOR_THEME = "blue"  # blue, green, dark-blue
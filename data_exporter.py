@@ -0,0 +1,198 @@
+import bz2
+import csv
+import gzip
+import io
+import json
+import logging
+import lzma
+import sys
+from contextlib import contextmanager
+from itertools import islice
+from db_manager import db_manager
+from config import EXPORT_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Champs exportés pour chaque jeu de données: (nom, type)
+EXPORT_FIELDS = {
+    'punches': [
+        ('id', 'int'),
+        ('user_id', 'int'),
+        ('employee_id', 'str'),
+        ('last_name', 'str'),
+        ('first_name', 'str'),
+        ('department_name', 'str'),
+        ('datetime', 'str'),
+        ('type', 'str'),
+        ('sync_status', 'str')
+    ],
+    'daily': [
+        ('employee_id', 'str'),
+        ('last_name', 'str'),
+        ('first_name', 'str'),
+        ('department_name', 'str'),
+        ('date', 'str'),
+        ('time_in', 'str'),
+        ('time_out', 'str'),
+        ('work_hours', 'float')
+    ],
+    'monthly': [
+        ('employee_id', 'str'),
+        ('last_name', 'str'),
+        ('first_name', 'str'),
+        ('department_name', 'str'),
+        ('days_present', 'int'),
+        ('total_hours', 'float'),
+        ('overtime_hours', 'float')
+    ]
+}
+
+EXPORT_FORMATS = ('csv', 'jsonl', 'parquet')
+
+def _import_pyarrow():
+    """Charger pyarrow au premier export Parquet (None s'il n'est pas installé):
+    il est optionnel et coûteux à importer"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError:
+        return None
+
+# Compression des formats texte (flux complet) et du format Parquet (par colonne)
+TEXT_COMPRESSORS = {'gzip': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}
+PARQUET_CODECS = ('snappy', 'gzip', 'zstd', 'brotli', 'lz4')
+
+class DataExporter:
+    """Exports bruts (CSV, JSONL, Parquet) destinés à la paie et à la BI.
+
+    Les lignes sont lues par lots directement depuis les curseurs SQLite et
+    écrites au fur et à mesure: la mémoire utilisée ne dépend pas de la taille
+    de la période exportée. La sortie '-' désigne la sortie standard.
+    """
+
+    def __init__(self, db=None):
+        self.db = db or db_manager
+
+    def export(self, dataset, fmt, output, start_date, end_date, employee_id=None, department_id=None,
+               compression=None, batch_size=EXPORT_BATCH_SIZE):
+        """Exporter un jeu de données ('punches', 'daily' ou 'monthly').
+
+        Retourne le nombre de lignes écrites, ou None en cas d'erreur."""
+        try:
+            if dataset not in EXPORT_FIELDS:
+                logger.error(f"Jeu de données non supporté: {dataset}")
+                return None
+            if fmt not in EXPORT_FORMATS:
+                logger.error(f"Format d'export non supporté: {fmt}")
+                return None
+            if fmt == 'parquet':
+                if _import_pyarrow() is None:
+                    logger.error("Le format Parquet nécessite pyarrow (pip install pyarrow)")
+                    return None
+                if compression and compression not in PARQUET_CODECS:
+                    logger.error(f"Compression non supportée pour Parquet: {compression}")
+                    return None
+            elif compression and compression not in TEXT_COMPRESSORS:
+                logger.error(f"Compression non supportée: {compression}")
+                return None
+
+            fields = EXPORT_FIELDS[dataset]
+            batches = self._batches(self._rows(dataset, start_date, end_date, employee_id, department_id),
+                                    [name for name, _ in fields], batch_size)
+
+            if fmt == 'parquet':
+                count = self._write_parquet(output, fields, batches, compression)
+            else:
+                with self._open_text(output, compression) as stream:
+                    if fmt == 'csv':
+                        count = self._write_csv(stream, fields, batches)
+                    else:
+                        count = self._write_jsonl(stream, fields, batches)
+
+            logger.info("Export %s (%s) terminé: %s lignes vers %s", dataset, fmt, count, output)
+            return count
+
+        except Exception as e:
+            logger.error(f"Erreur lors de l'export {dataset} ({fmt}): {e}")
+            return None
+
+    def _rows(self, dataset, start_date, end_date, employee_id=None, department_id=None):
+        """Itérateur de lignes de la base pour un jeu de données"""
+        if dataset == 'punches':
+            return self.db.iter_punch_rows(start_date, end_date, employee_id, department_id)
+        if dataset == 'daily':
+            return self.db.iter_daily_attendance_rows(start_date, end_date, employee_id, department_id)
+        return self.db.iter_monthly_attendance_rows(start_date, end_date, employee_id, department_id)
+
+    @staticmethod
+    def _batches(rows, names, batch_size):
+        """Regrouper les lignes en lots de tuples, dans l'ordre des champs exportés"""
+        rows = iter(rows)
+        while True:
+            batch = [tuple(row[name] for name in names) for row in islice(rows, batch_size)]
+            if not batch:
+                return
+            yield batch
+
+    @staticmethod
+    @contextmanager
+    def _open_text(output, compression=None):
+        """Ouvrir la destination texte (fichier ou sortie standard), compressée ou non"""
+        if output == '-':
+            sys.stdout.flush()
+            if compression:
+                with TEXT_COMPRESSORS[compression](sys.stdout.buffer, 'wt', encoding='utf-8', newline='') as stream:
+                    yield stream
+            else:
+                stream = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='')
+                try:
+                    yield stream
+                finally:
+                    # Ne pas fermer la sortie standard avec l'enveloppe
+                    stream.flush()
+                    stream.detach()
+            sys.stdout.buffer.flush()
+        else:
+            opener = TEXT_COMPRESSORS.get(compression, open)
+            with opener(output, 'wt', encoding='utf-8', newline='') as stream:
+                yield stream
+
+    @staticmethod
+    def _write_csv(stream, fields, batches):
+        writer = csv.writer(stream)
+        writer.writerow([name for name, _ in fields])
+        count = 0
+        for batch in batches:
+            writer.writerows(batch)
+            count += len(batch)
+        return count
+
+    @staticmethod
+    def _write_jsonl(stream, fields, batches):
+        names = [name for name, _ in fields]
+        count = 0
+        for batch in batches:
+            stream.write(''.join(json.dumps(dict(zip(names, values)), ensure_ascii=False) + '\n'
+                                 for values in batch))
+            count += len(batch)
+        return count
+
+    @staticmethod
+    def _write_parquet(output, fields, batches, compression=None):
+        pyarrow = _import_pyarrow()
+        types = {'int': pyarrow.int64(), 'float': pyarrow.float64(), 'str': pyarrow.string()}
+        schema = pyarrow.schema([(name, types[kind]) for name, kind in fields])
+        sink = sys.stdout.buffer if output == '-' else output
+        count = 0
+        # Un groupe de lignes Parquet par lot lu dans la base
+        with pyarrow.parquet.ParquetWriter(sink, schema, compression=compression or 'none') as writer:
+            for batch in batches:
+                columns = list(zip(*batch))
+                arrays = [pyarrow.array(column, type=field.type) for column, field in zip(columns, schema)]
+                writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+                count += len(batch)
+        return count
+
+# Instance globale de l'exportateur
+data_exporter = DataExporter()
@@ -1,28 +1,119 @@
+import json
 import sqlite3
 import logging
+import time
 from datetime import datetime
-from config import DB_PATH
+from pathlib import Path
+from lazy import LazyInstance
+from metrics import metrics, instrument_methods
+from sql_profiler import sql_profiler, ProfiledCursor
+from config import DB_PATH, WORK_START_TIME, STANDARD_WORK_HOURS, REPORT_FETCH_SIZE, METRICS_ENABLED
+
+# Version du schéma (PRAGMA user_version): à incrémenter à chaque modification
+# des tables, index ou déclencheurs de create_tables()
+SCHEMA_VERSION = 6
+
+# Colonnes des tâches de génération de rapports (table reports)
+REPORT_JOB_COLUMNS = [
+    ('format', 'TEXT'),
+    ('employee_id', 'INTEGER'),
+    ('department_id', 'INTEGER'),
+    ('status', "TEXT DEFAULT 'completed'"),
+    ('progress', 'INTEGER DEFAULT 100'),
+    ('error_message', 'TEXT'),
+    ('started_at', 'TIMESTAMP'),
+    ('finished_at', 'TIMESTAMP'),
+    ('duration', 'REAL')
+]
+
+# Colonnes ajoutées au cumul par département (table department_daily_rollup)
+ROLLUP_COLUMNS = [
+    ('thresholds', 'TEXT')
+]
+
+# Tables dont les modifications font changer la version des données des rapports
+VERSIONED_TABLES = {
+    'employees': ('INSERT', 'UPDATE', 'DELETE'),
+    'departments': ('INSERT', 'UPDATE', 'DELETE'),
+    'attendance_logs': ('UPDATE', 'DELETE')
+}
+
+# Colonnes publiées dans le flux des modifications (table change_feed), par table suivie
+CHANGE_FEED_TABLES = {
+    'employees': ('id', 'employee_id', 'first_name', 'last_name', 'department_id', 'status'),
+    'attendance_logs': ('id', 'employee_id', 'datetime', 'type')
+}
 
-# Configuration du logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+class MeteredConnection(sqlite3.Connection):
+    """Connexion SQLite qui mesure la durée de chaque validation de transaction"""
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            metrics.observe('db_commit_seconds', time.perf_counter() - start)
+
+class ProfiledConnection(MeteredConnection):
+    """Connexion dont les curseurs sont chronométrés par le profileur SQL"""
+
+    vm_ticks = 0
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    # Connection.execute() crée son curseur sans passer par cursor()
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+
+@instrument_methods('db_call_seconds', exclude=('connect', 'close', 'create_tables'))
 class DatabaseManager:
-    def __init__(self):
+    def __init__(self, read_only=False, check_schema=True):
         self.connection = None
+        self.read_only = read_only
         self.connect()
-        self.create_tables()
+        # check_schema=False: connexion d'appoint (tâches), le schéma étant vérifié par l'application
+        if not read_only and check_schema:
+            self._ensure_schema()
+            self._check_rollup_thresholds()
     
     def connect(self):
         """Établir la connexion à la base de données SQLite"""
         try:
-            self.connection = sqlite3.connect(DB_PATH, check_same_thread=False)
+            if sql_profiler.enabled:
+                factory = ProfiledConnection
+            else:
+                factory = MeteredConnection if METRICS_ENABLED else sqlite3.Connection
+            if self.read_only:
+                # Connexion en lecture seule (processus de calcul, lecteurs concurrents)
+                uri = f"{Path(DB_PATH).resolve().as_uri()}?mode=ro"
+                self.connection = sqlite3.connect(uri, uri=True, check_same_thread=False, factory=factory)
+            else:
+                self.connection = sqlite3.connect(DB_PATH, check_same_thread=False, factory=factory)
+                # Journal WAL: les lectures longues (rapports, exports) ne bloquent pas les écritures
+                self.connection.execute("PRAGMA journal_mode=WAL")
             self.connection.row_factory = sqlite3.Row
+            if sql_profiler.enabled:
+                sql_profiler.attach(self.connection)
             logger.info("Connexion à la base de données établie")
         except sqlite3.Error as e:
             logger.error(f"Erreur de connexion à la base de données: {e}")
             raise
     
+    def _ensure_schema(self):
+        """Créer ou mettre à jour le schéma, sauf si la version enregistrée est déjà à jour"""
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            self.create_tables()
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.connection.commit()
+            logger.info("Schéma de la base mis à jour (version %s)", SCHEMA_VERSION)
+    
     def create_tables(self):
         """Créer les tables nécessaires dans la base de données"""
         tables = [
@@ -63,7 +154,16 @@ class DatabaseManager:
                 start_date DATE NOT NULL,
                 end_date DATE NOT NULL,
                 file_path TEXT NOT NULL,
-                generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                format TEXT,
+                employee_id INTEGER,
+                department_id INTEGER,
+                status TEXT DEFAULT 'completed',
+                progress INTEGER DEFAULT 100,
+                error_message TEXT,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP,
+                duration REAL
             )
             """,
             """
@@ -75,26 +175,145 @@ class DatabaseManager:
                 error_message TEXT,
                 sync_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS department_daily_rollup (
+                department_id INTEGER NOT NULL,
+                day DATE NOT NULL,
+                present_count INTEGER DEFAULT 0,
+                late_count INTEGER DEFAULT 0,
+                total_hours REAL DEFAULT 0,
+                overtime_hours REAL DEFAULT 0,
+                thresholds TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (department_id, day)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS alerts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                employee_id INTEGER NOT NULL,
+                alert_type TEXT NOT NULL,
+                alert_date DATE NOT NULL,
+                message TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (employee_id, alert_type, alert_date)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS data_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS change_feed (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                entity TEXT NOT NULL,
+                entity_id INTEGER,
+                operation TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS change_feed_consumers (
+                name TEXT PRIMARY KEY,
+                position INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS scheduler_runs (
+                name TEXT PRIMARY KEY,
+                last_run TIMESTAMP NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS metrics_snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                taken_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                payload TEXT NOT NULL
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_attendance_logs_datetime
+            ON attendance_logs (datetime)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_attendance_logs_employee_datetime
+            ON attendance_logs (employee_id, datetime)
             """
         ]
         
+        # Compteurs de modifications (version des données des rapports): les ajouts de
+        # pointages sont détectés par période, les corrections et suppressions ici
+        for table, events in VERSIONED_TABLES.items():
+            for event in events:
+                tables.append(f"""
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_version
+                    AFTER {event} ON {table}
+                    BEGIN
+                        INSERT INTO data_versions (name, version) VALUES ('{table}', 1)
+                        ON CONFLICT (name) DO UPDATE SET version = version + 1;
+                    END
+                """)
+        
+        # Flux des modifications: écrit par déclencheur, donc dans la transaction de la
+        # modification elle-même, qu'un consommateur soit inscrit ou non (rejeu depuis le
+        # début du flux conservé); recréés car les versions précédentes en dépendaient
+        for table, columns in CHANGE_FEED_TABLES.items():
+            for event in ('INSERT', 'UPDATE', 'DELETE'):
+                row = 'OLD' if event == 'DELETE' else 'NEW'
+                fields = ', '.join(f"'{column}', {row}.{column}" for column in columns)
+                tables.append(f"DROP TRIGGER IF EXISTS trg_{table}_{event.lower()}_feed")
+                tables.append(f"""
+                    CREATE TRIGGER trg_{table}_{event.lower()}_feed
+                    AFTER {event} ON {table}
+                    BEGIN
+                        INSERT INTO change_feed (entity, entity_id, operation, payload)
+                        VALUES ('{table}', {row}.id, '{event.lower()}', json_object({fields}));
+                    END
+                """)
+        
         try:
             cursor = self.connection.cursor()
             for table in tables:
                 cursor.execute(table)
+            # Colonnes ajoutées depuis la création des tables d'une base existante
+            self._add_missing_columns(cursor, 'reports', REPORT_JOB_COLUMNS)
+            self._add_missing_columns(cursor, 'department_daily_rollup', ROLLUP_COLUMNS)
             self.connection.commit()
             logger.info("Tables créées avec succès")
+            
+            # Alimenter le cumul par département pour une base existante
+            cursor.execute("SELECT 1 FROM department_daily_rollup LIMIT 1")
+            if cursor.fetchone() is None:
+                cursor.execute("SELECT MIN(datetime), MAX(datetime) FROM attendance_logs")
+                first_log, last_log = cursor.fetchone()
+                if first_log:
+                    self.refresh_department_rollup(start_date=first_log[:10], end_date=last_log[:10])
+                    logger.info("Cumul par département initialisé")
         except sqlite3.Error as e:
             logger.error(f"Erreur lors de la création des tables: {e}")
             raise
     
+    def _add_missing_columns(self, cursor, table, columns):
+        """Ajouter à une table existante les colonnes qui lui manquent"""
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = {row['name'] for row in cursor.fetchall()}
+        for name, definition in columns:
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+                logger.info("Colonne %s.%s ajoutée", table, name)
+    
     def add_department(self, name):
         """Ajouter un nouveau département"""
         try:
             cursor = self.connection.cursor()
             cursor.execute("INSERT INTO departments (name) VALUES (?)", (name,))
             self.connection.commit()
-            logger.info(f"Département ajouté: {name}")
+            logger.info("Département ajouté: %s", name)
             return cursor.lastrowid
         except sqlite3.Error as e:
             logger.error(f"Erreur lors de l'ajout du département: {e}")
@@ -119,7 +338,7 @@ class DatabaseManager:
                 (employee_id, first_name, last_name, department_id, status)
             )
             self.connection.commit()
-            logger.info(f"Employé ajouté: {first_name} {last_name}")
+            logger.info("Employé ajouté: %s %s", first_name, last_name)
             return cursor.lastrowid
         except sqlite3.Error as e:
             logger.error(f"Erreur lors de l'ajout de l'employé: {e}")
@@ -156,6 +375,77 @@ class DatabaseManager:
             logger.error(f"Erreur lors de la récupération des employés: {e}")
             return []
     
+    def _employee_filters(self, department_id=None, status=None):
+        conditions = []
+        params = []
+        if department_id:
+            conditions.append("e.department_id = ?")
+            params.append(department_id)
+        if status:
+            conditions.append("e.status = ?")
+            params.append(status)
+        return conditions, params
+    
+    def get_employee_page(self, limit, offset=0, from_key=None, reverse=False, department_id=None, status=None):
+        """Page d'employés triés par nom, prénom puis id (pagination par clé).
+        
+        from_key: clé (nom, prénom, id) de la première ligne de la page, incluse;
+        offset: lignes à sauter ensuite. reverse: parcours depuis la fin (la page
+        est retournée dans l'ordre inverse)."""
+        try:
+            cursor = self.connection.cursor()
+            conditions, params = self._employee_filters(department_id, status)
+            if from_key:
+                conditions.append(f"(COALESCE(e.last_name, ''), COALESCE(e.first_name, ''), e.id) "
+                                  f"{'<=' if reverse else '>='} (?, ?, ?)")
+                params.extend(from_key)
+            direction = 'DESC' if reverse else 'ASC'
+            query = f"""
+                SELECT e.*, d.name as department_name
+                FROM employees e
+                LEFT JOIN departments d ON e.department_id = d.id
+                {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+                ORDER BY COALESCE(e.last_name, '') {direction}, COALESCE(e.first_name, '') {direction}, e.id {direction}
+                LIMIT ? OFFSET ?
+            """
+            cursor.execute(query, params + [limit, offset])
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la récupération d'une page d'employés: {e}")
+            return []
+    
+    def count_employees(self, department_id=None, status=None):
+        """Nombre d'employés correspondant aux filtres"""
+        try:
+            cursor = self.connection.cursor()
+            conditions, params = self._employee_filters(department_id, status)
+            query = "SELECT COUNT(*) FROM employees e"
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            cursor.execute(query, params)
+            return cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors du comptage des employés: {e}")
+            return 0
+    
+    def get_employee_departments(self, employee_ids):
+        """Récupérer le département de chaque employé (id -> department_id)"""
+        try:
+            cursor = self.connection.cursor()
+            employee_ids = list(employee_ids)
+            departments = {}
+            # Découper pour rester sous la limite de paramètres de SQLite
+            for offset in range(0, len(employee_ids), 500):
+                chunk = employee_ids[offset:offset + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                cursor.execute(f"SELECT id, department_id FROM employees WHERE id IN ({placeholders})", chunk)
+                for row in cursor.fetchall():
+                    departments[row['id']] = row['department_id']
+            return departments
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la récupération des départements des employés: {e}")
+            return {}
+    
     def add_attendance_log(self, employee_id, datetime_str, log_type):
         """Ajouter un log de présence"""
         try:
@@ -165,7 +455,8 @@ class DatabaseManager:
                 (employee_id, datetime_str, log_type)
             )
             self.connection.commit()
-            logger.info(f"Log de présence ajouté: employé {employee_id}, {log_type} à {datetime_str}")
+            # Un message par pointage: niveau DEBUG (la synchronisation journalise le total)
+            logger.debug("Log de présence ajouté: employé %s, %s à %s", employee_id, log_type, datetime_str)
             return cursor.lastrowid
         except sqlite3.Error as e:
             logger.error(f"Erreur lors de l'ajout du log de présence: {e}")
@@ -207,6 +498,408 @@ class DatabaseManager:
             logger.error(f"Erreur lors de la récupération des logs de présence: {e}")
             return []
     
+    def _attendance_log_filters(self, start_date=None, end_date=None, employee_id=None, department_id=None):
+        # Bornes sur la colonne elle-même (et non DATE(...)) pour parcourir l'index
+        conditions = []
+        params = []
+        if start_date:
+            conditions.append("al.datetime >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("al.datetime < DATE(?, '+1 day')")
+            params.append(end_date)
+        if employee_id:
+            conditions.append("al.employee_id = ?")
+            params.append(employee_id)
+        if department_id:
+            conditions.append("e.department_id = ?")
+            params.append(department_id)
+        return conditions, params
+    
+    def get_attendance_log_page(self, limit, offset=0, from_key=None, reverse=False,
+                                start_date=None, end_date=None, employee_id=None, department_id=None):
+        """Page de pointages, les plus récents d'abord (pagination par clé).
+        
+        Mêmes colonnes et filtres que get_attendance_logs. from_key: clé
+        (datetime, id) de la première ligne de la page, incluse; offset: lignes
+        à sauter ensuite. reverse: parcours depuis les plus anciens (la page
+        est retournée dans l'ordre inverse)."""
+        try:
+            cursor = self.connection.cursor()
+            conditions, params = self._attendance_log_filters(start_date, end_date, employee_id, department_id)
+            if from_key:
+                conditions.append(f"(al.datetime, al.id) {'>=' if reverse else '<='} (?, ?)")
+                params.extend(from_key)
+            direction = 'ASC' if reverse else 'DESC'
+            query = f"""
+                SELECT al.*, e.first_name, e.last_name, e.employee_id, d.name as department_name
+                FROM attendance_logs al
+                JOIN employees e ON al.employee_id = e.id
+                LEFT JOIN departments d ON e.department_id = d.id
+                {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+                ORDER BY al.datetime {direction}, al.id {direction}
+                LIMIT ? OFFSET ?
+            """
+            cursor.execute(query, params + [limit, offset])
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la récupération d'une page de pointages: {e}")
+            return []
+    
+    def get_attendance_log_page_keys(self, page_size, start_date=None, end_date=None, employee_id=None,
+                                     department_id=None):
+        """Clés (datetime, id) de la première ligne de chaque page de get_attendance_log_page"""
+        try:
+            cursor = self.connection.cursor()
+            conditions, params = self._attendance_log_filters(start_date, end_date, employee_id, department_id)
+            query = f"""
+                SELECT datetime, id FROM (
+                    SELECT al.datetime, al.id,
+                           ROW_NUMBER() OVER (ORDER BY al.datetime DESC, al.id DESC) - 1 AS row_index
+                    FROM attendance_logs al
+                    JOIN employees e ON al.employee_id = e.id
+                    {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+                )
+                WHERE row_index % ? = 0
+                ORDER BY row_index
+            """
+            cursor.execute(query, params + [page_size])
+            return [tuple(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors du calcul des clés de pages des pointages: {e}")
+            return []
+    
+    def count_attendance_logs(self, start_date=None, end_date=None, employee_id=None, department_id=None):
+        """Nombre de pointages correspondant aux filtres de get_attendance_logs"""
+        try:
+            cursor = self.connection.cursor()
+            conditions, params = self._attendance_log_filters(start_date, end_date, employee_id, department_id)
+            query = "SELECT COUNT(*) FROM attendance_logs al JOIN employees e ON al.employee_id = e.id"
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            cursor.execute(query, params)
+            return cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors du comptage des pointages: {e}")
+            return 0
+    
+    def get_attendance_logs_for_employees(self, employee_ids, start_date, end_date):
+        """Récupérer en une requête les pointages d'un lot d'employés, triés par employé"""
+        try:
+            cursor = self.connection.cursor()
+            employee_ids = list(employee_ids)
+            logs = []
+            # Découper pour rester sous la limite de paramètres de SQLite
+            for offset in range(0, len(employee_ids), 500):
+                chunk = employee_ids[offset:offset + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                cursor.execute(f"""
+                    SELECT employee_id, datetime, type
+                    FROM attendance_logs
+                    WHERE employee_id IN ({placeholders})
+                    AND datetime >= ? AND datetime < DATE(?, '+1 day')
+                    ORDER BY employee_id, datetime DESC
+                """, chunk + [start_date, end_date])
+                logs.extend(cursor.fetchall())
+            return logs
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la récupération des logs de présence par lot: {e}")
+            return []
+    
+    def get_presence_days(self, start_date, end_date, employee_id=None, department_id=None, status='active'):
+        """Récupérer, pour chaque employé, les jours de la période ayant au moins un pointage
+
+        La requête est restreinte à l'effectif filtré afin de parcourir l'index
+        (employee_id, datetime) employé par employé, sans balayer toute la table.
+        """
+        try:
+            cursor = self.connection.cursor()
+            roster_query = "SELECT id FROM employees"
+            params = []
+            roster_conditions = []
+            if status:
+                roster_conditions.append("status = ?")
+                params.append(status)
+            if department_id:
+                roster_conditions.append("department_id = ?")
+                params.append(department_id)
+            if roster_conditions:
+                roster_query += " WHERE " + " AND ".join(roster_conditions)
+            
+            query = f"""
+                SELECT al.employee_id, GROUP_CONCAT(DISTINCT SUBSTR(al.datetime, 1, 10)) AS days
+                FROM attendance_logs al
+                WHERE al.employee_id IN ({roster_query})
+                AND al.datetime >= ? AND al.datetime < DATE(?, '+1 day')
+            """
+            params.extend([start_date, end_date])
+            if employee_id:
+                query += " AND al.employee_id = ?"
+                params.append(employee_id)
+            
+            query += " GROUP BY al.employee_id"
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la récupération des jours de présence: {e}")
+            return []
+    
+    def _daily_attendance_query(self, start_date, end_date, employee_id=None, department_id=None):
+        """Construire la CTE du pivot journalier (employé, jour) et ses paramètres
+
+        - first_in / last_out: premier IN et dernier OUT de la journée
+        - work_hours: somme des intervalles IN -> OUT consécutifs (LEAD)
+        """
+        conditions = ["al.datetime >= ?", "al.datetime < DATE(?, '+1 day')"]
+        params = [start_date, end_date]
+        if employee_id:
+            conditions.append("al.employee_id = ?")
+            params.append(employee_id)
+        if department_id:
+            conditions.append("al.employee_id IN (SELECT id FROM employees WHERE department_id = ?)")
+            params.append(department_id)
+        
+        query = f"""
+            WITH punches AS (
+                SELECT al.employee_id, SUBSTR(al.datetime, 1, 10) AS day, al.datetime, al.type,
+                       LEAD(al.datetime) OVER (
+                           PARTITION BY al.employee_id, SUBSTR(al.datetime, 1, 10) ORDER BY al.datetime
+                       ) AS next_datetime,
+                       LEAD(al.type) OVER (
+                           PARTITION BY al.employee_id, SUBSTR(al.datetime, 1, 10) ORDER BY al.datetime
+                       ) AS next_type
+                FROM attendance_logs al
+                WHERE {" AND ".join(conditions)}
+            ),
+            daily AS (
+                SELECT employee_id, day,
+                       MIN(CASE WHEN type = 'IN' THEN datetime END) AS first_in,
+                       MAX(CASE WHEN type = 'OUT' THEN datetime END) AS last_out,
+                       SUM(CASE WHEN type = 'IN' AND next_type = 'OUT'
+                                THEN (julianday(next_datetime) - julianday(datetime)) * 24 END) AS work_hours
+                FROM punches
+                GROUP BY employee_id, day
+            )
+        """
+        return query, params
+    
+    def _iter_rows(self, query, params, batch_size=REPORT_FETCH_SIZE):
+        """Parcourir le résultat d'une requête par lots, sans le charger en mémoire
+        (les erreurs sont propagées à l'appelant)"""
+        cursor = self.connection.cursor()
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    
+    def get_daily_attendance_rows(self, start_date, end_date, employee_id=None, department_id=None):
+        """Récupérer les présences agrégées par employé et par jour"""
+        try:
+            return list(self.iter_daily_attendance_rows(start_date, end_date, employee_id, department_id))
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de l'agrégation journalière des présences: {e}")
+            return []
+    
+    def iter_daily_attendance_rows(self, start_date, end_date, employee_id=None, department_id=None, by_employee=False):
+        """Itérer sur les présences agrégées par employé et par jour
+        (triées par jour, ou par employé puis par jour si by_employee)"""
+        query, params = self._daily_attendance_query(start_date, end_date, employee_id, department_id)
+        query += """
+                SELECT e.employee_id, e.first_name, e.last_name, d.name AS department_name,
+                       daily.day AS date,
+                       SUBSTR(daily.first_in, 12, 8) AS time_in,
+                       SUBSTR(daily.last_out, 12, 8) AS time_out,
+                       ROUND(daily.work_hours, 2) AS work_hours
+                FROM daily
+                JOIN employees e ON daily.employee_id = e.id
+                LEFT JOIN departments d ON e.department_id = d.id
+        """
+        if by_employee:
+            query += " ORDER BY daily.employee_id, daily.day"
+        else:
+            query += " ORDER BY daily.day, e.last_name, e.first_name"
+        return self._iter_rows(query, params)
+    
+    def get_monthly_attendance_rows(self, start_date, end_date, employee_id=None, department_id=None, standard_hours=STANDARD_WORK_HOURS):
+        """Récupérer les jours de présence, heures et heures supplémentaires par employé"""
+        try:
+            return list(self.iter_monthly_attendance_rows(start_date, end_date, employee_id, department_id, standard_hours))
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de l'agrégation mensuelle des présences: {e}")
+            return []
+    
+    def iter_monthly_attendance_rows(self, start_date, end_date, employee_id=None, department_id=None, standard_hours=STANDARD_WORK_HOURS):
+        """Itérer sur les jours de présence, heures et heures supplémentaires par employé"""
+        query, params = self._daily_attendance_query(start_date, end_date, employee_id, department_id)
+        query += """
+                SELECT e.employee_id, e.first_name, e.last_name, d.name AS department_name,
+                       COUNT(daily.first_in) AS days_present,
+                       ROUND(COALESCE(SUM(daily.work_hours), 0), 2) AS total_hours,
+                       ROUND(COALESCE(SUM(MAX(daily.work_hours - ?, 0)), 0), 2) AS overtime_hours
+                FROM daily
+                JOIN employees e ON daily.employee_id = e.id
+                LEFT JOIN departments d ON e.department_id = d.id
+                GROUP BY daily.employee_id
+                ORDER BY e.last_name, e.first_name
+        """
+        return self._iter_rows(query, params + [standard_hours])
+    
+    def iter_punch_rows(self, start_date, end_date, employee_id=None, department_id=None):
+        """Itérer sur les pointages bruts de la période, dans l'ordre chronologique"""
+        query = """
+            SELECT al.id, al.employee_id AS user_id, e.employee_id, e.last_name, e.first_name,
+                   d.name AS department_name, al.datetime, al.type, al.sync_status
+            FROM attendance_logs al
+            LEFT JOIN employees e ON al.employee_id = e.id
+            LEFT JOIN departments d ON e.department_id = d.id
+            WHERE al.datetime >= ? AND al.datetime < DATE(?, '+1 day')
+        """
+        params = [start_date, end_date]
+        if employee_id:
+            query += " AND al.employee_id = ?"
+            params.append(employee_id)
+        if department_id:
+            query += " AND e.department_id = ?"
+            params.append(department_id)
+        query += " ORDER BY al.datetime, al.id"
+        return self._iter_rows(query, params)
+    
+    def get_last_punches(self, day):
+        """Récupérer le dernier pointage de chaque employé pour une journée"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("""
+                SELECT employee_id, department_id, type, datetime
+                FROM (
+                    SELECT al.employee_id, e.department_id, al.type, al.datetime,
+                           ROW_NUMBER() OVER (PARTITION BY al.employee_id ORDER BY al.datetime DESC, al.id DESC) AS rank
+                    FROM attendance_logs al
+                    LEFT JOIN employees e ON al.employee_id = e.id
+                    WHERE al.datetime >= ? AND al.datetime < DATE(?, '+1 day')
+                )
+                WHERE rank = 1
+            """, (day, day))
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la récupération des derniers pointages: {e}")
+            return []
+    
+    @staticmethod
+    def _rollup_thresholds():
+        """Seuils appliqués au cumul par département (retard, heures supplémentaires)"""
+        return f"{WORK_START_TIME}|{STANDARD_WORK_HOURS}"
+    
+    def _check_rollup_thresholds(self):
+        """Recalculer les jours du cumul calculés avec d'autres seuils que ceux de la configuration"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "SELECT MIN(day), MAX(day) FROM department_daily_rollup WHERE thresholds IS NOT ?",
+                (self._rollup_thresholds(),)
+            )
+            first_day, last_day = cursor.fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la vérification du cumul par département: {e}")
+            return
+        if first_day:
+            logger.info("Seuils de retard ou d'heures supplémentaires modifiés: cumul par département "
+                        "recalculé du %s au %s", first_day, last_day)
+            self.refresh_department_rollup(start_date=first_day, end_date=last_day)
+    
+    def refresh_department_rollup(self, days=None, start_date=None, end_date=None):
+        """Recalculer le cumul (département, jour) pour des jours donnés ou une période
+
+        Une seule requête couvre les jours donnés (du premier au dernier, seuls
+        ces jours étant recalculés). Les employés sans département sont
+        regroupés sous department_id = 0; les seuils utilisés sont enregistrés
+        avec chaque ligne (voir _check_rollup_thresholds).
+        """
+        try:
+            delete_filter = insert_filter = ""
+            day_params = []
+            if days is not None:
+                days = sorted({str(day)[:10] for day in days})
+                if not days:
+                    return True
+                start_date, end_date = days[0], days[-1]
+                delete_filter = "AND day IN (SELECT value FROM json_each(?))"
+                insert_filter = "WHERE daily.day IN (SELECT value FROM json_each(?))"
+                day_params = [json.dumps(days)]
+            
+            cursor = self.connection.cursor()
+            cursor.execute(
+                f"DELETE FROM department_daily_rollup WHERE day >= ? AND day <= ? {delete_filter}",
+                [start_date, end_date] + day_params
+            )
+            query, params = self._daily_attendance_query(start_date, end_date)
+            query += f"""
+                INSERT INTO department_daily_rollup
+                    (department_id, day, present_count, late_count, total_hours, overtime_hours, thresholds)
+                SELECT COALESCE(e.department_id, 0), daily.day,
+                       COUNT(daily.first_in),
+                       COALESCE(SUM(SUBSTR(daily.first_in, 12, 8) > ?), 0),
+                       ROUND(COALESCE(SUM(daily.work_hours), 0), 2),
+                       ROUND(COALESCE(SUM(MAX(daily.work_hours - ?, 0)), 0), 2),
+                       ?
+                FROM daily
+                JOIN employees e ON daily.employee_id = e.id
+                {insert_filter}
+                GROUP BY COALESCE(e.department_id, 0), daily.day
+            """
+            cursor.execute(query, params + [WORK_START_TIME, STANDARD_WORK_HOURS, self._rollup_thresholds()]
+                           + day_params)
+            self.connection.commit()
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la mise à jour du cumul par département: {e}")
+            return False
+    
+    def get_department_rollup(self, start_date, end_date, period='day'):
+        """Récupérer les indicateurs par département, agrégés par jour, semaine ou mois"""
+        buckets = {
+            'day': "r.day",
+            'week': "STRFTIME('%Y-W%W', r.day)",
+            'month': "SUBSTR(r.day, 1, 7)"
+        }
+        if period not in buckets:
+            logger.error(f"Période d'agrégation non supportée: {period}")
+            return []
+        
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(f"""
+                SELECT r.department_id, COALESCE(d.name, 'Sans département') AS department_name,
+                       {buckets[period]} AS period,
+                       SUM(r.present_count) AS present_count,
+                       SUM(r.late_count) AS late_count,
+                       ROUND(SUM(r.total_hours), 2) AS total_hours,
+                       ROUND(SUM(r.overtime_hours), 2) AS overtime_hours
+                FROM department_daily_rollup r
+                LEFT JOIN departments d ON r.department_id = d.id
+                WHERE r.day >= ? AND r.day <= ?
+                GROUP BY r.department_id, {buckets[period]}
+                ORDER BY period, department_name
+            """, (start_date, end_date))
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la récupération du cumul par département: {e}")
+            return []
+    
+    def get_employee_attendance_dates(self, employee_id):
+        """Récupérer les jours ayant au moins un pointage pour un employé"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "SELECT DISTINCT SUBSTR(datetime, 1, 10) FROM attendance_logs WHERE employee_id = ?",
+                (employee_id,)
+            )
+            return [row[0] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la récupération des jours de présence de l'employé: {e}")
+            return []
+    
     def add_report(self, report_type, start_date, end_date, file_path):
         """Ajouter un rapport généré"""
         try:
@@ -216,12 +909,165 @@ class DatabaseManager:
                 (report_type, start_date, end_date, file_path)
             )
             self.connection.commit()
-            logger.info(f"Rapport ajouté: {report_type} du {start_date} au {end_date}")
+            logger.info("Rapport ajouté: %s du %s au %s", report_type, start_date, end_date)
             return cursor.lastrowid
         except sqlite3.Error as e:
             logger.error(f"Erreur lors de l'ajout du rapport: {e}")
             return None
     
+    def add_report_job(self, report_type, fmt, start_date, end_date, employee_id=None, department_id=None):
+        """Mettre en file une tâche de génération de rapport"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("""
+                INSERT INTO reports (report_type, format, start_date, end_date, employee_id, department_id,
+                                     file_path, status, progress)
+                VALUES (?, ?, ?, ?, ?, ?, '', 'queued', 0)
+            """, (report_type, fmt, start_date, end_date, employee_id, department_id))
+            self.connection.commit()
+            return cursor.lastrowid
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la mise en file du rapport: {e}")
+            return None
+    
+    def get_report_job(self, job_id):
+        """Récupérer une tâche de génération de rapport"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT * FROM reports WHERE id = ?", (job_id,))
+            return cursor.fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la récupération de la tâche de rapport: {e}")
+            return None
+    
+    def get_report_jobs(self, statuses=None):
+        """Récupérer les tâches de génération de rapport, éventuellement filtrées par statut"""
+        try:
+            cursor = self.connection.cursor()
+            query = "SELECT * FROM reports"
+            params = []
+            if statuses:
+                query += f" WHERE status IN ({', '.join('?' * len(statuses))})"
+                params.extend(statuses)
+            query += " ORDER BY id DESC"
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la récupération des tâches de rapport: {e}")
+            return []
+    
+    def start_report_job(self, job_id):
+        """Passer une tâche en cours d'exécution (sauf si elle a été annulée entre-temps)"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("""
+                UPDATE reports SET status = 'running', progress = 0, started_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND status = 'queued'
+            """, (job_id,))
+            self.connection.commit()
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors du démarrage de la tâche de rapport: {e}")
+            return False
+    
+    def set_report_job_progress(self, job_id, progress):
+        """Mettre à jour l'avancement (en %) d'une tâche en cours"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "UPDATE reports SET progress = ? WHERE id = ? AND status = 'running'",
+                (progress, job_id)
+            )
+            self.connection.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la mise à jour de l'avancement du rapport: {e}")
+    
+    def get_report_job_status(self, job_id):
+        """Récupérer le statut d'une tâche de rapport"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT status FROM reports WHERE id = ?", (job_id,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la récupération du statut du rapport: {e}")
+            return None
+    
+    def finish_report_job(self, job_id, status, file_path=None, error_message=None):
+        """Clore une tâche de rapport (completed, failed ou cancelled) et enregistrer sa durée"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("""
+                UPDATE reports
+                SET status = ?,
+                    progress = CASE WHEN ? = 'completed' THEN 100 ELSE progress END,
+                    file_path = COALESCE(?, file_path),
+                    error_message = ?,
+                    finished_at = CURRENT_TIMESTAMP,
+                    generated_at = CURRENT_TIMESTAMP,
+                    duration = ROUND((JULIANDAY('now') - JULIANDAY(started_at)) * 86400, 3)
+                WHERE id = ?
+            """, (status, status, file_path, error_message, job_id))
+            self.connection.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la clôture de la tâche de rapport: {e}")
+    
+    def cancel_report_job(self, job_id):
+        """Demander l'annulation d'une tâche en file ou en cours"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "UPDATE reports SET status = 'cancelled' WHERE id = ? AND status IN ('queued', 'running')",
+                (job_id,)
+            )
+            self.connection.commit()
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de l'annulation du rapport: {e}")
+            return False
+    
+    def get_data_version(self, start_date, end_date):
+        """Version des données d'une période: nombre et plus grand id des pointages,
+        compteurs de modifications des employés, départements et pointages"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("""
+                SELECT COUNT(*), MAX(id) FROM attendance_logs
+                WHERE datetime >= ? AND datetime < DATE(?, '+1 day')
+            """, (start_date, end_date))
+            count, max_id = cursor.fetchone()
+            cursor.execute("SELECT name, version FROM data_versions ORDER BY name")
+            return [count, max_id, [list(row) for row in cursor.fetchall()]]
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors du calcul de la version des données: {e}")
+            return None
+    
+    def count_report_rows(self, report_type, start_date, end_date, employee_id=None, department_id=None):
+        """Estimer le nombre de lignes d'un rapport (avancement des tâches)"""
+        try:
+            cursor = self.connection.cursor()
+            selected = ("DISTINCT al.employee_id, SUBSTR(al.datetime, 1, 10)" if report_type == 'daily'
+                        else "DISTINCT al.employee_id")
+            query = f"""
+                SELECT COUNT(*) FROM (
+                    SELECT {selected}
+                    FROM attendance_logs al
+                    JOIN employees e ON al.employee_id = e.id
+                    WHERE al.datetime >= ? AND al.datetime < DATE(?, '+1 day')
+            """
+            params = [start_date, end_date]
+            if employee_id:
+                query += " AND al.employee_id = ?"
+                params.append(employee_id)
+            if department_id:
+                query += " AND e.department_id = ?"
+                params.append(department_id)
+            cursor.execute(query + ")", params)
+            return cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors du comptage des lignes du rapport: {e}")
+            return 0
+    
     def add_sync_log(self, sync_type, records_count, status, error_message=None):
         """Ajouter un log de synchronisation"""
         try:
@@ -231,27 +1077,242 @@ class DatabaseManager:
                 (sync_type, records_count, status, error_message)
             )
             self.connection.commit()
-            logger.info(f"Log de synchronisation ajouté: {sync_type}, {status}")
+            logger.info("Log de synchronisation ajouté: %s, %s", sync_type, status)
             return cursor.lastrowid
         except sqlite3.Error as e:
             logger.error(f"Erreur lors de l'ajout du log de synchronisation: {e}")
             return None
     
+    def add_alert(self, employee_id, alert_type, alert_date, message=None):
+        """Enregistrer une alerte (ignorée si elle existe déjà pour ce jour)"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "INSERT OR IGNORE INTO alerts (employee_id, alert_type, alert_date, message) VALUES (?, ?, ?, ?)",
+                (employee_id, alert_type, alert_date, message)
+            )
+            self.connection.commit()
+            if cursor.rowcount == 0:
+                return None
+            logger.info("Alerte %s: employé %s, %s", alert_type, employee_id, message)
+            return cursor.lastrowid
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de l'ajout de l'alerte: {e}")
+            return None
+    
+    def get_alerts(self, start_date=None, end_date=None, alert_type=None):
+        """Récupérer les alertes avec filtres optionnels"""
+        try:
+            cursor = self.connection.cursor()
+            query = """
+                SELECT a.*, e.first_name, e.last_name, d.name as department_name
+                FROM alerts a
+                LEFT JOIN employees e ON a.employee_id = e.id
+                LEFT JOIN departments d ON e.department_id = d.id
+            """
+            params = []
+            conditions = []
+            if start_date:
+                conditions.append("a.alert_date >= ?")
+                params.append(start_date)
+            if end_date:
+                conditions.append("a.alert_date <= ?")
+                params.append(end_date)
+            if alert_type:
+                conditions.append("a.alert_type = ?")
+                params.append(alert_type)
+            
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            
+            query += " ORDER BY a.created_at DESC"
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la récupération des alertes: {e}")
+            return []
+    
+    def add_feed_consumer(self, name, from_start=False):
+        """Inscrire un consommateur du flux des modifications.
+        
+        Par défaut sa position est la fin du flux (seules les modifications
+        suivantes lui sont transmises); from_start: tout le flux conservé."""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "INSERT OR IGNORE INTO change_feed_consumers (name, position) "
+                "SELECT ?, CASE WHEN ? THEN 0 ELSE COALESCE(MAX(id), 0) END FROM change_feed",
+                (name, bool(from_start))
+            )
+            self.connection.commit()
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de l'inscription du consommateur {name}: {e}")
+            return False
+    
+    def remove_feed_consumer(self, name):
+        """Désinscrire un consommateur du flux des modifications"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("DELETE FROM change_feed_consumers WHERE name = ?", (name,))
+            self.connection.commit()
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la désinscription du consommateur {name}: {e}")
+            return False
+    
+    def get_feed_consumers(self):
+        """Consommateurs du flux avec leur position et le nombre d'événements en attente"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("""
+                SELECT c.name, c.position, c.updated_at,
+                       (SELECT COUNT(*) FROM change_feed f WHERE f.id > c.position) AS pending
+                FROM change_feed_consumers c
+                ORDER BY c.name
+            """)
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la récupération des consommateurs du flux: {e}")
+            return []
+    
+    def get_feed_events(self, name, limit):
+        """Événements postérieurs à la position du consommateur, dans l'ordre (None si inconnu)"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT position FROM change_feed_consumers WHERE name = ?", (name,))
+            consumer = cursor.fetchone()
+            if consumer is None:
+                logger.error(f"Consommateur du flux inconnu: {name}")
+                return None
+            cursor.execute(
+                "SELECT * FROM change_feed WHERE id > ? ORDER BY id LIMIT ?",
+                (consumer['position'], limit)
+            )
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la lecture du flux des modifications: {e}")
+            return None
+    
+    def ack_feed_events(self, name, position):
+        """Acquitter les événements jusqu'à position incluse.
+        
+        La position ne recule jamais et ne dépasse pas le dernier événement
+        écrit: les événements futurs ne peuvent pas être acquittés d'avance."""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "UPDATE change_feed_consumers "
+                "SET position = MAX(position, MIN(?, (SELECT COALESCE(MAX(id), 0) FROM change_feed))), "
+                "updated_at = CURRENT_TIMESTAMP WHERE name = ?",
+                (position, name)
+            )
+            self.connection.commit()
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de l'acquittement du flux par {name}: {e}")
+            return False
+    
+    def compact_change_feed(self, retention_days):
+        """Supprimer les événements acquittés par tous les consommateurs (id <= plus petite position).
+
+        Sans consommateur inscrit, les événements de moins de retention_days
+        jours sont conservés (rejeu par un consommateur inscrit depuis le début)."""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT COUNT(*), MIN(position) FROM change_feed_consumers")
+            consumers, position = cursor.fetchone()
+            if consumers:
+                cursor.execute("DELETE FROM change_feed WHERE id <= ?", (position,))
+            else:
+                cursor.execute(
+                    "DELETE FROM change_feed WHERE created_at < DATETIME('now', ?)",
+                    (f"-{int(retention_days)} days",)
+                )
+            self.connection.commit()
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors du compactage du flux des modifications: {e}")
+            return 0
+    
+    def get_scheduler_runs(self):
+        """Dernière exécution de chaque tâche planifiée: {nom: horodatage}"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT name, last_run FROM scheduler_runs")
+            return {row['name']: row['last_run'] for row in cursor.fetchall()}
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la récupération des exécutions planifiées: {e}")
+            return {}
+    
+    def set_scheduler_run(self, name, last_run):
+        """Enregistrer la dernière exécution d'une tâche planifiée"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "INSERT INTO scheduler_runs (name, last_run) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET last_run = excluded.last_run",
+                (name, last_run)
+            )
+            self.connection.commit()
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de l'enregistrement de l'exécution planifiée: {e}")
+            return False
+    
+    def add_metrics_snapshot(self, payload):
+        """Enregistrer un instantané des métriques (JSON)"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("INSERT INTO metrics_snapshots (payload) VALUES (?)", (payload,))
+            self.connection.commit()
+            return cursor.lastrowid
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de l'enregistrement des métriques: {e}")
+            return None
+    
+    def get_metrics_snapshots(self, limit=100):
+        """Récupérer les derniers instantanés des métriques"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT * FROM metrics_snapshots ORDER BY id DESC LIMIT ?", (limit,))
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la récupération des métriques: {e}")
+            return []
+    
     def close(self):
         """Fermer la connexion à la base de données"""
         if self.connection:
             self.connection.close()
             logger.info("Connexion à la base de données fermée")
 
-    def get_sync_logs(self):
-        """Récupérer tous les logs de synchronisation"""
+    def get_sync_logs(self, limit=None):
+        """Récupérer les logs de synchronisation (tous, ou les `limit` plus récents)"""
         try:
             cursor = self.connection.cursor()
-            cursor.execute("SELECT * FROM sync_logs ORDER BY sync_time DESC")
+            query = "SELECT * FROM sync_logs ORDER BY sync_time DESC"
+            if limit:
+                query += f" LIMIT {int(limit)}"
+            cursor.execute(query)
             return cursor.fetchall()
         except sqlite3.Error as e:
             logger.error(f"Erreur lors de la récupération des logs de synchronisation: {e}")
             return []
+    
+    def has_sync_since(self, sync_type, since, status='success'):
+        """Une synchronisation de ce type a-t-elle abouti depuis `since` (heure locale)?"""
+        try:
+            cursor = self.connection.cursor()
+            # sync_time est enregistré en UTC (CURRENT_TIMESTAMP)
+            cursor.execute(
+                "SELECT 1 FROM sync_logs WHERE sync_type = ? AND status = ? AND sync_time >= DATETIME(?, 'utc') LIMIT 1",
+                (sync_type, status, since)
+            )
+            return cursor.fetchone() is not None
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la vérification des synchronisations: {e}")
+            return False
         
 # Instance globale de la base de données
-db_manager = DatabaseManager()
+db_manager = LazyInstance(DatabaseManager)
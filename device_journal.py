@@ -0,0 +1,275 @@
+"""
+Journal des données brutes lues sur les pointeuses, rejouable sans la pointeuse.
+
+Chaque lecture (utilisateurs, pointages) est ajoutée à journal/<pointeuse>/
+<AAAA-MM-JJ>.zkj sous forme de trame: en-tête fixe (type, date de lecture,
+nombre d'enregistrements, taille, CRC32) suivi des enregistrements en JSON
+compressé (zlib). La pointeuse renvoie tout son historique à chaque lecture:
+tant que cet historique ne fait que s'allonger, seuls les nouveaux
+pointages sont écrits (trame « suite »). La première trame de chaque jour
+est complète, chaque fichier se suffit donc à lui-même. Une trame tronquée
+(arrêt pendant l'écriture) termine la lecture du fichier sans erreur.
+
+Le rejeu (replay_journals) décode les fichiers en parallèle et réinjecte
+les enregistrements par le chemin de synchronisation habituel, dans l'ordre:
+chaque lecture est reconstituée en entier (trame précédente + suite) et
+filtrée par un nouveau PunchDebouncer, exactement comme en synchronisation.
+"""
+
+import json
+import logging
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from config import JOURNAL_ENABLED, JOURNAL_DIR, JOURNAL_COMPRESSION_LEVEL, JOURNAL_RETENTION_DAYS, BATCH_WORKERS
+
+logger = logging.getLogger(__name__)
+
+FILE_MAGIC = b'ZKJ1'
+FILE_SUFFIX = '.zkj'
+# type, drapeaux, date de lecture (epoch), enregistrements omis (trame suite), enregistrements, taille, CRC32
+FRAME_HEADER = struct.Struct('<cBdIIII')
+
+KIND_USERS = b'U'
+KIND_ATTENDANCE = b'A'
+FLAG_CONTINUATION = 0x01
+
+# Champs conservés par type de lecture (le mot de passe des utilisateurs n'est pas journalisé)
+USER_FIELDS = ('uid', 'user_id', 'name', 'privilege', 'group_id', 'card')
+ATTENDANCE_FIELDS = ('uid', 'user_id', 'timestamp', 'status', 'punch')
+
+def _encode_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _encode_records(records, fields):
+    return [[_encode_value(getattr(record, field, None)) for field in fields] for record in records]
+
+def _safe_name(device):
+    return re.sub(r'[^\w.-]', '_', str(device)) or 'pointeuse'
+
+class DeviceJournal:
+    """Écriture en ajout seul des lectures brutes, un fichier par pointeuse et par jour"""
+
+    def __init__(self, directory=JOURNAL_DIR, enabled=JOURNAL_ENABLED, level=JOURNAL_COMPRESSION_LEVEL):
+        self.directory = directory
+        self.enabled = enabled
+        self.level = level
+        self._lock = threading.Lock()
+        # Dernière lecture des pointages par pointeuse: (fichier, nombre, dernier enregistrement)
+        self._last_attendance = {}
+        # Fichiers dont la fin a été vérifiée par ce processus
+        self._checked = set()
+
+    def path_for(self, device, day):
+        return os.path.join(self.directory, _safe_name(device), f"{day}{FILE_SUFFIX}")
+
+    def record_users(self, device, users, pulled_at=None):
+        """Journaliser une lecture des utilisateurs (pulled_at: epoch, maintenant par défaut)"""
+        self._record(device, KIND_USERS, _encode_records(users or [], USER_FIELDS), pulled_at)
+
+    def record_attendance(self, device, attendance, pulled_at=None):
+        """Journaliser une lecture des pointages (seule la suite si l'historique s'est allongé)"""
+        self._record(device, KIND_ATTENDANCE, _encode_records(attendance or [], ATTENDANCE_FIELDS), pulled_at)
+
+    def _record(self, device, kind, records, pulled_at=None):
+        if not self.enabled:
+            return
+        try:
+            pulled_at = pulled_at or time.time()
+            path = self.path_for(device, date.fromtimestamp(pulled_at).isoformat())
+            with self._lock:
+                skipped = 0
+                if kind == KIND_ATTENDANCE:
+                    last = self._last_attendance.get(device)
+                    if (last and last[0] == path and last[1] <= len(records)
+                            and (last[1] == 0 or records[last[1] - 1] == last[2])):
+                        skipped = last[1]
+                    self._last_attendance[device] = (path, len(records), records[-1] if records else None)
+                self._append(path, kind, pulled_at, skipped, records[skipped:])
+        except Exception as e:
+            # Le journal ne doit jamais empêcher la synchronisation
+            logger.error(f"Erreur lors de l'écriture du journal de la pointeuse {device}: {e}")
+
+    def _append(self, path, kind, pulled_at, skipped, records):
+        payload = zlib.compress(json.dumps(records, separators=(',', ':'), ensure_ascii=False).encode('utf-8'),
+                                self.level)
+        header = FRAME_HEADER.pack(kind, FLAG_CONTINUATION if skipped else 0, pulled_at, skipped,
+                                   len(records), len(payload), zlib.crc32(payload))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if path not in self._checked:
+            self._repair(path)
+            self._checked.add(path)
+        with open(path, 'ab') as f:
+            # Une seule écriture par trame, en-tête de fichier compris
+            f.write((FILE_MAGIC if f.tell() == 0 else b'') + header + payload)
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _repair(path):
+        # Trame tronquée par un arrêt pendant l'écriture: la supprimer, sinon les
+        # trames ajoutées ensuite seraient illisibles
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            data = f.read()
+        valid = _scan(data, path)[1] if data.startswith(FILE_MAGIC) else 0
+        if valid < len(data):
+            logger.warning(f"{path}: {len(data) - valid} octets invalides en fin de fichier supprimés")
+            with open(path, 'r+b') as f:
+                f.truncate(valid)
+    
+    def list_files(self, devices=None, start_date=None, end_date=None):
+        """Fichiers du journal [(pointeuse, jour, chemin)] triés par jour puis pointeuse"""
+        files = []
+        if not os.path.isdir(self.directory):
+            return files
+        wanted = {_safe_name(device) for device in devices} if devices else None
+        for device in sorted(os.listdir(self.directory)):
+            folder = os.path.join(self.directory, device)
+            if not os.path.isdir(folder) or (wanted and device not in wanted):
+                continue
+            for name in os.listdir(folder):
+                day = name[:-len(FILE_SUFFIX)]
+                if (not name.endswith(FILE_SUFFIX) or (start_date and day < start_date)
+                        or (end_date and day > end_date)):
+                    continue
+                files.append((device, day, os.path.join(folder, name)))
+        return sorted(files, key=lambda entry: (entry[1], entry[0]))
+
+    def prune(self, retention_days=JOURNAL_RETENTION_DAYS):
+        """Supprimer les fichiers de plus de retention_days jours"""
+        if not retention_days:
+            return 0
+        limit = (date.today() - timedelta(days=retention_days)).isoformat()
+        removed = 0
+        for _, day, path in self.list_files(end_date=limit):
+            if day < limit:
+                os.remove(path)
+                removed += 1
+        if removed:
+            logger.info("Journal des pointeuses: %s fichiers de plus de %s jours supprimés", removed, retention_days)
+        return removed
+
+def read_frames(path):
+    """Trames d'un fichier du journal: [(type, date de lecture, omis, enregistrements)]"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(FILE_MAGIC):
+        raise ValueError(f"Fichier de journal invalide: {path}")
+    return [(kind, pulled_at, skipped, json.loads(zlib.decompress(payload)))
+            for kind, pulled_at, skipped, payload in _scan(data, path)[0]]
+
+def _scan(data, path):
+    """Trames valides (charge utile compressée) et longueur de la partie valide"""
+    frames = []
+    offset = len(FILE_MAGIC)
+    while offset < len(data):
+        if offset + FRAME_HEADER.size > len(data):
+            logger.warning(f"{path}: trame tronquée en fin de fichier ignorée")
+            break
+        kind, _, pulled_at, skipped, count, length, crc = FRAME_HEADER.unpack_from(data, offset)
+        payload = data[offset + FRAME_HEADER.size:offset + FRAME_HEADER.size + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            logger.warning(f"{path}: trame tronquée ou corrompue ignorée (et les suivantes)")
+            break
+        frames.append((kind, pulled_at, skipped, payload))
+        offset += FRAME_HEADER.size + length
+    return frames, offset
+
+def _to_attendance(record):
+    values = dict(zip(ATTENDANCE_FIELDS, record))
+    values['timestamp'] = datetime.fromisoformat(values['timestamp'])
+    return SimpleNamespace(**values)
+
+def _to_user(record):
+    return SimpleNamespace(**dict(zip(USER_FIELDS, record)))
+
+def replay_journals(devices=None, start_date=None, end_date=None, workers=None, dry_run=False, journal=None,
+                    db=None):
+    """Réinjecter les lectures journalisées, sans la pointeuse.
+
+    Les fichiers sont décodés en parallèle (processus) puis réinjectés dans
+    l'ordre (jour, pointeuse, lecture) par les mêmes fonctions que la
+    synchronisation: les pointages déjà en base sont ignorés. dry_run: décoder
+    seulement. db: base cible (celle de la configuration par défaut).
+    Retourne les compteurs du rejeu."""
+    journal = journal or device_journal
+    files = journal.list_files(devices, start_date, end_date)
+    result = {'files': len(files), 'frames': 0, 'users': 0, 'punches': 0,
+              'imported_users': 0, 'ingested': 0, 'suppressed': 0}
+    if not files:
+        return result
+
+    started = time.perf_counter()
+    paths = [path for _, _, path in files]
+    workers = min(workers or BATCH_WORKERS or os.cpu_count() or 1, len(paths))
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        decoded = executor.map(read_frames, paths)
+    else:
+        executor = None
+        decoded = map(read_frames, paths)
+
+    try:
+        if dry_run:
+            for frames in decoded:
+                _count_frames(result, frames)
+        else:
+            _ingest(files, decoded, result, db)
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+    result['seconds'] = round(time.perf_counter() - started, 3)
+    logger.info("Rejeu du journal: %s fichiers, %s pointages lus, %s ajoutés en %s s",
+                result['files'], result['punches'], result['ingested'], result['seconds'])
+    return result
+
+def _count_frames(result, frames):
+    for kind, _, _, records in frames:
+        result['frames'] += 1
+        result['users' if kind == KIND_USERS else 'punches'] += len(records)
+
+def _ingest(files, decoded, result, db=None):
+    from db_manager import db_manager
+    from employee_manager import EmployeeManager
+    from attendance_manager import AttendanceManager
+    from punch_filter import PunchDebouncer, convert_attendance_data
+
+    db = db or db_manager
+    employees = EmployeeManager(db)
+    attendance = AttendanceManager(db)
+    cursor = db.connection.cursor()
+    # Comme generate_dataset: sans attente du disque à chaque validation pendant le rejeu
+    cursor.execute("PRAGMA synchronous = OFF")
+    try:
+        # map() rend les fichiers dans l'ordre, les suivants se décodant pendant l'injection
+        for (device, day, _), frames in zip(files, decoded):
+            # Lecture complète en cours de reconstitution (chaque fichier commence par une trame complète)
+            pull = []
+            for kind, _, skipped, records in frames:
+                if kind == KIND_USERS:
+                    result['imported_users'] += employees.import_users_from_zk(
+                        [_to_user(record) for record in records])
+                    continue
+                pull = pull[:skipped] + [_to_attendance(record) for record in records]
+                # Comme _synchronize_attendance: un filtre neuf sur toute la lecture
+                debouncer = PunchDebouncer()
+                result['ingested'] += attendance.sync_attendance_data(convert_attendance_data(pull), debouncer)
+                result['suppressed'] += debouncer.suppressed_count
+            _count_frames(result, frames)
+            logger.debug("Journal %s du %s réinjecté", device, day)
+    finally:
+        cursor.execute("PRAGMA synchronous = FULL")
+    db.add_sync_log('replay', result['ingested'], 'success',
+                            f"Rejeu de {result['files']} fichiers: {result['ingested']} pointages ajoutés")
+
+# Instance globale du journal des pointeuses
+device_journal = DeviceJournal()
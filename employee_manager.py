@@ -1,20 +1,23 @@
 import logging
 from db_manager import db_manager
+from stats_cache import stats_cache
+from lazy import LazyInstance
 
-# Configuration du logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class EmployeeManager:
-    def __init__(self):
-        self.db = db_manager
+    def __init__(self, db=None, cache=None):
+        self.db = db or db_manager
+        # Cache des statistiques à invalider: celui du processus par défaut
+        self.cache = cache if cache is not None else stats_cache
     
     def add_employee(self, employee_id, first_name, last_name, department_id=None, status='active'):
         """Ajouter un nouvel employé"""
         try:
             employee_id = self.db.add_employee(employee_id, first_name, last_name, department_id, status)
             if employee_id:
-                logger.info(f"Employé ajouté avec succès: {first_name} {last_name}")
+                self.cache.invalidate_employee(employee_id, [department_id])
+                logger.info("Employé ajouté avec succès: %s %s", first_name, last_name)
                 return True
             return False
         except Exception as e:
@@ -45,11 +48,19 @@ class EmployeeManager:
                 return False
                 
             params.append(employee_id)
+            # Départements concernés par le changement (ancien et nouveau)
+            department_ids = set(self.db.get_employee_departments([employee_id]).values())
+            if department_id is not None:
+                department_ids.add(department_id)
+            
             query = f"UPDATE employees SET {', '.join(updates)} WHERE id = ?"
             cursor.execute(query, params)
             self.db.connection.commit()
+            self.cache.invalidate_employee(employee_id, department_ids)
+            if department_id is not None:
+                self.db.refresh_department_rollup(self.db.get_employee_attendance_dates(employee_id))
             
-            logger.info(f"Employé {employee_id} mis à jour avec succès")
+            logger.info("Employé %s mis à jour avec succès", employee_id)
             return True
         except Exception as e:
             logger.error(f"Erreur lors de la mise à jour de l'employé: {e}")
@@ -58,12 +69,15 @@ class EmployeeManager:
     def delete_employee(self, employee_id):
         """Supprimer un employé"""
         try:
+            department_ids = set(self.db.get_employee_departments([employee_id]).values())
             cursor = self.db.connection.cursor()
             cursor.execute("DELETE FROM employees WHERE id = ?", (employee_id,))
             self.db.connection.commit()
             
             if cursor.rowcount > 0:
-                logger.info(f"Employé {employee_id} supprimé avec succès")
+                self.cache.invalidate_employee(employee_id, department_ids)
+                self.db.refresh_department_rollup(self.db.get_employee_attendance_dates(employee_id))
+                logger.info("Employé %s supprimé avec succès", employee_id)
                 return True
             return False
         except Exception as e:
@@ -146,11 +160,11 @@ class EmployeeManager:
                     )
                     imported_count += 1
             
-            logger.info(f"{imported_count} nouveaux utilisateurs importés depuis la pointeuse")
+            logger.info("%s nouveaux utilisateurs importés depuis la pointeuse", imported_count)
             return imported_count
         except Exception as e:
             logger.error(f"Erreur lors de l'importation des utilisateurs: {e}")
             return 0
 
 # Instance globale du gestionnaire d'employés
-employee_manager = EmployeeManager()
+employee_manager = LazyInstance(EmployeeManager)
@@ -0,0 +1,174 @@
+"""
+Génération d'une base de présence synthétique à l'échelle d'une entreprise réelle.
+
+Exemple:
+    python generate_dataset.py bench.db --departments 20 --employees 2000 --years 2
+
+Chaque employé a ses propres habitudes (heure d'arrivée, durée de journée,
+pause déjeuner pointée ou non); s'y ajoutent absences, congés, retards,
+sorties oubliées et pointages répétés à quelques secondes d'intervalle. La
+génération est déterministe pour une graine donnée (--seed).
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+from datetime import date, datetime, timedelta
+
+FIRST_NAMES = ['Adam', 'Amine', 'Camille', 'Chloé', 'Fatima', 'Hugo', 'Inès', 'Jade', 'Karim', 'Léa',
+               'Lina', 'Louis', 'Lucas', 'Manon', 'Mehdi', 'Nora', 'Omar', 'Rayan', 'Sarah', 'Yasmine',
+               'Youssef', 'Zoé', 'Nabil', 'Salma', 'Thomas', 'Emma', 'Ali', 'Julie', 'Samir', 'Clara']
+LAST_NAMES = ['Benali', 'Bernard', 'Bouzid', 'Chaouch', 'Dubois', 'Durand', 'El Amrani', 'Fontaine',
+              'Gharbi', 'Haddad', 'Jebali', 'Laurent', 'Lefebvre', 'Martin', 'Mansour', 'Mercier',
+              'Moreau', 'Petit', 'Rahmani', 'Richard', 'Robert', 'Saidi', 'Simon', 'Trabelsi', 'Zaoui']
+DEPARTMENT_NAMES = ['Production', 'Logistique', 'Qualité', 'Maintenance', 'Achats', 'Ventes', 'Marketing',
+                    'Finances', 'Ressources humaines', 'Informatique', 'Juridique', 'Recherche',
+                    'Service client', 'Direction', 'Sécurité', 'Expédition', 'Méthodes', 'Formation']
+
+# Lignes insérées par transaction
+INSERT_BATCH_SIZE = 50000
+
+logger = logging.getLogger(__name__)
+
+def _employee_profile(rng):
+    """Habitudes d'un employé: arrivée moyenne (minutes), durée de journée, pause pointée"""
+    return {
+        'arrival': rng.gauss(8 * 60 + 45, 12),
+        'day_length': rng.choice([8, 8, 8, 8.5, 9, 7.5]) * 60 + 60,
+        'lunch_punched': rng.random() < 0.3,
+        'absence_rate': rng.choice([0.02, 0.03, 0.05, 0.08]),
+        'late_rate': rng.choice([0.03, 0.05, 0.1, 0.2])
+    }
+
+def _day_punches(rng, profile, day):
+    """Pointages (horodatage, type) d'un employé présent ce jour-là"""
+    arrival = rng.gauss(profile['arrival'], 6)
+    if rng.random() < profile['late_rate']:
+        arrival += rng.uniform(15, 75)
+    departure = arrival + rng.gauss(profile['day_length'], 20)
+    start = datetime.combine(day, datetime.min.time())
+
+    def at(minutes):
+        return (start + timedelta(seconds=int(minutes * 60))).strftime('%Y-%m-%d %H:%M:%S')
+
+    punches = [(at(arrival), 'IN')]
+    if profile['lunch_punched']:
+        lunch = rng.gauss(12 * 60 + 15, 15)
+        punches.append((at(lunch), 'OUT'))
+        punches.append((at(lunch + rng.gauss(50, 10)), 'IN'))
+    # Sortie oubliée
+    if rng.random() > 0.01:
+        punches.append((at(departure), 'OUT'))
+    # Doigt reposé sur le lecteur: pointage répété quelques secondes plus tard
+    if rng.random() < 0.02:
+        timestamp, punch_type = punches[0]
+        repeated = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S') + timedelta(seconds=rng.randint(2, 40))
+        punches.insert(1, (repeated.strftime('%Y-%m-%d %H:%M:%S'), punch_type))
+    return punches
+
+def generate(db, departments, employees, start_date, end_date, seed=1, inactive_rate=0.03):
+    """Remplir la base db (DatabaseManager) et retourner le nombre de pointages créés"""
+    from work_calendar import work_calendar
+
+    rng = random.Random(seed)
+    cursor = db.connection.cursor()
+    cursor.execute("PRAGMA synchronous = OFF")
+
+    department_names = [DEPARTMENT_NAMES[i % len(DEPARTMENT_NAMES)] + (f" {i // len(DEPARTMENT_NAMES) + 1}"
+                                                                        if i >= len(DEPARTMENT_NAMES) else '')
+                        for i in range(departments)]
+    cursor.executemany("INSERT INTO departments (name) VALUES (?)", [(name,) for name in department_names])
+    department_ids = [row[0] for row in cursor.execute("SELECT id FROM departments ORDER BY id")]
+
+    cursor.executemany(
+        "INSERT INTO employees (employee_id, first_name, last_name, department_id, status) VALUES (?, ?, ?, ?, ?)",
+        [(str(1000 + index), rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), rng.choice(department_ids),
+          'inactive' if rng.random() < inactive_rate else 'active')
+         for index in range(employees)]
+    )
+    db.connection.commit()
+    staff = [(row[0], _employee_profile(rng)) for row in cursor.execute("SELECT id FROM employees ORDER BY id")]
+
+    working_days = work_calendar.dates_from_mask(start_date, work_calendar.working_mask(start_date, end_date))
+    # Deux semaines de congés par an et par employé
+    leave_starts = {employee_id: set(rng.sample(range(len(working_days)), max(1, len(working_days) // 250)))
+                    for employee_id, _ in staff}
+
+    count = 0
+    rows = []
+    on_leave = {employee_id: 0 for employee_id, _ in staff}
+    for index, day in enumerate(working_days):
+        current = date.fromisoformat(day)
+        for employee_id, profile in staff:
+            if index in leave_starts[employee_id]:
+                on_leave[employee_id] = 10
+            if on_leave[employee_id]:
+                on_leave[employee_id] -= 1
+                continue
+            if rng.random() < profile['absence_rate']:
+                continue
+            rows.extend((employee_id, timestamp, punch_type)
+                        for timestamp, punch_type in _day_punches(rng, profile, current))
+
+        if len(rows) >= INSERT_BATCH_SIZE:
+            cursor.executemany("INSERT INTO attendance_logs (employee_id, datetime, type) VALUES (?, ?, ?)", rows)
+            db.connection.commit()
+            count += len(rows)
+            rows = []
+            logger.info("%s pointages générés (jusqu'au %s)", count, day)
+
+    if rows:
+        cursor.executemany("INSERT INTO attendance_logs (employee_id, datetime, type) VALUES (?, ?, ?)", rows)
+        db.connection.commit()
+        count += len(rows)
+
+    db.refresh_department_rollup(start_date=start_date, end_date=end_date)
+    cursor.execute("PRAGMA synchronous = FULL")
+    cursor.execute("ANALYZE")
+    db.connection.commit()
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Générer une base de présence synthétique")
+    parser.add_argument('output', help="fichier de base de données à créer")
+    parser.add_argument('--departments', type=int, default=20)
+    parser.add_argument('--employees', type=int, default=500)
+    parser.add_argument('--years', type=float, default=1, help="durée de l'historique en années")
+    parser.add_argument('--end', help="dernier jour de l'historique (AAAA-MM-JJ, défaut: hier)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--force', action='store_true', help="remplacer le fichier s'il existe")
+    args = parser.parse_args(argv)
+
+    if args.departments < 1 or args.employees < 1 or args.years <= 0:
+        parser.error("les nombres de départements, d'employés et d'années doivent être positifs")
+    if os.path.exists(args.output):
+        if not args.force:
+            parser.error(f"{args.output} existe déjà (--force pour le remplacer)")
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(args.output + suffix):
+                os.remove(args.output + suffix)
+
+    end = date.fromisoformat(args.end) if args.end else date.today() - timedelta(days=1)
+    start = end - timedelta(days=int(args.years * 365) - 1)
+
+    # La base cible remplace celle de la configuration pour ce processus
+    os.environ['ZKATT_DB_PATH'] = args.output
+    from logging_config import setup_logging
+    from db_manager import DatabaseManager
+    setup_logging(log_file=None)
+
+    db = DatabaseManager()
+    try:
+        started = datetime.now()
+        count = generate(db, args.departments, args.employees, start.isoformat(), end.isoformat(), args.seed)
+        elapsed = (datetime.now() - started).total_seconds()
+        print(f"{args.output}: {args.departments} départements, {args.employees} employés, "
+              f"{count} pointages du {start} au {end} ({elapsed:.1f} s)")
+    finally:
+        db.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
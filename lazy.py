@@ -0,0 +1,40 @@
+import threading
+
+class LazyInstance:
+    """Instance globale construite au premier accès à l'un de ses attributs.
+
+    Remplace `instance = Classe()` en fin de module: l'import reste immédiat
+    et le coût de construction (connexion, schéma, dossiers) n'est payé qu'à
+    la première utilisation. Les attributs et méthodes sont transmis à
+    l'instance réelle.
+    """
+
+    def __init__(self, factory):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def _get_instance(self):
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    object.__setattr__(self, '_instance', self._factory())
+                instance = self._instance
+        return instance
+
+    @property
+    def is_initialized(self):
+        """L'instance réelle a-t-elle déjà été construite ?"""
+        return self._instance is not None
+
+    def __getattr__(self, name):
+        return getattr(self._get_instance(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._get_instance(), name, value)
+
+    def __repr__(self):
+        if self._instance is None:
+            return f"<LazyInstance {getattr(self._factory, '__name__', self._factory)} (non initialisée)>"
+        return repr(self._instance)
@@ -0,0 +1,140 @@
+import atexit
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from config import LOG_FILE, LOG_LEVEL, LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_RATE_LIMIT, LOG_RATE_INTERVAL
+
+# Format commun à tous les journaux de l'application
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener = None
+_queue_handler = None
+_setup_lock = threading.Lock()
+
+class RateLimitFilter(logging.Filter):
+    """Limiter les messages répétés (même module, même modèle de message).
+
+    Au-delà de `limit` messages par fenêtre de `interval` secondes, les suivants
+    sont ignorés; le premier message de la fenêtre suivante porte leur nombre
+    (attribut suppressed, affiché par AppFormatter). Les avertissements et
+    erreurs ne sont jamais ignorés. Les modèles sont comparés avant formatage:
+    les messages par enregistrement doivent utiliser le style %s pour être
+    regroupés.
+    """
+
+    def __init__(self, limit=LOG_RATE_LIMIT, interval=LOG_RATE_INTERVAL):
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._windows = {}
+
+    def filter(self, record):
+        if not self.limit or record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                if len(self._windows) > 10000:
+                    # Modèles construits par f-string: ne pas accumuler indéfiniment
+                    self._windows = {key: self._windows[key]}
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            window[1] += 1
+            if window[1] <= self.limit:
+                return True
+            window[2] += 1
+            return False
+
+class AppFormatter(logging.Formatter):
+    """Format de l'application, avec le nombre de messages ignorés par RateLimitFilter"""
+
+    def formatMessage(self, record):
+        message = super().formatMessage(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            message += f" ({suppressed} messages similaires ignorés)"
+        return message
+
+class _InProcessQueueHandler(QueueHandler):
+    """QueueHandler sans formatage dans le thread appelant (file interne au processus)"""
+
+    def prepare(self, record):
+        return record
+
+def setup_logging(level=LOG_LEVEL, log_file=LOG_FILE, console=True):
+    """Configurer une seule fois la journalisation de l'application.
+
+    Les modules écrivent dans une file; un thread dédié formate les messages et
+    les écrit dans le fichier (avec rotation) et sur la console. Peut être
+    rappelée pour changer le niveau."""
+    global _listener, _queue_handler
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        formatter = AppFormatter(LOG_FORMAT)
+        handlers = []
+        if log_file:
+            file_handler = RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+                                               encoding='utf-8')
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        if console:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(formatter)
+            handlers.append(console_handler)
+
+        log_queue = queue.SimpleQueue()
+        _queue_handler = _InProcessQueueHandler(log_queue)
+        _queue_handler.addFilter(RateLimitFilter())
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_queue_handler)
+
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Écrire les messages en attente et arrêter le thread de journalisation"""
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is None:
+            return
+        # Plus de file sans lecteur: les messages suivants vont sur la sortie d'erreur
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+        _queue_handler = None
+
+def _after_fork_in_child():
+    # Le thread d'écriture n'existe pas dans un processus de calcul: ses messages
+    # (essentiellement des erreurs) vont directement sur la sortie d'erreur
+    global _listener, _queue_handler
+    if _queue_handler is None:
+        return
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(AppFormatter(LOG_FORMAT))
+    root.addHandler(handler)
+    _listener = None
+    _queue_handler = None
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
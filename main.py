@@ -8,33 +8,42 @@ Connexion à une pointeuse ZKTeco et gestion complète de la présence du person
 
 import logging
 import threading
-import schedule
-import time
 from datetime import datetime
-from gui.main_window import MainWindow
 from db_manager import db_manager
 from zk_manager import ZKManager
 from employee_manager import employee_manager
 from attendance_manager import attendance_manager
-from config import ZK_IP, ZK_PORT, SYNC_INTERVAL, AUTO_SYNC_TIME, AUTO_SYNC_ENABLED, REQUIRE_SYNC_CONFIRMATION
+from punch_filter import PunchDebouncer
+from occupancy import occupancy_index
+from alert_rules import alert_engine
+from report_jobs import report_jobs
+from metrics import metrics, start_metrics_server
+from sync_scheduler import JobScheduler, IntervalSchedule, DailySchedule, device_schedule
+from change_feed import change_feed
+from device_journal import device_journal
+from config import ZK_IP, ZK_PORT, ZK_DEVICES, SYNC_JITTER, AUTO_SYNC_ENABLED, REQUIRE_SYNC_CONFIRMATION, ALERT_CHECK_INTERVAL
+from config import METRICS_ENABLED, METRICS_PORT, METRICS_SNAPSHOT_INTERVAL, API_ENABLED, CHANGE_FEED_COMPACT_TIME
+from config import JOURNAL_RETENTION_DAYS, JOURNAL_PRUNE_TIME
+from logging_config import setup_logging, shutdown_logging
 
-# Configuration du logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('app.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 class AttendanceApp:
     def __init__(self):
         self.main_window = None
-        self.sync_thread = None
-        self.running = False
-        self.zk_manager = ZKManager(ZK_IP, ZK_PORT)
+        self.metrics_server = None
+        main_device = next((device['name'] for device in ZK_DEVICES
+                            if (device['ip'], device['port']) == (ZK_IP, ZK_PORT)), None)
+        self.zk_manager = ZKManager(ZK_IP, ZK_PORT, name=main_device)
+        # Pointeuses synchronisées automatiquement (la principale partage self.zk_manager)
+        self.devices = {
+            device['name']: (self.zk_manager if (device['ip'], device['port']) == (ZK_IP, ZK_PORT)
+                             else ZKManager(device['ip'], device['port'], name=device['name']))
+            for device in ZK_DEVICES
+        }
+        # Une seule synchronisation à la fois (écritures en base)
+        self._sync_lock = threading.Lock()
+        self.scheduler = JobScheduler(db_manager)
     
     def initialize(self):
         """Initialiser l'application"""
@@ -45,12 +54,42 @@ class AttendanceApp:
             logger.info("Initialisation de la base de données...")
             # La base de données est déjà initialisée via db_manager
             
+            # Reconstruire l'index des présences sur site à partir des pointages du jour
+            occupancy_index.rebuild(db_manager)
+            alert_engine.seed(occupancy_index.get_last_punches())
+            
             # Tenter la connexion à la pointeuse
             self._connect_to_zk()
             
             # Démarrer la synchronisation automatique
             self._start_auto_sync()
             
+            # Démarrer la vérification périodique des alertes
+            self._start_alert_checks()
+            
+            # Exposer les métriques et les enregistrer périodiquement
+            self._start_metrics()
+            
+            # Compacter chaque jour le flux des modifications déjà consommé
+            self.scheduler.add_job('change_feed_compact', DailySchedule(CHANGE_FEED_COMPACT_TIME),
+                                   change_feed.compact, persist=True)
+            
+            # Supprimer les journaux des pointeuses trop anciens
+            if JOURNAL_RETENTION_DAYS:
+                self.scheduler.add_job('device_journal_prune', DailySchedule(JOURNAL_PRUNE_TIME),
+                                       device_journal.prune, persist=True)
+            
+            # Lancer le planificateur des tâches périodiques
+            self.scheduler.start()
+            
+            # API locale en lecture seule pour les outils internes
+            if API_ENABLED:
+                from api_server import start_api_server_thread
+                start_api_server_thread()
+            
+            # Reprendre les rapports restés en file lors de la dernière fermeture
+            report_jobs.resume_pending()
+            
             logger.info("Application initialisée avec succès")
             return True
             
@@ -58,11 +97,12 @@ class AttendanceApp:
             logger.error(f"Erreur lors de l'initialisation: {e}")
             return False
     
-    def _connect_to_zk(self):
+    def _connect_to_zk(self, zk=None):
         """Tenter de se connecter à la pointeuse ZKTeco avec gestion améliorée des erreurs"""
+        zk = zk or self.zk_manager
         try:
-            logger.info(f"Tentative de connexion à la pointeuse ZKTeco ({ZK_IP}:{ZK_PORT})...")
-            self.zk_manager.connect()
+            logger.info("Tentative de connexion à la pointeuse ZKTeco (%s:%s)...", zk.ip_address, zk.port)
+            zk.connect()
             logger.info("Connexion à la pointeuse établie avec succès")
             return True
         except Exception as e:
@@ -81,51 +121,83 @@ class AttendanceApp:
         """Démarrer la synchronisation automatique"""
         try:
             if AUTO_SYNC_ENABLED:
-                # Planifier la synchronisation quotidienne
-                schedule.every().day.at(AUTO_SYNC_TIME).do(self._synchronize_all)
-                
-                # Démarrer le thread de planification
-                self.running = True
-                self.sync_thread = threading.Thread(target=self._schedule_runner, daemon=True)
-                self.sync_thread.start()
-                
-                logger.info(f"Synchronisation automatique planifiée à {AUTO_SYNC_TIME} chaque jour")
+                # Une tâche par pointeuse (première échéance de ses planifications): les
+                # exécutions manquées pendant un arrêt de l'application sont rattrapées une fois
+                for device in ZK_DEVICES:
+                    self.scheduler.add_job(f"sync:{device['name']}", device_schedule(device),
+                                           self._synchronize_all, device=device['name'],
+                                           jitter=device.get('jitter', SYNC_JITTER), persist=True)
+                logger.info("Synchronisation automatique planifiée pour %s pointeuse(s)", len(ZK_DEVICES))
             else:
                 logger.info("Synchronisation automatique désactivée dans la configuration")
                 
         except Exception as e:
             logger.error(f"Erreur lors du démarrage de la synchronisation automatique: {e}")
     
-    def _schedule_runner(self):
-        """Exécuteur des tâches planifiées"""
-        while self.running:
-            schedule.run_pending()
-            time.sleep(1)
+    def _start_alert_checks(self):
+        """Planifier la vérification des échéances du moteur d'alertes"""
+        try:
+            self.scheduler.add_job('alert_checks', IntervalSchedule(ALERT_CHECK_INTERVAL), alert_engine.check_deadlines)
+            logger.info("Vérification des alertes planifiée toutes les %s secondes", ALERT_CHECK_INTERVAL)
+        except Exception as e:
+            logger.error(f"Erreur lors du démarrage de la vérification des alertes: {e}")
+    
+    def _start_metrics(self):
+        """Démarrer le point /metrics et planifier l'enregistrement des métriques en base"""
+        try:
+            if not METRICS_ENABLED:
+                logger.info("Métriques désactivées dans la configuration")
+                return
+            if METRICS_PORT:
+                self.metrics_server = start_metrics_server()
+            if METRICS_SNAPSHOT_INTERVAL:
+                self.scheduler.add_job('metrics_snapshot', IntervalSchedule(METRICS_SNAPSHOT_INTERVAL),
+                                       metrics.save_snapshot, db_manager)
+                logger.info("Enregistrement des métriques planifié toutes les %s secondes",
+                            METRICS_SNAPSHOT_INTERVAL)
+        except Exception as e:
+            logger.error(f"Erreur lors du démarrage des métriques: {e}")
+    
+    @metrics.timed('sync_seconds')
+    def _synchronize_all(self, confirmed=False, device=None):
+        """Synchroniser toutes les données avec la pointeuse avec gestion améliorée des erreurs
+        
+        confirmed: la synchronisation a été explicitement demandée (ligne de commande),
+        la confirmation éventuellement requise par la configuration est donc acquise.
+        device: nom de la pointeuse (ZK_DEVICES), la principale par défaut.
+        Retourne un résumé: statut global, nombres d'utilisateurs, de pointages importés et
+        de pointages répétés ignorés (suppressed), message."""
+        if device is not None and device not in self.devices:
+            raise ValueError(f"Pointeuse inconnue: {device}")
+        with self._sync_lock:
+            return self._synchronize_device(self.devices[device] if device else self.zk_manager, confirmed)
     
-    def _synchronize_all(self):
-        """Synchroniser toutes les données avec la pointeuse avec gestion améliorée des erreurs"""
+    def _synchronize_device(self, zk, confirmed):
+        """Synchroniser utilisateurs et pointages d'une pointeuse (voir _synchronize_all)"""
         try:
-            logger.info("Début de la synchronisation automatique")
+            logger.info("Début de la synchronisation automatique (%s)", zk.ip_address)
             
             # Vérifier si la confirmation est requise
-            if REQUIRE_SYNC_CONFIRMATION:
+            if REQUIRE_SYNC_CONFIRMATION and not confirmed:
                 logger.info("Confirmation requise pour la synchronisation automatique - opération annulée")
                 db_manager.add_sync_log('auto_sync', 0, 'warning', 'Confirmation requise - opération annulée')
-                return
+                return {'status': 'warning', 'users': 0, 'attendance': 0, 'suppressed': 0,
+                        'message': 'Confirmation requise - opération annulée'}
             
             # Vérifier la connexion et tenter de reconnecter si nécessaire
-            if not self.zk_manager.is_connected():
+            if not zk.is_connected():
                 logger.info("Tentative de reconnexion pour la synchronisation automatique...")
-                if not self._connect_to_zk():
+                if not self._connect_to_zk(zk):
                     logger.warning("Impossible de se connecter à la pointeuse pour la synchronisation automatique")
                     db_manager.add_sync_log('auto_sync', 0, 'error', 'Pointeuse non connectée')
-                    return
+                    return {'status': 'error', 'users': 0, 'attendance': 0, 'suppressed': 0,
+                            'message': 'Pointeuse non connectée'}
             
             # Synchroniser les utilisateurs
-            user_status, user_count = self._synchronize_users()
+            user_status, user_count = self._synchronize_users(zk)
             
             # Synchroniser la présence
-            attendance_status, attendance_count = self._synchronize_attendance()
+            attendance_status, attendance_count, suppressed_count = self._synchronize_attendance(zk)
             
             total_synced = user_count + attendance_count
             overall_status = 'success'
@@ -134,22 +206,27 @@ class AttendanceApp:
             elif 'warning' in (user_status, attendance_status):
                 overall_status = 'warning'
             
+            message = (f'Utilisateurs: {user_count} ({user_status}), '
+                       f'Présence: {attendance_count} ({attendance_status}), {suppressed_count} doublons ignorés')
             logger.info("Synchronisation automatique terminée")
-            db_manager.add_sync_log('auto_sync', total_synced, overall_status, 
-                                   f'Utilisateurs: {user_count} ({user_status}), Présence: {attendance_count} ({attendance_status})')
+            db_manager.add_sync_log('auto_sync', total_synced, overall_status, message)
+            return {'status': overall_status, 'users': user_count, 'attendance': attendance_count,
+                    'suppressed': suppressed_count, 'message': message}
             
         except Exception as e:
             logger.error(f"Erreur lors de la synchronisation automatique: {e}")
             db_manager.add_sync_log('auto_sync', 0, 'error', str(e))
+            return {'status': 'error', 'users': 0, 'attendance': 0, 'suppressed': 0, 'message': str(e)}
     
-    def _synchronize_users(self):
+    def _synchronize_users(self, zk=None):
         """Synchroniser les utilisateurs depuis la pointeuse"""
+        zk = zk or self.zk_manager
         try:
-            if self.zk_manager.is_connected():
-                users = self.zk_manager.import_users()
+            if zk.is_connected():
+                users = zk.import_users()
                 if users:
                     imported_count = employee_manager.import_users_from_zk(users)
-                    logger.info(f"{imported_count} utilisateurs synchronisés depuis la pointeuse")
+                    logger.info("%s utilisateurs synchronisés depuis la pointeuse", imported_count)
                     db_manager.add_sync_log('users', imported_count, 'success', f'{imported_count} utilisateurs importés')
                     return 'success', imported_count
                 else:
@@ -166,29 +243,34 @@ class AttendanceApp:
             db_manager.add_sync_log('users', 0, 'error', str(e))
             return 'error', 0
     
-    def _synchronize_attendance(self):
-        """Synchroniser les données de présence depuis la pointeuse"""
+    def _synchronize_attendance(self, zk=None):
+        """Synchroniser les données de présence depuis la pointeuse
+
+        Retourne (statut, pointages importés, pointages répétés ignorés)."""
+        zk = zk or self.zk_manager
         try:
-            if self.zk_manager.is_connected():
-                attendance_data = self.zk_manager.get_attendance_data()
+            if zk.is_connected():
+                attendance_data = zk.get_attendance_data()
                 if attendance_data:
-                    synced_count = attendance_manager.sync_attendance_data(attendance_data)
-                    logger.info(f"{synced_count} logs de présence synchronisés depuis la pointeuse")
-                    db_manager.add_sync_log('attendance', synced_count, 'success', f'{synced_count} pointages importés')
-                    return 'success', synced_count
+                    debouncer = PunchDebouncer()
+                    synced_count = attendance_manager.sync_attendance_data(attendance_data, debouncer)
+                    logger.info("%s logs de présence synchronisés depuis la pointeuse", synced_count)
+                    db_manager.add_sync_log('attendance', synced_count, 'success',
+                                           f'{synced_count} pointages importés, {debouncer.suppressed_count} doublons ignorés')
+                    return 'success', synced_count, debouncer.suppressed_count
                 else:
                     logger.warning("Aucune donnée de présence trouvée sur la pointeuse")
                     db_manager.add_sync_log('attendance', 0, 'warning', 'Aucune donnée de présence')
-                    return 'warning', 0
+                    return 'warning', 0, 0
             else:
                 logger.warning("Impossible de synchroniser la présence: pointeuse non connectée")
                 db_manager.add_sync_log('attendance', 0, 'error', 'Pointeuse non connectée')
-                return 'error', 0
+                return 'error', 0, 0
                 
         except Exception as e:
             logger.error(f"Erreur lors de la synchronisation de la présence: {e}")
             db_manager.add_sync_log('attendance', 0, 'error', str(e))
-            return 'error', 0
+            return 'error', 0, 0
 
     def synchronize_users_with_confirmation(self):
         """Synchroniser les utilisateurs avec confirmation de l'utilisateur"""
@@ -204,12 +286,12 @@ class AttendanceApp:
             
             # Demander confirmation à l'utilisateur
             if REQUIRE_SYNC_CONFIRMATION:
-                logger.info(f"{len(users)} utilisateurs trouvés sur la pointeuse - confirmation requise")
+                logger.info("%s utilisateurs trouvés sur la pointeuse - confirmation requise", len(users))
                 # Dans l'interface graphique, cette confirmation sera gérée par une boîte de dialogue
                 return False
             
             imported_count = employee_manager.import_users_from_zk(users)
-            logger.info(f"{imported_count} utilisateurs synchronisés depuis la pointeuse")
+            logger.info("%s utilisateurs synchronisés depuis la pointeuse", imported_count)
             db_manager.add_sync_log('users', imported_count, 'success')
             return True
             
@@ -232,13 +314,15 @@ class AttendanceApp:
             
             # Demander confirmation à l'utilisateur
             if REQUIRE_SYNC_CONFIRMATION:
-                logger.info(f"{len(attendance_data)} logs de présence trouvés - confirmation requise")
+                logger.info("%s logs de présence trouvés - confirmation requise", len(attendance_data))
                 # Dans l'interface graphique, cette confirmation sera gérée par une boîte de dialogue
                 return False
             
-            synced_count = attendance_manager.sync_attendance_data(attendance_data)
-            logger.info(f"{synced_count} logs de présence synchronisés depuis la pointeuse")
-            db_manager.add_sync_log('attendance', synced_count, 'success')
+            debouncer = PunchDebouncer()
+            synced_count = attendance_manager.sync_attendance_data(attendance_data, debouncer)
+            logger.info("%s logs de présence synchronisés depuis la pointeuse", synced_count)
+            db_manager.add_sync_log('attendance', synced_count, 'success',
+                                   f'{debouncer.suppressed_count} doublons ignorés')
             return True
             
         except Exception as e:
@@ -250,6 +334,8 @@ class AttendanceApp:
         """Lancer l'interface graphique"""
         try:
             logger.info("Lancement de l'interface graphique")
+            # Import différé: l'interface n'est chargée qu'au moment de l'afficher
+            from gui.main_window import MainWindow
             self.main_window = MainWindow()
             self.main_window.run()
             
@@ -261,11 +347,23 @@ class AttendanceApp:
         """Nettoyer les ressources avant la fermeture"""
         try:
             logger.info("Nettoyage des ressources...")
-            self.running = False
             
-            # Déconnecter la pointeuse
-            if self.zk_manager.is_connected():
-                self.zk_manager.disconnect()
+            # Arrêter les tâches planifiées
+            self.scheduler.stop(wait=False)
+            
+            # Arrêter la génération des rapports en arrière-plan
+            report_jobs.shutdown()
+            
+            # Arrêter le point /metrics et conserver les dernières mesures
+            if self.metrics_server:
+                self.metrics_server.shutdown()
+            if METRICS_ENABLED:
+                metrics.save_snapshot(db_manager)
+            
+            # Déconnecter les pointeuses
+            for zk in {id(zk): zk for zk in [self.zk_manager, *self.devices.values()]}.values():
+                if zk.is_connected():
+                    zk.disconnect()
             
             # Fermer la base de données
             db_manager.close()
@@ -277,6 +375,8 @@ class AttendanceApp:
 
 def main():
     """Fonction principale"""
+    # Journal de l'application (fichier avec rotation et console)
+    setup_logging()
     app = AttendanceApp()
     
     try:
@@ -295,6 +395,7 @@ def main():
     finally:
         # Nettoyer avant de quitter
         app.cleanup()
+        shutdown_logging()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,206 @@
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config import METRICS_ENABLED, METRICS_HOST, METRICS_PORT, METRICS_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+# Préfixe des métriques exposées
+METRICS_PREFIX = 'zkatt_'
+
+class MetricsRegistry:
+    """Compteurs et histogrammes de latence des chemins critiques.
+
+    Une observation coûte deux lectures d'horloge, une recherche dichotomique
+    dans les bornes de l'histogramme et un verrou: négligeable devant un
+    appel à la pointeuse ou une requête SQLite. Les métriques sont exposées
+    au format texte de Prometheus et peuvent être enregistrées en base.
+    """
+
+    def __init__(self, buckets=METRICS_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def describe(self, name, text):
+        """Texte d'aide d'une métrique (ligne # HELP)"""
+        self._help[name] = text
+
+    def inc(self, name, value=1, **labels):
+        """Incrémenter un compteur"""
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        """Ajouter une durée (en secondes) à un histogramme"""
+        key = self._key(name, labels)
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0, 0.0, 0.0]
+            histogram[0][index] += 1
+            histogram[1] += 1
+            histogram[2] += seconds
+            if seconds > histogram[3]:
+                histogram[3] = seconds
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Mesurer la durée d'un bloc"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name, **labels):
+        """Décorateur: mesurer chaque appel de la fonction décorée"""
+        def decorator(func):
+            if not METRICS_ENABLED:
+                return func
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start, **labels)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """Valeurs courantes de toutes les métriques (structure sérialisable en JSON)"""
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            histograms = [{'name': name, 'labels': dict(labels), 'count': count, 'sum': round(total, 6),
+                           'max': round(maximum, 6), 'buckets': list(bucket_counts)}
+                          for (name, labels), (bucket_counts, count, total, maximum)
+                          in sorted(self._histograms.items())]
+        return {'buckets': list(self.buckets), 'counters': counters, 'histograms': histograms}
+
+    def render_prometheus(self):
+        """Métriques au format texte d'exposition de Prometheus"""
+        snapshot = self.snapshot()
+        lines = []
+        described = set()
+
+        def header(name, kind):
+            if name not in described:
+                described.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {METRICS_PREFIX}{name} {self._help[name]}")
+                lines.append(f"# TYPE {METRICS_PREFIX}{name} {kind}")
+
+        def label_text(labels, extra=None):
+            items = list(labels.items()) + ([extra] if extra else [])
+            if not items:
+                return ''
+            return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in items) + '}'
+
+        for counter in snapshot['counters']:
+            header(counter['name'], 'counter')
+            lines.append(f"{METRICS_PREFIX}{counter['name']}{label_text(counter['labels'])} {counter['value']}")
+
+        for histogram in snapshot['histograms']:
+            name = f"{METRICS_PREFIX}{histogram['name']}"
+            header(histogram['name'], 'histogram')
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram['buckets']):
+                cumulative += count
+                lines.append(f"{name}_bucket{label_text(histogram['labels'], ('le', bound))} {cumulative}")
+            lines.append(f"{name}_bucket{label_text(histogram['labels'], ('le', '+Inf'))} {histogram['count']}")
+            lines.append(f"{name}_sum{label_text(histogram['labels'])} {histogram['sum']}")
+            lines.append(f"{name}_count{label_text(histogram['labels'])} {histogram['count']}")
+
+        return '\n'.join(lines) + '\n'
+
+    def save_snapshot(self, db):
+        """Enregistrer un instantané des métriques dans la base"""
+        try:
+            return db.add_metrics_snapshot(json.dumps(self.snapshot()))
+        except Exception as e:
+            logger.error(f"Erreur lors de l'enregistrement des métriques: {e}")
+            return None
+
+    def reset(self):
+        """Remettre toutes les métriques à zéro"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def instrument_methods(name, exclude=()):
+    """Décorateur de classe: mesurer chaque méthode publique (étiquette method).
+
+    Les méthodes iter_* sont ignorées: elles retournent un itérateur et leur
+    durée ne refléterait pas le parcours des résultats."""
+    def decorator(cls):
+        if not METRICS_ENABLED:
+            return cls
+        for attribute, value in list(vars(cls).items()):
+            if (attribute.startswith('_') or attribute.startswith('iter_') or attribute in exclude
+                    or not inspect.isfunction(value)):
+                continue
+            setattr(cls, attribute, metrics.timed(name, method=attribute)(value))
+        return cls
+    return decorator
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = metrics.render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Pas de journalisation de chaque requête de collecte
+        pass
+
+def start_metrics_server(host=METRICS_HOST, port=METRICS_PORT):
+    """Exposer /metrics sur un port local (thread en arrière-plan)"""
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        thread = threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True)
+        thread.start()
+        logger.info("Métriques exposées sur http://%s:%s/metrics", host, server.server_port)
+        return server
+    except OSError as e:
+        logger.error(f"Impossible de démarrer le serveur de métriques: {e}")
+        return None
+
+# Registre global des métriques
+metrics = MetricsRegistry()
+metrics.describe('zk_call_seconds', "Durée des appels à la pointeuse")
+metrics.describe('db_call_seconds', "Durée des méthodes de DatabaseManager")
+metrics.describe('db_commit_seconds', "Durée des validations de transaction SQLite")
+metrics.describe('attendance_call_seconds', "Durée des calculs d'AttendanceManager")
+metrics.describe('report_seconds', "Durée de génération des rapports")
+metrics.describe('sync_seconds', "Durée des synchronisations complètes avec la pointeuse")
+metrics.describe('report_cache_total', "Rapports servis depuis le cache (hit) ou régénérés (miss)")
+metrics.describe('employee_reports_total', "Rapports individuels générés")
+metrics.describe('punches_received_total', "Pointages reçus de la pointeuse")
+metrics.describe('punches_ingested_total', "Pointages enregistrés")
+metrics.describe('punches_suppressed_total', "Pointages répétés ignorés")
@@ -0,0 +1,115 @@
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+class OccupancyIndex:
+    """Index en mémoire des personnes présentes sur site.
+
+    Conserve, pour la journée en cours, le dernier pointage de chaque employé
+    et le nombre de présents par département: les questions « qui est là ? »
+    et « combien par département ? » sont traitées en temps constant. Après
+    minuit, l'index est vidé à la première question, même sans nouveau
+    pointage.
+    """
+
+    def __init__(self, clock=datetime.now):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.day = None
+        self._last_punch = {}
+        self._departments = {}
+        self._present_by_department = {}
+        self.present_count = 0
+
+    def rebuild(self, db, day=None):
+        """Reconstruire l'index à partir des pointages du jour"""
+        day = day or self.clock().strftime('%Y-%m-%d')
+        rows = db.get_last_punches(day)
+        with self._lock:
+            self._reset(day)
+            for row in rows:
+                self._apply(row['employee_id'], row['department_id'], row['type'], row['datetime'])
+        logger.info("Index de présence reconstruit: %s personnes sur site", self.present_count)
+
+    def apply_punch(self, employee_id, department_id, punch_type, timestamp):
+        """Mettre à jour l'index avec un nouveau pointage"""
+        timestamp = str(timestamp)
+        day = timestamp[:10]
+        with self._lock:
+            if self.day is None or day > self.day:
+                # Nouvelle journée: l'occupation repart de zéro
+                self._reset(day)
+            elif day < self.day:
+                return
+            self._apply(employee_id, department_id, punch_type, timestamp)
+
+    def is_present(self, employee_id):
+        """L'employé est-il actuellement sur site ?"""
+        with self._lock:
+            self._roll_over()
+            last_punch = self._last_punch.get(employee_id)
+            return last_punch is not None and last_punch[0] == 'IN'
+
+    def get_last_punch(self, employee_id):
+        """Dernier pointage du jour (type, horodatage) ou None"""
+        with self._lock:
+            self._roll_over()
+            return self._last_punch.get(employee_id)
+
+    def get_last_punches(self):
+        """Copie des derniers pointages du jour {employé: (type, horodatage)}"""
+        with self._lock:
+            self._roll_over()
+            return dict(self._last_punch)
+
+    def headcount(self, department_id=None):
+        """Nombre de présents, au total ou pour un département"""
+        with self._lock:
+            self._roll_over()
+            if department_id is None:
+                return self.present_count
+            return self._present_by_department.get(department_id, 0)
+
+    def headcount_by_department(self):
+        """Nombre de présents par département"""
+        with self._lock:
+            self._roll_over()
+            return {dept_id: count for dept_id, count in self._present_by_department.items() if count}
+
+    def _roll_over(self):
+        # Journée terminée sans pointage depuis minuit: personne n'est encore sur site
+        today = self.clock().strftime('%Y-%m-%d')
+        if self.day is not None and today > self.day:
+            self._reset(today)
+
+    def _reset(self, day):
+        self.day = day
+        self._last_punch = {}
+        self._departments = {}
+        self._present_by_department = {}
+        self.present_count = 0
+
+    def _apply(self, employee_id, department_id, punch_type, timestamp):
+        last_punch = self._last_punch.get(employee_id)
+        if last_punch is not None and timestamp < last_punch[1]:
+            # Pointage plus ancien que l'état connu: sans effet
+            return
+
+        was_present = last_punch is not None and last_punch[0] == 'IN'
+        is_present = punch_type == 'IN'
+        previous_department = self._departments.get(employee_id, department_id)
+
+        if was_present:
+            self._present_by_department[previous_department] -= 1
+            self.present_count -= 1
+        if is_present:
+            self._present_by_department[department_id] = self._present_by_department.get(department_id, 0) + 1
+            self.present_count += 1
+
+        self._last_punch[employee_id] = (punch_type, timestamp)
+        self._departments[employee_id] = department_id
+
+# Instance globale de l'index de présence sur site
+occupancy_index = OccupancyIndex()
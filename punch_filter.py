@@ -0,0 +1,80 @@
+import logging
+from datetime import datetime, timedelta
+from config import PUNCH_DEBOUNCE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+def convert_status_code(status_code):
+    """Convertir le code de statut ZKTeco en type IN/OUT"""
+    # Selon la documentation ZKTeco:
+    # 0: Check-In (Entrée)
+    # 1: Check-Out (Sortie)
+    # 15: Check-In (Entrée) - valeur courante
+    if status_code in [0, 15]:
+        return 'IN'
+    elif status_code == 1:
+        return 'OUT'
+    else:
+        # Pour les autres codes, on utilise 'IN' par défaut
+        logger.warning("Code de statut inconnu: %s, utilisation de 'IN' par défaut", status_code)
+        return 'IN'
+
+def convert_attendance_data(attendance_data):
+    """Convertir les pointages bruts de la pointeuse au format attendu par la base de données
+
+    Sans dépendance à la bibliothèque de la pointeuse: utilisé aussi par le
+    rejeu du journal (device_journal)."""
+    converted_data = []
+    for attendance in attendance_data:
+        # Créer un nouvel objet avec le statut converti
+        converted_attendance = type('Attendance', (), {
+            'user_id': attendance.user_id,
+            'timestamp': attendance.timestamp,
+            'status': convert_status_code(attendance.status)
+        })()
+        converted_data.append(converted_attendance)
+    return converted_data
+
+class PunchDebouncer:
+    """Filtre en flux des pointages répétés entre la pointeuse et l'écriture en base.
+
+    Les pointages d'un même employé survenant moins de `window_seconds` après
+    le dernier pointage conservé sont fusionnés avec celui-ci, quel que soit
+    leur type (un IN/IN/OUT en quelques secondes devient un seul IN). L'état
+    (dernier pointage conservé par employé) et les compteurs sont conservés
+    d'un appel de filter() à l'autre.
+    """
+
+    def __init__(self, window_seconds=PUNCH_DEBOUNCE_SECONDS):
+        self.window = timedelta(seconds=window_seconds)
+        self.received_count = 0
+        self.suppressed_count = 0
+        self._last_kept = {}
+
+    def filter(self, punches):
+        """Générateur des pointages conservés"""
+        received_before = self.received_count
+        suppressed_before = self.suppressed_count
+        for punch in punches:
+            self.received_count += 1
+            timestamp = self._to_datetime(punch.timestamp)
+            last_timestamp = self._last_kept.get(punch.user_id)
+            
+            if last_timestamp is not None and timedelta(0) <= timestamp - last_timestamp <= self.window:
+                self.suppressed_count += 1
+                continue
+            
+            # Un pointage antérieur (données non triées) ne déplace pas la référence
+            if last_timestamp is None or timestamp > last_timestamp:
+                self._last_kept[punch.user_id] = timestamp
+            yield punch
+        
+        if self.suppressed_count > suppressed_before:
+            logger.info("%s pointages répétés ignorés sur %s", self.suppressed_count - suppressed_before,
+                        self.received_count - received_before)
+
+    @staticmethod
+    def _to_datetime(value):
+        if isinstance(value, datetime):
+            return value
+        return datetime.fromisoformat(str(value))
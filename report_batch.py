@@ -0,0 +1,145 @@
+import io
+import logging
+import os
+import re
+import shutil
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby, islice
+from db_manager import db_manager
+from metrics import metrics
+from report_manager import ReportManager, REPORT_COLUMNS, REPORT_FORMATS
+from config import REPORTS_DIR, BATCH_WORKERS, REPORT_BATCH_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+class BatchReportGenerator:
+    """Génération en un seul passage d'un rapport de présence par employé.
+
+    La période est lue une seule fois, triée par employé, et les lignes sont
+    réparties entre les rapports individuels. La mise en page PDF est répartie
+    sur un pool de processus; seul le processus principal écrit le résultat
+    (dossier ou archive ZIP), au fil de l'eau et dans l'ordre des employés.
+    """
+
+    def __init__(self, db=None):
+        self.db = db or db_manager
+
+    @metrics.timed('report_seconds', type='employee_batch')
+    def generate(self, fmt, start_date, end_date, department_id=None, archive=False, workers=BATCH_WORKERS,
+                 chunk_size=REPORT_BATCH_CHUNK_SIZE, progress_callback=None):
+        """Générer les rapports individuels de la période.
+
+        Retourne le chemin du dossier (ou de l'archive ZIP si archive) produit,
+        ou None en cas d'erreur. progress_callback reçoit le nombre d'employés traités."""
+        try:
+            if fmt not in REPORT_FORMATS:
+                logger.error(f"Format de rapport non supporté: {fmt}")
+                return None
+
+            os.makedirs(REPORTS_DIR, exist_ok=True)
+            output = os.path.join(REPORTS_DIR, f"rapports_employes_{start_date}_{end_date}_{fmt}")
+            if department_id:
+                output += f"_dept{department_id}"
+            rows = self.db.iter_daily_attendance_rows(start_date, end_date, department_id=department_id,
+                                                      by_employee=True)
+            chunks = self._employee_chunks(rows, chunk_size)
+
+            if archive:
+                output += '.zip'
+                temp_path = f"{output}.{os.getpid()}.tmp"
+                # Les PDF et classeurs Excel sont déjà compressés: stockage sans recompression
+                with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_STORED) as zip_file:
+                    count = self._render(fmt, chunks, start_date, end_date, workers,
+                                         zip_file.writestr, progress_callback)
+                os.replace(temp_path, output)
+            else:
+                if os.path.isdir(output):
+                    shutil.rmtree(output)
+                os.makedirs(output)
+
+                def write(name, content):
+                    with open(os.path.join(output, name), 'wb') as f:
+                        f.write(content)
+
+                count = self._render(fmt, chunks, start_date, end_date, workers, write, progress_callback)
+
+            logger.info("%s rapports individuels générés: %s", count, output)
+            metrics.inc('employee_reports_total', count, format=fmt)
+            self.db.add_report('employee_batch', start_date, end_date, output)
+            return output
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la génération des rapports individuels: {e}")
+            return None
+
+    @staticmethod
+    def _employee_chunks(rows, chunk_size):
+        """Regrouper les lignes (triées par employé) par employé, puis par lots d'employés"""
+        keys = [key for key, _ in REPORT_COLUMNS['daily']]
+        employees = (
+            (employee_id, [{key: row[key] for key in keys} for row in employee_rows])
+            for employee_id, employee_rows in groupby(rows, key=lambda row: row['employee_id'])
+        )
+        while True:
+            chunk = list(islice(employees, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    @staticmethod
+    def _render(fmt, chunks, start_date, end_date, workers, write, progress_callback=None):
+        """Produire les rapports lot par lot et les transmettre à write(nom, contenu)"""
+        count = 0
+        if fmt != 'pdf':
+            # Les classeurs en écriture seule sont rapides: pas de processus supplémentaires
+            for chunk in chunks:
+                for name, content in _render_employee_reports(fmt, chunk, start_date, end_date):
+                    write(name, content)
+                count += len(chunk)
+                if progress_callback:
+                    progress_callback(count)
+            return count
+
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Nombre de lots en cours limité: la mémoire ne dépend pas de la taille de l'entreprise
+            pending = deque()
+            for chunk in chunks:
+                pending.append((len(chunk), executor.submit(_render_employee_reports, fmt, chunk,
+                                                            start_date, end_date)))
+                while len(pending) >= workers * 2:
+                    count += _drain(pending.popleft(), write)
+                    if progress_callback:
+                        progress_callback(count)
+            while pending:
+                count += _drain(pending.popleft(), write)
+                if progress_callback:
+                    progress_callback(count)
+        return count
+
+def _drain(item, write):
+    """Écrire les rapports d'un lot terminé et retourner le nombre d'employés"""
+    size, future = item
+    for name, content in future.result():
+        write(name, content)
+    return size
+
+def _render_employee_reports(fmt, chunk, start_date, end_date):
+    """Mettre en page (en mémoire) les rapports d'un lot d'employés"""
+    manager = ReportManager()
+    extension = REPORT_FORMATS[fmt]
+    results = []
+    for employee_id, rows in chunk:
+        first = rows[0]
+        full_name = f"{first['last_name'].strip()} {first['first_name'].strip()}"
+        buffer = io.BytesIO()
+        manager.write_report(fmt, buffer, 'daily', rows, start_date, end_date,
+                             subtitle=f"Employé: {employee_id} - {full_name}")
+        name = re.sub(r'[^\w.-]+', '_', f"{employee_id}_{full_name}").strip('_')
+        results.append((f"{name}.{extension}", buffer.getvalue()))
+    return results
+
+# Instance globale du générateur de rapports par lots
+batch_report_generator = BatchReportGenerator()
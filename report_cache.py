@@ -0,0 +1,117 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from metrics import metrics
+from config import REPORTS_DIR, REPORT_CACHE_MAX_BYTES, COMPANY_NAME, STANDARD_WORK_HOURS
+
+logger = logging.getLogger(__name__)
+
+class ReportCache:
+    """Cache des fichiers de rapport adressés par leur contenu.
+
+    La clé d'un rapport combine son type, son format, ses filtres et la version
+    des données de la période (voir DatabaseManager.get_data_version); elle fait
+    partie du nom du fichier. Si le fichier existe déjà, il est servi tel quel,
+    sinon il est régénéré. Les fichiers les moins récemment servis sont
+    supprimés au-delà de max_bytes.
+    """
+
+    def __init__(self, directory=REPORTS_DIR, max_bytes=REPORT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def make_key(self, db, fmt, report_type, start_date, end_date, employee_id=None, department_id=None):
+        """Clé du rapport, ou None si la version des données n'a pas pu être lue"""
+        version = db.get_data_version(start_date, end_date)
+        if version is None:
+            return None
+        # Les paramètres de mise en page et de calcul font partie du contenu
+        payload = [report_type, fmt, start_date, end_date, employee_id, department_id, version,
+                   COMPANY_NAME, STANDARD_WORK_HOURS]
+        return hashlib.sha1(json.dumps(payload, default=str).encode('utf-8')).hexdigest()[:16]
+
+    def get_or_build(self, manager, fmt, report_type, start_date, end_date, employee_id=None, department_id=None,
+                     progress_callback=None):
+        """Retourner (chemin, servi_depuis_le_cache) pour le rapport demandé"""
+        key = self.make_key(manager.db, fmt, report_type, start_date, end_date, employee_id, department_id)
+        if key is None:
+            file_path = manager.build_report(fmt, report_type, start_date, end_date, employee_id, department_id,
+                                             progress_callback)
+            return file_path, False
+
+        file_path = manager.report_path(fmt, report_type, start_date, end_date, suffix=f"_{key}")
+        if os.path.exists(file_path):
+            # Marquer le fichier comme récemment servi (ordre d'éviction)
+            os.utime(file_path)
+            with self._lock:
+                self.hits += 1
+            metrics.inc('report_cache_total', result='hit')
+            logger.info("Rapport servi depuis le cache: %s", file_path)
+            return file_path, True
+
+        with self._lock:
+            self.misses += 1
+        metrics.inc('report_cache_total', result='miss')
+        # Écrire dans un fichier temporaire puis le renommer: deux générations
+        # concurrentes de la même clé ne produisent jamais de fichier partiel
+        temp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            manager.build_report(fmt, report_type, start_date, end_date, employee_id, department_id,
+                                 progress_callback, file_path=temp_path)
+            os.replace(temp_path, file_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        self.evict(keep=file_path)
+        return file_path, False
+
+    def evict(self, keep=None):
+        """Supprimer les rapports les plus anciens tant que le dossier dépasse max_bytes"""
+        try:
+            entries = []
+            with os.scandir(self.directory) as scan:
+                for entry in scan:
+                    if entry.is_file() and entry.name.startswith('rapport_') and not entry.name.endswith('.tmp'):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if keep and os.path.abspath(path) == os.path.abspath(keep):
+                    continue
+                os.remove(path)
+                total -= size
+                removed += 1
+
+            if removed:
+                with self._lock:
+                    self.evictions += removed
+                logger.info("%s rapports supprimés du cache (%s octets conservés)", removed, total)
+            return removed
+        except OSError as e:
+            logger.error(f"Erreur lors du nettoyage du cache des rapports: {e}")
+            return 0
+
+    def get_stats(self):
+        """Statistiques du cache (succès, échecs, évictions)"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+                'evictions': self.evictions
+            }
+
+# Instance globale du cache des rapports
+report_cache = ReportCache()
@@ -0,0 +1,171 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from db_manager import db_manager, DatabaseManager
+from report_manager import ReportManager, REPORT_FORMATS, REPORT_LABELS
+from report_cache import report_cache
+from config import REPORT_THREAD_WORKERS, REPORT_PROCESS_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Statuts d'une tâche de rapport (colonne reports.status)
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+class ReportCancelled(Exception):
+    """Levée depuis le callback d'avancement quand la tâche a été annulée"""
+
+class ReportJobQueue:
+    """File de génération de rapports en arrière-plan.
+
+    Les tâches sont enregistrées dans la table reports (statut, avancement,
+    durée) puis exécutées hors du thread appelant: les rapports Excel dans un
+    pool de threads, les rapports PDF (mise en page coûteuse en CPU) dans un
+    pool de processus. L'interface interroge get_job() au lieu d'attendre, et
+    cancel() interrompt une tâche à la prochaine étape d'avancement.
+    """
+
+    def __init__(self, db=None, thread_workers=REPORT_THREAD_WORKERS, process_workers=REPORT_PROCESS_WORKERS):
+        self.db = db or db_manager
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self._lock = threading.Lock()
+        self._threads = None
+        self._processes = None
+        self._futures = {}
+
+    def submit(self, report_type, fmt, start_date, end_date, employee_id=None, department_id=None):
+        """Mettre un rapport en file et retourner l'identifiant de la tâche"""
+        try:
+            if fmt not in REPORT_FORMATS:
+                logger.error(f"Format de rapport non supporté: {fmt}")
+                return None
+            if report_type not in REPORT_LABELS:
+                logger.error(f"Type de rapport non supporté: {report_type}")
+                return None
+
+            job_id = self.db.add_report_job(report_type, fmt, start_date, end_date, employee_id, department_id)
+            if job_id is None:
+                return None
+
+            self._dispatch(job_id, report_type, fmt, start_date, end_date, employee_id, department_id)
+            logger.info("Rapport %s (%s) mis en file: tâche %s", report_type, fmt, job_id)
+            return job_id
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la mise en file du rapport: {e}")
+            return None
+
+    def get_job(self, job_id):
+        """Statut, avancement (%), fichier et durée d'une tâche"""
+        row = self.db.get_report_job(job_id)
+        return dict(row) if row else None
+
+    def get_jobs(self, statuses=None):
+        """Lister les tâches, éventuellement filtrées par statut"""
+        return [dict(row) for row in self.db.get_report_jobs(statuses)]
+
+    def cancel(self, job_id):
+        """Annuler une tâche en file ou en cours"""
+        if not self.db.cancel_report_job(job_id):
+            return False
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            # La tâche n'avait pas commencé: la clore immédiatement
+            self.db.finish_report_job(job_id, JOB_CANCELLED)
+        logger.info("Annulation demandée pour la tâche de rapport %s", job_id)
+        return True
+
+    def resume_pending(self):
+        """Au démarrage: relancer les tâches restées en file et clore celles interrompues"""
+        try:
+            for job in self.db.get_report_jobs([JOB_RUNNING]):
+                self.db.finish_report_job(job['id'], JOB_FAILED, error_message="Interrompu par l'arrêt de l'application")
+            pending = self.db.get_report_jobs([JOB_QUEUED])
+            for job in reversed(pending):
+                self._dispatch(job['id'], job['report_type'], job['format'], job['start_date'], job['end_date'],
+                               job['employee_id'], job['department_id'])
+            if pending:
+                logger.info("%s tâches de rapport relancées", len(pending))
+        except Exception as e:
+            logger.error(f"Erreur lors de la reprise des tâches de rapport: {e}")
+
+    def shutdown(self, wait=False):
+        """Arrêter les pools (les tâches en file restent en base pour le prochain démarrage)"""
+        with self._lock:
+            pools = [pool for pool in (self._threads, self._processes) if pool is not None]
+            self._threads = self._processes = None
+            futures = list(self._futures.values())
+        for future in futures:
+            future.cancel()
+        for pool in pools:
+            pool.shutdown(wait=wait)
+
+    def _dispatch(self, job_id, report_type, fmt, start_date, end_date, employee_id, department_id):
+        """Confier la tâche au pool adapté à son format"""
+        with self._lock:
+            if fmt == 'pdf':
+                if self._processes is None:
+                    self._processes = ProcessPoolExecutor(max_workers=self.process_workers)
+                pool = self._processes
+            else:
+                if self._threads is None:
+                    self._threads = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix='report')
+                pool = self._threads
+            future = pool.submit(_run_report_job, job_id, report_type, fmt, start_date, end_date,
+                                 employee_id, department_id)
+            self._futures[job_id] = future
+        future.add_done_callback(lambda _: self._forget(job_id))
+
+    def _forget(self, job_id):
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+def _run_report_job(job_id, report_type, fmt, start_date, end_date, employee_id=None, department_id=None):
+    """Exécuter une tâche de rapport (thread ou processus) avec ses propres connexions:
+    une en lecture seule pour les données et le suivi de l'annulation, une autre
+    (sans vérification du schéma) pour les seules mises à jour du statut"""
+    db = DatabaseManager(check_schema=False)
+    data_db = DatabaseManager(read_only=True)
+    try:
+        if not db.start_report_job(job_id):
+            if db.get_report_job_status(job_id) == JOB_CANCELLED:
+                # Annulée avant d'avoir démarré
+                db.finish_report_job(job_id, JOB_CANCELLED)
+                return JOB_CANCELLED
+            raise RuntimeError("La tâche n'a pas pu être démarrée")
+
+        total = data_db.count_report_rows(report_type, start_date, end_date, employee_id, department_id)
+        last_progress = [0]
+
+        def on_progress(rows):
+            if data_db.get_report_job_status(job_id) == JOB_CANCELLED:
+                raise ReportCancelled()
+            progress = min(99, rows * 100 // total) if total else 0
+            if progress != last_progress[0]:
+                last_progress[0] = progress
+                db.set_report_job_progress(job_id, progress)
+
+        file_path, _ = report_cache.get_or_build(ReportManager(data_db), fmt, report_type, start_date, end_date,
+                                                 employee_id, department_id, on_progress)
+        db.finish_report_job(job_id, JOB_COMPLETED, file_path=file_path)
+        return JOB_COMPLETED
+
+    except ReportCancelled:
+        db.finish_report_job(job_id, JOB_CANCELLED)
+        logger.info("Tâche de rapport %s annulée", job_id)
+        return JOB_CANCELLED
+    except Exception as e:
+        logger.error(f"Erreur lors de l'exécution de la tâche de rapport {job_id}: {e}")
+        db.finish_report_job(job_id, JOB_FAILED, error_message=str(e))
+        return JOB_FAILED
+    finally:
+        data_db.close()
+        db.close()
+
+# Instance globale de la file de rapports
+report_jobs = ReportJobQueue()
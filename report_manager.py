@@ -1,97 +1,128 @@
 import logging
 import os
 from datetime import datetime
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
+from functools import lru_cache
+from itertools import chain, islice
 from db_manager import db_manager
-from config import REPORTS_DIR, COMPANY_NAME, COMPANY_ADDRESS, COMPANY_PHONE
+from report_cache import report_cache
+from lazy import LazyInstance
+from metrics import metrics
+from config import REPORTS_DIR, COMPANY_NAME, COMPANY_ADDRESS, COMPANY_PHONE, REPORT_FETCH_SIZE, REPORT_WIDTH_SAMPLE_ROWS
 
-# Configuration du logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Colonnes de chaque type de rapport: (clé de la donnée, en-tête)
+REPORT_COLUMNS = {
+    'daily': [
+        ('employee_id', 'Matricule'),
+        ('last_name', 'Nom'),
+        ('first_name', 'Prénom'),
+        ('department_name', 'Département'),
+        ('date', 'Date'),
+        ('time_in', 'Heure Entrée'),
+        ('time_out', 'Heure Sortie'),
+        ('work_hours', 'Heures Travail')
+    ],
+    'monthly': [
+        ('employee_id', 'Matricule'),
+        ('last_name', 'Nom'),
+        ('first_name', 'Prénom'),
+        ('department_name', 'Département'),
+        ('days_present', 'Jours Présents'),
+        ('total_hours', 'Heures Travail'),
+        ('overtime_hours', 'Heures Sup.')
+    ]
+}
+
+# Formats de rapport et extension des fichiers produits
+REPORT_FORMATS = {'excel': 'xlsx', 'pdf': 'pdf'}
+REPORT_LABELS = {'daily': 'quotidien', 'monthly': 'mensuel'}
+
+# Mise en page des tableaux PDF (hauteurs fixes pour paginer sans mesurer chaque ligne)
+PDF_HEADER_FONT_SIZE = 10
+PDF_BODY_FONT_SIZE = 8
+PDF_CELL_PADDING = 3
+PDF_HEADER_HEIGHT = 28
+PDF_ROW_HEIGHT = 16
+
+@lru_cache(maxsize=None)
+def _pdf_table_style():
+    """Style commun à toutes les pages de tableau (construit une seule fois)"""
+    from reportlab.platypus import TableStyle
+    from reportlab.lib import colors
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), PDF_HEADER_FONT_SIZE),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('FONTSIZE', (0, 1), (-1, -1), PDF_BODY_FONT_SIZE),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+class _StreamingStory(list):
+    """Liste de flowables complétée à la demande: doc.build() consomme les
+    éléments en tête de liste et n'appelle le générateur qu'une fois vide"""
+    
+    def __init__(self, flowables, pending):
+        super().__init__(flowables)
+        self._pending = pending
+    
+    def __len__(self):
+        if not super().__len__() and self._pending is not None:
+            flowable = next(self._pending, None)
+            if flowable is None:
+                self._pending = None
+            else:
+                self.append(flowable)
+        return super().__len__()
+
 class ReportManager:
-    def __init__(self):
-        self.db = db_manager
+    def __init__(self, db=None):
+        self.db = db or db_manager
         # Créer le dossier des rapports s'il n'existe pas
-        if not os.path.exists(REPORTS_DIR):
-            os.makedirs(REPORTS_DIR)
+        os.makedirs(REPORTS_DIR, exist_ok=True)
     
-    def generate_excel_report(self, report_type, start_date, end_date, employee_id=None, department_id=None):
-        """Générer un rapport Excel"""
-        try:
-            # Récupérer les données
+    def report_path(self, fmt, report_type, start_date, end_date, suffix=''):
+        """Chemin du fichier d'un rapport dans le dossier des rapports"""
+        if fmt not in REPORT_FORMATS:
+            raise ValueError(f"Format de rapport non supporté: {fmt}")
+        if report_type not in REPORT_LABELS:
+            raise ValueError(f"Type de rapport non supporté: {report_type}")
+        filename = f"rapport_{REPORT_LABELS[report_type]}_{start_date}_{end_date}{suffix}.{REPORT_FORMATS[fmt]}"
+        return os.path.join(REPORTS_DIR, filename)
+    
+    def build_report(self, fmt, report_type, start_date, end_date, employee_id=None, department_id=None,
+                     progress_callback=None, file_path=None):
+        """Produire le fichier d'un rapport ('excel' ou 'pdf') et retourner son chemin.
+        
+        progress_callback reçoit le nombre de lignes écrites; les erreurs, y compris
+        une interruption levée par le callback, sont propagées à l'appelant."""
+        default_path = self.report_path(fmt, report_type, start_date, end_date)
+        file_path = file_path or default_path
+        
+        with metrics.timer('report_seconds', format=fmt, type=report_type):
+            # Récupérer les données (itérateur, lues par lots)
             if report_type == 'daily':
-                data = self._get_daily_data(start_date, end_date, employee_id, department_id)
-                filename = f"rapport_quotidien_{start_date}_{end_date}.xlsx"
-            elif report_type == 'monthly':
-                data = self._get_monthly_data(start_date, end_date, employee_id, department_id)
-                filename = f"rapport_mensuel_{start_date}_{end_date}.xlsx"
+                rows = self.db.iter_daily_attendance_rows(start_date, end_date, employee_id, department_id)
             else:
-                logger.error(f"Type de rapport non supporté: {report_type}")
-                return None
-            
-            file_path = os.path.join(REPORTS_DIR, filename)
-            
-            # Créer le classeur Excel
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "Rapport de Présence"
-            
-            # En-tête du rapport
-            ws.merge_cells('A1:H1')
-            ws['A1'] = f"Rapport de Présence - {COMPANY_NAME}"
-            ws['A1'].font = Font(bold=True, size=16)
-            ws['A1'].alignment = Alignment(horizontal='center')
-            
-            ws.merge_cells('A2:H2')
-            ws['A2'] = f"Période: {start_date} au {end_date}"
-            ws['A2'].alignment = Alignment(horizontal='center')
-            
-            ws.merge_cells('A3:H3')
-            ws['A3'] = f"Généré le: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            ws['A3'].alignment = Alignment(horizontal='center')
-            
-            # En-têtes du tableau
-            headers = ['Matricule', 'Nom', 'Prénom', 'Département', 'Date', 'Heure Entrée', 'Heure Sortie', 'Heures Travail']
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=5, column=col, value=header)
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(start_color="D3D3D3", end_color="D3D3D3", fill_type="solid")
-            
-            # Remplir les données
-            row = 6
-            for record in data:
-                ws.cell(row=row, column=1, value=record['employee_id'])
-                ws.cell(row=row, column=2, value=record['last_name'])
-                ws.cell(row=row, column=3, value=record['first_name'])
-                ws.cell(row=row, column=4, value=record['department_name'])
-                ws.cell(row=row, column=5, value=record['date'])
-                ws.cell(row=row, column=6, value=record['time_in'])
-                ws.cell(row=row, column=7, value=record['time_out'])
-                ws.cell(row=row, column=8, value=record['work_hours'])
-                row += 1
-            
-            # Ajuster la largeur des colonnes
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = (max_length + 2)
-                ws.column_dimensions[column_letter].width = adjusted_width
-            
-            # Sauvegarder le fichier
-            wb.save(file_path)
-            logger.info(f"Rapport Excel généré: {file_path}")
+                rows = self.db.iter_monthly_attendance_rows(start_date, end_date, employee_id, department_id)
+        
+            if fmt == 'excel':
+                count = self._write_excel(file_path, report_type, rows, start_date, end_date, progress_callback)
+                logger.info("Rapport Excel généré: %s (%s lignes)", file_path, count)
+            else:
+                pages = self._write_pdf(file_path, report_type, rows, start_date, end_date, progress_callback)
+                logger.info("Rapport PDF généré: %s (%s pages)", file_path, pages)
+        return file_path
+    
+    def generate_excel_report(self, report_type, start_date, end_date, employee_id=None, department_id=None, progress_callback=None):
+        """Générer un rapport Excel"""
+        try:
+            file_path, _ = report_cache.get_or_build(self, 'excel', report_type, start_date, end_date,
+                                                     employee_id, department_id, progress_callback)
             
             # Enregistrer dans la base de données
             self.db.add_report(report_type, start_date, end_date, file_path)
@@ -102,79 +133,96 @@ class ReportManager:
             logger.error(f"Erreur lors de la génération du rapport Excel: {e}")
             return None
     
-    def generate_pdf_report(self, report_type, start_date, end_date, employee_id=None, department_id=None):
+    def write_report(self, fmt, target, report_type, rows, start_date, end_date, subtitle=None, progress_callback=None):
+        """Écrire des lignes déjà lues dans un rapport (chemin ou objet fichier).
+        
+        Retourne le nombre de lignes (Excel) ou de pages (PDF) écrites."""
+        if fmt == 'excel':
+            return self._write_excel(target, report_type, rows, start_date, end_date, progress_callback, subtitle)
+        if fmt == 'pdf':
+            return self._write_pdf(target, report_type, rows, start_date, end_date, progress_callback, subtitle)
+        raise ValueError(f"Format de rapport non supporté: {fmt}")
+    
+    def _write_excel(self, file_path, report_type, rows, start_date, end_date, progress_callback=None, subtitle=None):
+        """Écrire les lignes d'un rapport dans un classeur en écriture seule (mémoire constante)"""
+        # openpyxl n'est chargé qu'à la première génération Excel
+        import openpyxl
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, Alignment, PatternFill
+        from openpyxl.utils import get_column_letter
+        
+        columns = REPORT_COLUMNS[report_type]
+        keys = [key for key, _ in columns]
+        headers = [header for _, header in columns]
+        last_column = get_column_letter(len(columns))
+        
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet("Rapport de Présence")
+        
+        # Largeur des colonnes estimée sur les en-têtes et les premières lignes:
+        # en écriture seule, elle doit être fixée avant la première ligne
+        rows = iter(rows)
+        sample = [[record[key] for key in keys] for record in islice(rows, REPORT_WIDTH_SAMPLE_ROWS)]
+        widths = [len(header) for header in headers]
+        for values in sample:
+            for index, value in enumerate(values):
+                if value is not None:
+                    widths[index] = max(widths[index], len(str(value)))
+        for index, width in enumerate(widths, 1):
+            ws.column_dimensions[get_column_letter(index)].width = width + 2
+        
+        # Styles partagés par toutes les cellules concernées
+        title_font = Font(bold=True, size=16)
+        header_font = Font(bold=True)
+        header_fill = PatternFill(start_color="D3D3D3", end_color="D3D3D3", fill_type="solid")
+        centered = Alignment(horizontal='center')
+        
+        def styled(value, font=None, fill=None, alignment=None):
+            cell = WriteOnlyCell(ws, value=value)
+            if font:
+                cell.font = font
+            if fill:
+                cell.fill = fill
+            if alignment:
+                cell.alignment = alignment
+            return cell
+        
+        # En-tête du rapport
+        lines = [f"Période: {start_date} au {end_date}", f"Généré le: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"]
+        if subtitle:
+            lines.insert(0, subtitle)
+        ws.append([styled(f"Rapport de Présence - {COMPANY_NAME}", font=title_font, alignment=centered)])
+        for line in lines:
+            ws.append([styled(line, alignment=centered)])
+        ws.append([])
+        for row in range(1, len(lines) + 2):
+            ws.merged_cells.add(f'A{row}:{last_column}{row}')
+        
+        # En-têtes du tableau
+        ws.append([styled(header, font=header_font, fill=header_fill) for header in headers])
+        
+        # Remplir les données au fil de la lecture
+        count = 0
+        for values in sample:
+            ws.append(values)
+            count += 1
+        for record in rows:
+            ws.append([record[key] for key in keys])
+            count += 1
+            if progress_callback and count % REPORT_FETCH_SIZE == 0:
+                progress_callback(count)
+        if progress_callback:
+            progress_callback(count)
+        
+        # Sauvegarder le fichier
+        wb.save(file_path)
+        return count
+    
+    def generate_pdf_report(self, report_type, start_date, end_date, employee_id=None, department_id=None, progress_callback=None):
         """Générer un rapport PDF"""
         try:
-            # Récupérer les données
-            if report_type == 'daily':
-                data = self._get_daily_data(start_date, end_date, employee_id, department_id)
-                filename = f"rapport_quotidien_{start_date}_{end_date}.pdf"
-            elif report_type == 'monthly':
-                data = self._get_monthly_data(start_date, end_date, employee_id, department_id)
-                filename = f"rapport_mensuel_{start_date}_{end_date}.pdf"
-            else:
-                logger.error(f"Type de rapport non supporté: {report_type}")
-                return None
-            
-            file_path = os.path.join(REPORTS_DIR, filename)
-            
-            # Créer le document PDF
-            doc = SimpleDocTemplate(file_path, pagesize=letter)
-            styles = getSampleStyleSheet()
-            story = []
-            
-            # Titre
-            title = Paragraph(f"Rapport de Présence - {COMPANY_NAME}", styles['Title'])
-            story.append(title)
-            story.append(Spacer(1, 12))
-            
-            # Informations de l'entreprise
-            company_info = Paragraph(f"{COMPANY_ADDRESS}<br/>Tél: {COMPANY_PHONE}", styles['Normal'])
-            story.append(company_info)
-            story.append(Spacer(1, 12))
-            
-            # Période du rapport
-            period = Paragraph(f"Période: {start_date} au {end_date}", styles['Normal'])
-            story.append(period)
-            
-            date_generated = Paragraph(f"Généré le: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal'])
-            story.append(date_generated)
-            story.append(Spacer(1, 24))
-            
-            # Tableau des données
-            table_data = [['Matricule', 'Nom', 'Prénom', 'Département', 'Date', 'Entrée', 'Sortie', 'Heures']]
-            
-            for record in data:
-                table_data.append([
-                    record['employee_id'],
-                    record['last_name'],
-                    record['first_name'],
-                    record['department_name'],
-                    record['date'],
-                    record['time_in'],
-                    record['time_out'],
-                    record['work_hours']
-                ])
-            
-            table = Table(table_data)
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            story.append(table)
-            story.append(Spacer(1, 24))
-            
-            # Générer le PDF
-            doc.build(story)
-            logger.info(f"Rapport PDF généré: {file_path}")
+            file_path, _ = report_cache.get_or_build(self, 'pdf', report_type, start_date, end_date,
+                                                     employee_id, department_id, progress_callback)
             
             # Enregistrer dans la base de données
             self.db.add_report(report_type, start_date, end_date, file_path)
@@ -185,89 +233,94 @@ class ReportManager:
             logger.error(f"Erreur lors de la génération du rapport PDF: {e}")
             return None
     
+    def _write_pdf(self, file_path, report_type, rows, start_date, end_date, progress_callback=None, subtitle=None):
+        """Mettre en page un rapport PDF, une page de tableau à la fois.
+        
+        Chaque page reçoit son propre LongTable (en-tête compris) dimensionné pour
+        la remplir: reportlab n'a jamais à découper un grand tableau et seules les
+        lignes de la page en cours sont en mémoire. progress_callback reçoit,
+        à chaque page terminée, le nombre de lignes mises en page."""
+        # reportlab n'est chargé qu'à la première génération PDF
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+        from reportlab.platypus import SimpleDocTemplate, LongTable, Paragraph, Spacer
+        
+        columns = REPORT_COLUMNS[report_type]
+        keys = [key for key, _ in columns]
+        headers = [header for _, header in columns]
+        
+        doc = SimpleDocTemplate(file_path, pagesize=letter)
+        styles = getSampleStyleSheet()
+        
+        # Titre, informations de l'entreprise et période
+        story = [
+            Paragraph(f"Rapport de Présence - {COMPANY_NAME}", styles['Title']),
+            Spacer(1, 12),
+            Paragraph(f"{COMPANY_ADDRESS}<br/>Tél: {COMPANY_PHONE}", styles['Normal']),
+            Spacer(1, 12),
+            *([Paragraph(subtitle, styles['Heading2'])] if subtitle else []),
+            Paragraph(f"Période: {start_date} au {end_date}", styles['Normal']),
+            Paragraph(f"Généré le: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']),
+            Spacer(1, 24)
+        ]
+        
+        # Largeur des colonnes estimée sur les en-têtes et les premières lignes,
+        # réduite proportionnellement si le tableau dépasse la largeur de page
+        rows = iter(rows)
+        sample = [[record[key] for key in keys] for record in islice(rows, REPORT_WIDTH_SAMPLE_ROWS)]
+        widths = [stringWidth(header, 'Helvetica-Bold', PDF_HEADER_FONT_SIZE) for header in headers]
+        for values in sample:
+            for index, value in enumerate(values):
+                if value is not None:
+                    widths[index] = max(widths[index], stringWidth(str(value), 'Helvetica', PDF_BODY_FONT_SIZE))
+        widths = [width + 2 * PDF_CELL_PADDING for width in widths]
+        if sum(widths) > doc.width:
+            ratio = doc.width / sum(widths)
+            widths = [width * ratio for width in widths]
+        
+        # Nombre de lignes par page (hauteurs fixes, marge d'une ligne par sécurité)
+        frame_height = doc.height - 12  # marges internes du cadre (6 pt de chaque côté)
+        title_height = sum(flowable.wrap(doc.width, doc.height)[1] + flowable.getSpaceBefore() + flowable.getSpaceAfter()
+                           for flowable in story)
+        first_page_rows = max(1, int((frame_height - title_height - PDF_HEADER_HEIGHT) // PDF_ROW_HEIGHT) - 1)
+        page_rows = max(1, int((frame_height - PDF_HEADER_HEIGHT) // PDF_ROW_HEIGHT) - 1)
+        
+        pages = []
+        rendered = [0]
+        
+        def tables():
+            data = chain(sample, ([record[key] for key in keys] for record in rows))
+            size = first_page_rows
+            while True:
+                chunk = list(islice(data, size))
+                if not chunk:
+                    return
+                table = LongTable([headers] + chunk, colWidths=widths,
+                                  rowHeights=[PDF_HEADER_HEIGHT] + [PDF_ROW_HEIGHT] * len(chunk), repeatRows=1)
+                table.setStyle(_pdf_table_style())
+                yield table
+                # Reprise après la mise en page du tableau précédent
+                rendered[0] += len(chunk)
+                size = page_rows
+        
+        def on_progress(kind, value):
+            if kind == 'PAGE':
+                pages.append(value)
+                if progress_callback:
+                    progress_callback(rendered[0])
+        
+        doc.setProgressCallBack(on_progress)
+        doc.build(_StreamingStory(story, tables()))
+        return len(pages)
+    
     def _get_daily_data(self, start_date, end_date, employee_id=None, department_id=None):
-        """Récupérer les données pour le rapport quotidien"""
-        try:
-            logs = self.db.get_attendance_logs(start_date, end_date, employee_id, department_id)
-            
-            # Organiser les données par employé et par date
-            employee_data = {}
-            for log in logs:
-                emp_key = f"{log['employee_id']}_{log['date']}"
-                if emp_key not in employee_data:
-                    employee_data[emp_key] = {
-                        'employee_id': log['employee_id'],
-                        'first_name': log['first_name'],
-                        'last_name': log['last_name'],
-                        'department_name': log['department_name'],
-                        'date': log['date'],
-                        'time_in': None,
-                        'time_out': None
-                    }
-                
-                if log['type'] == 'IN':
-                    employee_data[emp_key]['time_in'] = log['time']
-                elif log['type'] == 'OUT':
-                    employee_data[emp_key]['time_out'] = log['time']
-            
-            # Calculer les heures de travail
-            result = []
-            for emp_key, data in employee_data.items():
-                if data['time_in'] and data['time_out']:
-                    # Calculer les heures travaillées
-                    in_time = datetime.strptime(f"{data['date']} {data['time_in']}", '%Y-%m-%d %H:%M:%S')
-                    out_time = datetime.strptime(f"{data['date']} {data['time_out']}", '%Y-%m-%d %H:%M:%S')
-                    work_hours = round((out_time - in_time).total_seconds() / 3600, 2)
-                    
-                    result.append({
-                        'employee_id': data['employee_id'],
-                        'first_name': data['first_name'],
-                        'last_name': data['last_name'],
-                        'department_name': data['department_name'],
-                        'date': data['date'],
-                        'time_in': data['time_in'],
-                        'time_out': data['time_out'],
-                        'work_hours': work_hours
-                    })
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Erreur lors de la récupération des données quotidiennes: {e}")
-            return []
+        """Récupérer les données pour le rapport quotidien (agrégées par la base)"""
+        return self.db.get_daily_attendance_rows(start_date, end_date, employee_id, department_id)
     
     def _get_monthly_data(self, start_date, end_date, employee_id=None, department_id=None):
-        """Récupérer les données pour le rapport mensuel"""
-        try:
-            # Pour le rapport mensuel, on agrège les données par employé
-            logs = self.db.get_attendance_logs(start_date, end_date, employee_id, department_id)
-            
-            employee_stats = {}
-            for log in logs:
-                emp_id = log['employee_id']
-                if emp_id not in employee_stats:
-                    employee_stats[emp_id] = {
-                        'employee_id': log['employee_id'],
-                        'first_name': log['first_name'],
-                        'last_name': log['last_name'],
-                        'department_name': log['department_name'],
-                        'total_days': 0,
-                        'total_hours': 0,
-                        'overtime_hours': 0
-                    }
-                
-                # Compter les jours de présence (au moins une entrée)
-                if log['type'] == 'IN':
-                    employee_stats[emp_id]['total_days'] += 1
-                
-                # Calculer les heures (nécessite une paire IN/OUT complète)
-                # Cette logique serait plus complexe dans une implémentation réelle
-            
-            return list(employee_stats.values())
-            
-        except Exception as e:
-            logger.error(f"Erreur lors de la récupération des données mensuelles: {e}")
-            return []
+        """Récupérer les données pour le rapport mensuel (agrégées par la base)"""
+        return self.db.get_monthly_attendance_rows(start_date, end_date, employee_id, department_id)
 
 # Instance globale du gestionnaire de rapports
-report_manager = ReportManager()
+report_manager = LazyInstance(ReportManager)
@@ -13,12 +13,12 @@ setup(
         "openpyxl==3.1.2",
         "reportlab==4.0.8",
         "Pillow==10.1.0",
-        "schedule==1.2.0",
         "python-dateutil==2.8.2"
     ],
     entry_points={
         'console_scripts': [
             'zkatt=main:main',
+            'zkatt-cli=cli:main',
         ],
     },
     classifiers=[
@@ -0,0 +1,225 @@
+import logging
+import re
+import sqlite3
+import threading
+import time
+from config import SQL_PROFILING_ENABLED, SQL_SLOW_QUERY_MS, SQL_PROGRESS_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Normalisation des requêtes: littéraux remplacés par ?, listes IN (?, ?, ...) réduites
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_sql(sql):
+    """Forme normalisée d'une requête, commune à tous ses paramètres"""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _WHITESPACE.sub(' ', sql).strip()
+    return _IN_LIST.sub('IN (...)', sql)
+
+class SQLProfiler:
+    """Profilage des requêtes SQLite de DatabaseManager (désactivé par défaut).
+
+    Chaque requête passant par un curseur de la connexion est chronométrée de
+    l'exécution à la dernière ligne lue: nombre d'appels, temps total et
+    maximal, lignes retournées et nombre approximatif d'instructions de la
+    machine virtuelle SQLite (gestionnaire de progression). Le callback de
+    trace compte les déclencheurs exécutés. Les requêtes plus lentes que
+    slow_query_ms sont journalisées avec leur plan d'exécution.
+    """
+
+    def __init__(self, enabled=SQL_PROFILING_ENABLED, slow_query_ms=SQL_SLOW_QUERY_MS,
+                 progress_interval=SQL_PROGRESS_INTERVAL):
+        self.enabled = enabled
+        self.slow_query_ms = slow_query_ms
+        self.progress_interval = progress_interval
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._explained = set()
+
+    def attach(self, connection):
+        """Installer les callbacks de trace et de progression sur une connexion"""
+        connection.vm_ticks = 0
+
+        def on_progress():
+            connection.vm_ticks += 1
+            return 0
+
+        connection.set_progress_handler(on_progress, self.progress_interval)
+        connection.set_trace_callback(self._on_trace)
+
+    def _on_trace(self, statement):
+        # Les requêtes des curseurs sont mesurées par ProfiledCursor; seuls les
+        # programmes des déclencheurs ("-- TRIGGER nom") sont comptés ici
+        if statement.startswith('-- TRIGGER'):
+            with self._lock:
+                entry = self._entry(statement[3:])
+                entry['calls'] += 1
+
+    def _entry(self, key):
+        entry = self._stats.get(key)
+        if entry is None:
+            entry = self._stats[key] = {'statement': key, 'calls': 0, 'total_time': 0.0, 'max_time': 0.0,
+                                        'rows': 0, 'vm_steps': 0}
+        return entry
+
+    def record(self, connection, sql, params, elapsed, rows, ticks):
+        """Enregistrer une exécution terminée (appelé par ProfiledCursor)"""
+        key = normalize_sql(sql)
+        with self._lock:
+            entry = self._entry(key)
+            entry['calls'] += 1
+            entry['total_time'] += elapsed
+            entry['rows'] += rows
+            entry['vm_steps'] += ticks * self.progress_interval
+            if elapsed > entry['max_time']:
+                entry['max_time'] = elapsed
+            explain = key not in self._explained
+            if elapsed * 1000 >= self.slow_query_ms:
+                self._explained.add(key)
+            else:
+                return
+
+        message = f"Requête lente ({elapsed * 1000:.1f} ms, {rows} lignes): {key}"
+        if explain:
+            plan = self.explain(connection, sql, params)
+            if plan:
+                message += "\n" + "\n".join(f"    {line}" for line in plan)
+        logger.warning(message)
+
+    @staticmethod
+    def explain(connection, sql, params=()):
+        """Plan d'exécution (EXPLAIN QUERY PLAN) d'une requête, sous forme de lignes"""
+        if not sql.lstrip().upper().startswith(('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')):
+            return []
+        try:
+            # Curseur non profilé: l'explication n'est pas elle-même mesurée
+            cursor = sqlite3.Cursor(connection)
+            cursor.row_factory = None
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params or ())
+            return [detail for _, _, _, detail in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de l'explication de la requête: {e}")
+            return []
+
+    def get_stats(self, order_by='total_time', limit=None):
+        """Statistiques par requête normalisée, triées par ordre décroissant"""
+        with self._lock:
+            stats = [dict(entry) for entry in self._stats.values()]
+        for entry in stats:
+            entry['avg_time'] = entry['total_time'] / entry['calls'] if entry['calls'] else 0.0
+        stats.sort(key=lambda entry: entry[order_by], reverse=True)
+        return stats[:limit] if limit else stats
+
+    def format_report(self, limit=20):
+        """Tableau texte des requêtes les plus coûteuses"""
+        lines = [f"{'appels':>8} {'total ms':>10} {'max ms':>9} {'moy ms':>8} {'lignes':>9}  requête"]
+        for entry in self.get_stats(limit=limit):
+            statement = entry['statement']
+            if len(statement) > 120:
+                statement = statement[:117] + '...'
+            lines.append(f"{entry['calls']:>8} {entry['total_time'] * 1000:>10.1f} {entry['max_time'] * 1000:>9.1f} "
+                         f"{entry['avg_time'] * 1000:>8.2f} {entry['rows']:>9}  {statement}")
+        return "\n".join(lines)
+
+    def reset(self):
+        """Effacer les statistiques collectées"""
+        with self._lock:
+            self._stats.clear()
+            self._explained.clear()
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Curseur qui chronomètre ses requêtes jusqu'à la lecture de la dernière ligne"""
+
+    _sql = None
+
+    def _begin(self, sql, params):
+        self._finish()
+        self._sql = sql
+        self._params = params
+        self._elapsed = 0.0
+        self._rows = 0
+        self._ticks = 0
+
+    def _finish(self):
+        if self._sql is not None:
+            sql_profiler.record(self.connection, self._sql, self._params, self._elapsed, self._rows, self._ticks)
+            self._sql = None
+
+    def _step(self, method, *args):
+        ticks = self.connection.vm_ticks
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self._elapsed += time.perf_counter() - start
+            self._ticks += self.connection.vm_ticks - ticks
+
+    def execute(self, sql, parameters=()):
+        self._begin(sql, parameters)
+        try:
+            self._step(super().execute, sql, parameters)
+        finally:
+            # Pas de résultat à lire (INSERT, UPDATE...) ou erreur: mesure terminée
+            if self.description is None:
+                self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._begin(sql, ())
+        try:
+            self._step(super().executemany, sql, seq_of_parameters)
+        finally:
+            self._finish()
+        return self
+
+    def fetchone(self):
+        row = self._step(super().fetchone)
+        if row is None:
+            self._finish()
+        elif self._sql is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._step(super().fetchmany, size)
+        if self._sql is not None:
+            self._rows += len(rows)
+            if len(rows) < size:
+                self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._step(super().fetchall)
+        if self._sql is not None:
+            self._rows += len(rows)
+            self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._step(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        if self._sql is not None:
+            self._rows += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # Curseur abandonné avant la dernière ligne (fetchone d'un test d'existence)
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+# Instance globale du profileur SQL
+sql_profiler = SQLProfiler()
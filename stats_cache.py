@@ -0,0 +1,178 @@
+import copy
+import logging
+import sys
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from config import STATS_CACHE_MAX_ENTRIES, STATS_CACHE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+def _normalize_id(value):
+    """Les identifiants arrivent en int (base) ou en str (pointeuse, interface)"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+class StatsCache:
+    """Cache LRU des résultats de statistiques de présence.
+
+    Les clés sont (fonction, début, fin, employé, département). L'invalidation
+    ne supprime que les entrées dont la période contient une date modifiée et
+    dont le filtre employé/département est concerné par la modification.
+    """
+
+    def __init__(self, max_entries=STATS_CACHE_MAX_ENTRIES, max_bytes=STATS_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(name, start_date, end_date, employee_id=None, department_id=None):
+        """Construire la clé normalisée d'un résultat"""
+        return (
+            name,
+            str(start_date)[:10] if start_date else None,
+            str(end_date)[:10] if end_date else None,
+            _normalize_id(employee_id) if employee_id else None,
+            _normalize_id(department_id) if department_id else None
+        )
+
+    @property
+    def generation(self):
+        """Compteur incrémenté à chaque invalidation"""
+        return self._generation
+
+    def get(self, key):
+        """Récupérer une copie du résultat en cache, ou None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[0])
+
+    def put(self, key, value, generation=None):
+        """Mettre un résultat en cache
+
+        Si une invalidation a eu lieu depuis `generation` (valeur lue avant le
+        calcul), le résultat est potentiellement périmé et n'est pas conservé.
+        """
+        size = self._estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (copy.deepcopy(value), size)
+            self.current_bytes += size
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def invalidate(self, dates, employee_ids=None, department_ids=None):
+        """Supprimer les entrées touchées par de nouveaux pointages
+
+        dates: dates 'YYYY-MM-DD' modifiées.
+        employee_ids / department_ids: employés et départements concernés
+        (None = inconnus, toutes les entrées de la période sont supprimées).
+        """
+        dates = sorted({str(day)[:10] for day in dates})
+        if not dates:
+            return 0
+        employee_ids = {_normalize_id(emp_id) for emp_id in employee_ids} if employee_ids is not None else None
+        department_ids = {_normalize_id(dept_id) for dept_id in department_ids} if department_ids is not None else None
+
+        with self._lock:
+            self._generation += 1
+            stale_keys = []
+            for key in self._entries:
+                _, start, end, emp_id, dept_id = key
+                # La période de l'entrée contient-elle une date modifiée ?
+                index = bisect_left(dates, start) if start else 0
+                if index == len(dates) or (end and dates[index] > end):
+                    continue
+                if emp_id is not None and employee_ids is not None and emp_id not in employee_ids:
+                    continue
+                if dept_id is not None and department_ids is not None and dept_id not in department_ids:
+                    continue
+                stale_keys.append(key)
+
+            for key in stale_keys:
+                self._remove(key)
+            self.invalidations += len(stale_keys)
+
+        if stale_keys:
+            logger.debug("%s entrées du cache de statistiques invalidées", len(stale_keys))
+        return len(stale_keys)
+
+    def invalidate_employee(self, employee_id, department_ids=None):
+        """Supprimer les entrées dépendant de l'effectif d'un employé, toutes périodes confondues"""
+        employee_id = _normalize_id(employee_id)
+        department_ids = {_normalize_id(dept_id) for dept_id in department_ids} if department_ids is not None else None
+        with self._lock:
+            self._generation += 1
+            stale_keys = [
+                key for key in self._entries
+                if key[3] in (None, employee_id)
+                and (key[4] is None or department_ids is None or key[4] in department_ids)
+            ]
+            for key in stale_keys:
+                self._remove(key)
+            self.invalidations += len(stale_keys)
+        return len(stale_keys)
+
+    def clear(self):
+        """Vider entièrement le cache"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def get_stats(self):
+        """Compteurs du cache pour le dimensionnement"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+    def _remove(self, key):
+        _, size = self._entries.pop(key)
+        self.current_bytes -= size
+
+    @classmethod
+    def _estimate_size(cls, value):
+        """Estimation de l'empreinte mémoire d'un résultat"""
+        size = sys.getsizeof(value)
+        if isinstance(value, dict):
+            for item_key, item_value in value.items():
+                size += cls._estimate_size(item_key) + cls._estimate_size(item_value)
+        elif isinstance(value, (list, tuple, set)):
+            for item in value:
+                size += cls._estimate_size(item)
+        return size
+
+# Instance globale du cache de statistiques
+stats_cache = StatsCache()
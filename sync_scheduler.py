@@ -0,0 +1,295 @@
+import heapq
+import itertools
+import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from config import SCHEDULER_WORKERS, SYNC_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+class IntervalSchedule:
+    """Toutes les `seconds` secondes"""
+
+    def __init__(self, seconds):
+        if seconds <= 0:
+            raise ValueError(f"Intervalle invalide: {seconds}")
+        self.seconds = seconds
+
+    def next_after(self, moment):
+        return moment + timedelta(seconds=self.seconds)
+
+    def __repr__(self):
+        return f"toutes les {self.seconds} s"
+
+class DailySchedule:
+    """Chaque jour à l'heure indiquée ("HH:MM" ou "HH:MM:SS")"""
+
+    def __init__(self, at):
+        parts = [int(part) for part in at.split(':')]
+        self.time = datetime.min.replace(hour=parts[0], minute=parts[1],
+                                         second=parts[2] if len(parts) > 2 else 0).time()
+        self.at = at
+
+    def next_after(self, moment):
+        candidate = datetime.combine(moment.date(), self.time)
+        if candidate <= moment:
+            candidate += timedelta(days=1)
+        return candidate
+
+    def __repr__(self):
+        return f"chaque jour à {self.at}"
+
+class CronSchedule:
+    """Expression cron à cinq champs: minute heure jour mois jour_de_semaine.
+
+    Chaque champ accepte *, des valeurs, des listes (1,15), des plages (8-18) et
+    des pas (*/15, 8-18/2). Jour de semaine: 0 ou 7 = dimanche. Comme cron, si
+    le jour du mois et le jour de semaine sont tous deux restreints, l'un ou
+    l'autre suffit."""
+
+    FIELDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Expression cron invalide (5 champs attendus): {expression}")
+        self.expression = expression
+        parsed = [self._parse_field(field, low, high) for field, (low, high) in zip(fields, self.FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        # 7 = dimanche = 0
+        self.weekdays = {day % 7 for day in weekdays}
+        self.days_restricted = fields[2] != '*'
+        self.weekdays_restricted = fields[4] != '*'
+
+    @staticmethod
+    def _parse_field(field, low, high):
+        values = set()
+        for part in field.split(','):
+            step = 1
+            if '/' in part:
+                part, step_text = part.split('/', 1)
+                step = int(step_text)
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = (int(value) for value in part.split('-', 1))
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"Champ cron invalide: {field}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, day):
+        # weekday(): lundi = 0; cron: dimanche = 0
+        weekday_match = (day.weekday() + 1) % 7 in self.weekdays
+        day_match = day.day in self.days
+        if self.days_restricted and self.weekdays_restricted:
+            return day_match or weekday_match
+        return day_match and weekday_match
+
+    def next_after(self, moment):
+        start = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        hours = sorted(self.hours)
+        minutes = sorted(self.minutes)
+        day = start.date()
+        # Au plus quatre ans: couvre le 29 février
+        for _ in range(366 * 4 + 1):
+            if day.month in self.months and self._day_matches(day):
+                for hour in hours:
+                    if day == start.date() and hour < start.hour:
+                        continue
+                    for minute in minutes:
+                        candidate = datetime(day.year, day.month, day.day, hour, minute)
+                        if candidate >= start:
+                            return candidate
+            day += timedelta(days=1)
+        raise ValueError(f"Expression cron sans occurrence: {self.expression}")
+
+    def __repr__(self):
+        return f"cron '{self.expression}'"
+
+class AnySchedule:
+    """Première échéance parmi plusieurs planifications (une seule tâche, une seule dernière exécution)"""
+
+    def __init__(self, schedules):
+        self.schedules = list(schedules)
+        if not self.schedules:
+            raise ValueError("Aucune planification")
+
+    def next_after(self, moment):
+        return min(schedule.next_after(moment) for schedule in self.schedules)
+
+    def __repr__(self):
+        return ", ".join(repr(schedule) for schedule in self.schedules)
+
+class _Job:
+    def __init__(self, name, schedule, func, args, kwargs, jitter, persist):
+        self.name = name
+        self.schedule = schedule
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.jitter = jitter
+        self.persist = persist
+        # Échéance nominale (sans délai aléatoire), base du calcul de la suivante
+        self.due = None
+        self.next_run = None
+        self.running = False
+        self.cancelled = False
+
+class JobScheduler:
+    """Planificateur à tas: le thread dort jusqu'à la prochaine échéance.
+
+    Les tâches (intervalle, quotidiennes ou cron) s'exécutent dans un petit
+    pool de threads; une tâche encore en cours n'est pas relancée. Un délai
+    aléatoire (jitter) étale les tâches d'une même échéance. Pour les tâches
+    persistées, la dernière exécution est enregistrée en base: au redémarrage,
+    des échéances manquées pendant l'arrêt donnent lieu à une seule exécution
+    de rattrapage.
+    """
+
+    def __init__(self, db=None, workers=SCHEDULER_WORKERS):
+        self.db = db
+        self.workers = workers
+        self._heap = []
+        self._jobs = {}
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._executor = None
+        self._running = False
+        self._last_runs = None
+
+    def add_job(self, name, schedule, func, *args, jitter=0, persist=False, **kwargs):
+        """Planifier func(*args, **kwargs) selon schedule (remplace une tâche du même nom)"""
+        job = _Job(name, schedule, func, args, kwargs, jitter, persist)
+        now = datetime.now()
+        last_run = self._get_last_runs().get(name) if persist else None
+        if last_run and schedule.next_after(last_run) <= now:
+            # Échéance(s) manquée(s) pendant l'arrêt: un seul rattrapage
+            logger.info("Tâche %s: exécution de rattrapage (dernière exécution %s)", name, last_run)
+            job.due = now
+        else:
+            job.due = schedule.next_after(now)
+        job.next_run = job.due + self._jitter(job)
+
+        with self._condition:
+            previous = self._jobs.get(name)
+            if previous:
+                previous.cancelled = True
+            self._jobs[name] = job
+            heapq.heappush(self._heap, (job.next_run, next(self._counter), job))
+            self._condition.notify()
+        logger.info("Tâche %s planifiée (%s), prochaine exécution %s", name, schedule,
+                    job.next_run.replace(microsecond=0))
+        return job
+
+    def remove_job(self, name):
+        """Retirer une tâche planifiée"""
+        with self._condition:
+            job = self._jobs.pop(name, None)
+            if job:
+                job.cancelled = True
+                self._condition.notify()
+        return job is not None
+
+    def get_jobs(self):
+        """Tâches planifiées: [(nom, planification, prochaine exécution, en cours)]"""
+        with self._condition:
+            return sorted((job.name, repr(job.schedule), job.next_run, job.running) for job in self._jobs.values())
+
+    def start(self):
+        """Démarrer le thread du planificateur"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='scheduler-job')
+            self._thread = threading.Thread(target=self._run, name='scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self, wait=True):
+        """Arrêter le planificateur (les tâches en cours se terminent si wait)"""
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify()
+        self._thread.join()
+        self._executor.shutdown(wait=wait)
+
+    def _run(self):
+        with self._condition:
+            while self._running:
+                # Ignorer les entrées de tâches retirées ou replanifiées
+                while self._heap and self._heap[0][2].cancelled:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                next_run, _, job = self._heap[0]
+                delay = (next_run - datetime.now()).total_seconds()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+                if job.running:
+                    logger.warning(f"Tâche {job.name} encore en cours: exécution ignorée")
+                else:
+                    job.running = True
+                    self._executor.submit(self._execute, job)
+                self._reschedule(job, datetime.now())
+                heapq.heappush(self._heap, (job.next_run, next(self._counter), job))
+
+    def _reschedule(self, job, now):
+        # Depuis l'échéance nominale: le délai aléatoire ne s'accumule pas d'une exécution à l'autre
+        due = job.schedule.next_after(job.due)
+        if due <= now:
+            # Échéances dépassées (mise en veille, tâche longue): une seule exécution, dès la suivante
+            due = job.schedule.next_after(now)
+        job.due = due
+        job.next_run = due + self._jitter(job)
+
+    def _execute(self, job):
+        try:
+            job.func(*job.args, **job.kwargs)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'exécution de la tâche {job.name}: {e}")
+        finally:
+            job.running = False
+            if job.persist and self.db is not None:
+                self.db.set_scheduler_run(job.name, datetime.now().isoformat(sep=' ', timespec='seconds'))
+
+    def _get_last_runs(self):
+        if self._last_runs is None:
+            runs = self.db.get_scheduler_runs() if self.db is not None else {}
+            self._last_runs = {name: datetime.fromisoformat(last_run) for name, last_run in runs.items()}
+        return self._last_runs
+
+    @staticmethod
+    def _jitter(job):
+        return timedelta(seconds=random.uniform(0, job.jitter)) if job.jitter else timedelta(0)
+
+def device_schedule(device):
+    """Planification de la synchronisation d'une pointeuse (entrée de ZK_DEVICES).
+
+    Première échéance de ses planifications 'interval', 'daily' et 'cron';
+    toutes les SYNC_INTERVAL secondes si aucune n'est indiquée."""
+    schedules = [(kind, device[kind]) for kind in ('interval', 'daily', 'cron') if device.get(kind)]
+    return make_schedule('any', schedules or [('interval', SYNC_INTERVAL)])
+
+def make_schedule(kind, value):
+    """Construire une planification: 'interval' (secondes), 'daily' ("HH:MM") ou 'cron'"""
+    if kind == 'any':
+        return AnySchedule(make_schedule(*item) for item in value)
+    if kind == 'interval':
+        return IntervalSchedule(value)
+    if kind == 'daily':
+        return DailySchedule(value)
+    if kind == 'cron':
+        return CronSchedule(value)
+    raise ValueError(f"Type de planification inconnu: {kind}")
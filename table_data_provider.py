@@ -0,0 +1,240 @@
+import bisect
+import logging
+import queue
+import threading
+from collections import OrderedDict
+from db_manager import db_manager, DatabaseManager
+from metrics import metrics
+from config import TABLE_PAGE_SIZE, TABLE_CACHE_PAGES, TABLE_PREFETCH_PAGES, TABLE_KEY_INDEX_MIN_PAGES
+
+logger = logging.getLogger(__name__)
+
+# Sources des tableaux: méthodes de DatabaseManager (page, nombre de lignes,
+# clés de toutes les pages) et clé de tri d'une ligne
+TABLE_SOURCES = {
+    'attendance_logs': {
+        'page': 'get_attendance_log_page',
+        'count': 'count_attendance_logs',
+        'page_keys': 'get_attendance_log_page_keys',
+        'key': lambda row: (row['datetime'], row['id'])
+    },
+    'employees': {
+        'page': 'get_employee_page',
+        'count': 'count_employees',
+        'page_keys': None,
+        'key': lambda row: (row['last_name'] or '', row['first_name'] or '', row['id'])
+    }
+}
+
+class TableDataProvider:
+    """Lignes d'un tableau par index, chargées par pages pour un affichage virtualisé.
+
+    Le tableau ne demande que les lignes visibles (get_rows); chaque page est
+    lue par clé (première ligne de la page) quand elle est connue, sinon
+    depuis la clé connue la plus proche, ou depuis la fin si elle est plus
+    proche. Les pages récentes restent en mémoire (LRU) et les pages voisines
+    sont préchargées par un thread disposant de sa propre connexion en
+    lecture seule. Pour les grands tableaux, ce thread calcule aussi la clé
+    de chaque page: un déplacement direct (barre de défilement) ne coûte
+    alors qu'une page.
+
+    on_page_loaded(page) est appelée depuis ce thread quand une page
+    préchargée est disponible (avec Tk, passer par widget.after).
+    """
+
+    def __init__(self, table, db=None, page_size=TABLE_PAGE_SIZE, cache_pages=TABLE_CACHE_PAGES,
+                 prefetch_pages=TABLE_PREFETCH_PAGES, on_page_loaded=None, **filters):
+        if table not in TABLE_SOURCES:
+            raise ValueError(f"Tableau inconnu: {table}")
+        self.table = table
+        self.source = TABLE_SOURCES[table]
+        self.db = db or db_manager
+        self.page_size = page_size
+        self.cache_pages = cache_pages
+        self.prefetch_pages = prefetch_pages
+        self.on_page_loaded = on_page_loaded
+        self.filters = filters
+        self._lock = threading.RLock()
+        self._queue = queue.Queue()
+        self._queued = set()
+        self._worker = None
+        self._generation = 0
+        self._reset()
+
+    def _reset(self):
+        self._pages = OrderedDict()
+        # Clé de la première ligne de chaque page connue (page 0: début du tableau)
+        self._page_keys = {0: None}
+        self._known_pages = [0]
+        self._count = None
+        self._queued.clear()
+        # Les résultats du thread obtenus avant un refresh() sont ignorés
+        self._generation += 1
+
+    def __len__(self):
+        return self.row_count()
+
+    def row_count(self):
+        """Nombre total de lignes (une requête COUNT, puis mis en cache jusqu'au refresh)"""
+        with self._lock:
+            if self._count is None:
+                self._count = getattr(self.db, self.source['count'])(**self.filters)
+                if self.source['page_keys'] and self.page_count() >= TABLE_KEY_INDEX_MIN_PAGES:
+                    self._schedule('keys')
+            return self._count
+
+    def page_count(self):
+        return -(-self.row_count() // self.page_size)
+
+    def get_row(self, index):
+        """Ligne à l'index donné (None hors du tableau)"""
+        rows = self.get_page(index // self.page_size) if index >= 0 else []
+        offset = index % self.page_size
+        return rows[offset] if offset < len(rows) else None
+
+    def get_rows(self, first, last):
+        """Lignes d'index first (inclus) à last (exclu), par exemple les lignes visibles"""
+        first = max(first, 0)
+        last = min(last, self.row_count())
+        rows = []
+        for page in range(first // self.page_size, -(-last // self.page_size)):
+            page_start = page * self.page_size
+            rows.extend(self.get_page(page)[max(first - page_start, 0):last - page_start])
+        return rows
+
+    def get_page(self, page):
+        """Lignes de la page (liste vide hors du tableau); précharge les pages voisines"""
+        with self._lock:
+            rows = self._pages.get(page)
+            if rows is not None:
+                self._pages.move_to_end(page)
+                metrics.inc('table_page_total', table=self.table, result='hit')
+            else:
+                metrics.inc('table_page_total', table=self.table, result='miss')
+                rows = self._load_page(self.db, page)
+                self._store(page, rows)
+            for distance in range(1, self.prefetch_pages + 1):
+                for neighbour in (page + distance, page - distance):
+                    if 0 <= neighbour < self.page_count() and neighbour not in self._pages:
+                        self._schedule(neighbour)
+            return rows
+
+    def refresh(self):
+        """Oublier les pages et le nombre de lignes (après une synchronisation, un filtre...)"""
+        with self._lock:
+            self._reset()
+
+    def close(self):
+        """Arrêter le thread de préchargement"""
+        with self._lock:
+            worker = self._worker
+            self._worker = None
+        if worker:
+            self._queue.put(None)
+            worker.join()
+
+    def _load_page(self, db, page):
+        fetch = getattr(db, self.source['page'])
+        key = self.source['key']
+        with self._lock:
+            # Le thread de préchargement n'utilise pas la connexion principale
+            count = self.row_count() if db is self.db else self._count
+            if count is None:
+                return []
+            generation = self._generation
+            start = self._known_pages[bisect.bisect_right(self._known_pages, page) - 1]
+            from_key = self._page_keys[start]
+            offset = (page - start) * self.page_size
+        if page * self.page_size >= count:
+            return []
+
+        rows_after = count - (page + 1) * self.page_size
+        if 0 <= rows_after < offset:
+            # Plus près de la fin: lecture en sens inverse depuis la dernière ligne
+            rows = fetch(min(self.page_size, count - page * self.page_size), rows_after, reverse=True,
+                         **self.filters)[::-1]
+            following = None
+        else:
+            # Une ligne de plus: clé de la page suivante
+            rows = fetch(self.page_size + 1, offset, from_key=from_key, **self.filters)
+            following = key(rows[self.page_size]) if len(rows) > self.page_size else None
+            rows = rows[:self.page_size]
+
+        with self._lock:
+            if generation != self._generation:
+                return rows
+            if rows:
+                self._add_page_key(page, key(rows[0]))
+            if following:
+                self._add_page_key(page + 1, following)
+        return rows
+
+    def _add_page_key(self, page, key):
+        if page not in self._page_keys:
+            bisect.insort(self._known_pages, page)
+        self._page_keys[page] = key
+
+    def _store(self, page, rows):
+        self._pages[page] = rows
+        self._pages.move_to_end(page)
+        while len(self._pages) > self.cache_pages:
+            self._pages.popitem(last=False)
+
+    def _schedule(self, task):
+        if task in self._queued:
+            return
+        self._queued.add(task)
+        self._queue.put((self._generation, task))
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name=f'table-{self.table}', daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        reader = DatabaseManager(read_only=True)
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                generation, task = item
+                with self._lock:
+                    self._queued.discard(task)
+                    if generation != self._generation or task in self._pages:
+                        continue
+                try:
+                    if task == 'keys':
+                        self._load_page_keys(reader, generation)
+                    else:
+                        self._prefetch(reader, task, generation)
+                except Exception as e:
+                    logger.error(f"Erreur lors du préchargement du tableau {self.table}: {e}")
+        finally:
+            reader.close()
+
+    def _prefetch(self, reader, page, generation):
+        rows = self._load_page(reader, page)
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._store(page, rows)
+        metrics.inc('table_page_total', table=self.table, result='prefetch')
+        if self.on_page_loaded:
+            self.on_page_loaded(page)
+
+    def _load_page_keys(self, reader, generation):
+        keys = getattr(reader, self.source['page_keys'])(self.page_size, **self.filters)
+        with self._lock:
+            if generation != self._generation or not keys:
+                return
+            self._page_keys.update(enumerate(keys))
+            self._known_pages = sorted(self._page_keys)
+        logger.debug("Tableau %s: clés de %s pages calculées", self.table, len(keys))
+
+def attendance_logs_provider(start_date=None, end_date=None, employee_id=None, department_id=None, **options):
+    """Fournisseur de l'onglet des pointages (mêmes filtres que get_attendance_logs)"""
+    return TableDataProvider('attendance_logs', start_date=start_date, end_date=end_date,
+                             employee_id=employee_id, department_id=department_id, **options)
+
+def employees_provider(department_id=None, status=None, **options):
+    """Fournisseur de l'onglet des employés (mêmes filtres que get_employees)"""
+    return TableDataProvider('employees', department_id=department_id, status=status, **options)
@@ -0,0 +1,20 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Modules de l'application à la racine du dépôt; la base de la configuration
+# (instances globales) est une base temporaire, jamais attendance.db
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['ZKATT_DB_PATH'] = os.path.join(tempfile.mkdtemp(prefix='zkatt-tests-'), 'attendance.db')
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """DatabaseManager sur une base vide propre au test"""
+    import db_manager
+
+    monkeypatch.setattr(db_manager, 'DB_PATH', str(tmp_path / 'attendance.db'))
+    manager = db_manager.DatabaseManager()
+    yield manager
+    manager.close()
@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from alert_rules import AttendanceRulesEngine
+
+# Lundi, après l'échéance ALERT_NO_IN_DEADLINE (10:00)
+NOW = datetime(2025, 1, 6, 10, 5)
+
+def _missing_in(db):
+    return db.connection.execute("SELECT COUNT(*) FROM alerts WHERE alert_type = 'missing_in'").fetchone()[0]
+
+def test_missing_in_waits_for_a_sync_after_the_deadline(db):
+    db.add_employee('E1', 'Alice', 'Martin')
+    engine = AttendanceRulesEngine(db=db, clock=lambda: NOW)
+
+    # Aucune synchronisation: aucun pointage ne peut être arrivé
+    engine.check_deadlines(NOW)
+    # Synchronisation antérieure à l'échéance (sync_time en UTC)
+    db.connection.execute(
+        "INSERT INTO sync_logs (sync_type, records_count, status, sync_time) "
+        "VALUES ('attendance', 0, 'success', DATETIME('2025-01-06 09:30:00', 'utc'))")
+    db.connection.commit()
+    engine.check_deadlines(NOW)
+    assert _missing_in(db) == 0
+
+    db.add_sync_log('attendance', 0, 'success')
+    assert engine.check_deadlines(NOW) == 1
+    assert _missing_in(db) == 1
+
+def test_missing_in_skips_employees_with_an_in(db):
+    employee_id = db.add_employee('E1', 'Alice', 'Martin')
+    db.add_employee('E2', 'Bruno', 'Petit')
+    engine = AttendanceRulesEngine(db=db, clock=lambda: NOW)
+    engine.on_punch(employee_id, 'IN', datetime(2025, 1, 6, 8, 55))
+    db.add_sync_log('attendance', 1, 'success')
+    assert engine.check_deadlines(NOW) == 1
+
+def _late_arrivals(db):
+    return [row[0] for row in db.connection.execute(
+        "SELECT alert_date FROM alerts WHERE alert_type = 'late_arrival' ORDER BY alert_date")]
+
+def test_late_arrival_only_on_working_days(db):
+    employee_id = db.add_employee('E1', 'Alice', 'Martin')
+    for now in (datetime(2025, 1, 11, 11, 0), datetime(2025, 1, 12, 11, 0), datetime(2025, 1, 13, 11, 0)):
+        engine = AttendanceRulesEngine(db=db, clock=lambda: now)
+        engine.on_punch(employee_id, 'IN', now.replace(hour=10))
+    # Samedi et dimanche ignorés, lundi en retard
+    assert _late_arrivals(db) == ['2025-01-13']
@@ -0,0 +1,40 @@
+import asyncio
+
+from api_server import ApiServer, ReaderPool, _stats
+
+def test_stats_reflect_writes_from_another_connection(db):
+    employee_id = db.add_employee('E1', 'Alice', 'Martin')
+    params = {'start': '2025-01-06', 'end': '2025-01-10'}
+    pool = ReaderPool(size=1)
+    try:
+        assert pool.run(_stats, params)['absent_days'] == 5
+        # Synchronisation faite par un autre processus (autre connexion)
+        db.add_attendance_log(employee_id, '2025-01-06 08:00:00', 'IN')
+        assert pool.run(_stats, params)['absent_days'] == 4
+    finally:
+        pool.close()
+
+def _request(server, payload):
+    async def exchange():
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            writer.write(payload)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return response
+        finally:
+            server.close()
+    return asyncio.run(exchange())
+
+def test_oversized_header_line_is_rejected(db):
+    server = ApiServer(host='127.0.0.1', port=0, pool_size=1)
+    response = _request(server, b"GET /api/health HTTP/1.1\r\nX-Long: " + b"a" * 100000 + b"\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 400 ")
+    assert b"Connection: close" in response
+
+def test_health_over_http(db):
+    server = ApiServer(host='127.0.0.1', port=0, pool_size=1)
+    response = _request(server, b"GET /api/health HTTP/1.1\r\nConnection: close\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 200 ")
@@ -0,0 +1,24 @@
+from attendance_manager import AttendanceManager
+from stats_cache import StatsCache
+
+def _add_day(db, employee_id, day):
+    db.add_attendance_log(employee_id, f"{day} 08:30:00", 'IN')
+    db.add_attendance_log(employee_id, f"{day} 17:00:00", 'OUT')
+
+def test_absent_employees_have_no_presence_in_the_period(db):
+    always = db.add_employee('E1', 'Alice', 'Martin')
+    sometimes = db.add_employee('E2', 'Bob', 'Durand')
+    db.add_employee('E3', 'Chloé', 'Petit')
+    for day in ('2025-01-06', '2025-01-07', '2025-01-08', '2025-01-09', '2025-01-10'):
+        _add_day(db, always, day)
+    for day in ('2025-01-06', '2025-01-07'):
+        _add_day(db, sometimes, day)
+
+    stats = AttendanceManager(db, cache=StatsCache()).calculate_attendance_stats('2025-01-06', '2025-01-10')
+    assert stats['total_employees'] == 3
+    assert stats['present_employees'] == 2
+    assert stats['absent_employees'] == 1
+    assert stats['present_employees'] + stats['absent_employees'] == stats['total_employees']
+    assert stats['employees_with_absences'] == 2
+    assert stats['working_days'] == 5
+    assert stats['absent_days'] == 3 + 5
@@ -0,0 +1,94 @@
+import pytest
+
+from change_feed import ChangeFeed
+
+def _age_events(db, days):
+    db.connection.execute("UPDATE change_feed SET created_at = DATETIME('now', ?)", (f"-{days} days",))
+    db.connection.commit()
+
+def test_changes_are_recorded_without_any_consumer(db):
+    feed = ChangeFeed(db)
+    employee_id = db.add_employee('E1', 'Alice', 'Martin')
+    db.add_attendance_log(employee_id, '2025-01-06 08:00:00', 'IN')
+    db.connection.execute("UPDATE employees SET status = 'inactive' WHERE id = ?", (employee_id,))
+    db.connection.commit()
+
+    # Inscrit ensuite depuis le début: l'historique est transmis
+    assert feed.register('paie', from_start=True)
+    events = feed.fetch('paie')
+    assert [(event['entity'], event['operation']) for event in events] == [
+        ('employees', 'insert'), ('attendance_logs', 'insert'), ('employees', 'update')]
+    assert events[1]['payload'] == {'id': 1, 'employee_id': employee_id, 'datetime': '2025-01-06 08:00:00',
+                                    'type': 'IN'}
+    assert events[2]['payload']['status'] == 'inactive'
+
+    # Inscrit sans from_start: seules les modifications suivantes
+    assert feed.register('export')
+    assert not feed.register('export')
+    assert feed.fetch('export') == []
+    db.add_employee('E2', 'Bob', 'Durand')
+    assert [event['operation'] for event in feed.fetch('export')] == ['insert']
+
+def test_ack_moves_forward_only_up_to_the_last_event(db):
+    feed = ChangeFeed(db)
+    feed.register('paie')
+    for number in range(3):
+        db.add_employee(f'E{number}', 'Prénom', 'Nom')
+    events = feed.fetch('paie', limit=2)
+    assert len(events) == 2
+    assert feed.ack('paie', events[-1]['id'])
+    assert [event['id'] for event in feed.fetch('paie')] == [events[-1]['id'] + 1]
+
+    # Ni recul, ni acquittement d'événements futurs
+    feed.ack('paie', 0)
+    assert feed.status()[0]['position'] == events[-1]['id']
+    feed.ack('paie', 10 ** 9)
+    assert feed.status()[0]['position'] == events[-1]['id'] + 1
+    assert feed.status()[0]['pending'] == 0
+    with pytest.raises(KeyError):
+        feed.fetch('inconnu')
+
+def test_consume_acks_each_batch_after_its_handler(db):
+    feed = ChangeFeed(db)
+    feed.register('paie')
+    for number in range(5):
+        db.add_employee(f'E{number}', 'Prénom', 'Nom')
+
+    def failing(events):
+        raise RuntimeError("paie indisponible")
+
+    with pytest.raises(RuntimeError):
+        feed.consume('paie', failing, limit=2)
+    assert feed.status()[0]['pending'] == 5
+
+    batches = []
+    assert feed.consume('paie', batches.append, limit=2) == 5
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert feed.status()[0]['pending'] == 0
+
+def test_compact_removes_events_acked_by_every_consumer(db):
+    feed = ChangeFeed(db)
+    feed.register('paie')
+    feed.register('export')
+    for number in range(4):
+        db.add_employee(f'E{number}', 'Prénom', 'Nom')
+    events = feed.fetch('paie')
+    feed.ack('paie', events[-1]['id'])
+    feed.ack('export', events[1]['id'])
+
+    # Quel que soit leur âge: seuls les événements acquittés par tous
+    assert feed.compact() == 2
+    assert [event['id'] for event in feed.fetch('export')] == [event['id'] for event in events[2:]]
+    assert feed.compact() == 0
+    feed.ack('export', events[-1]['id'])
+    assert feed.compact() == 2
+
+def test_compact_without_consumer_keeps_the_retention_window(db):
+    feed = ChangeFeed(db)
+    db.add_employee('E1', 'Alice', 'Martin')
+    assert feed.compact(retention_days=7) == 0
+    _age_events(db, 8)
+    db.add_employee('E2', 'Bob', 'Durand')
+    assert feed.compact(retention_days=7) == 1
+    feed.register('paie', from_start=True)
+    assert [event['payload']['employee_id'] for event in feed.fetch('paie')] == ['E2']
@@ -0,0 +1,23 @@
+import pytest
+
+import cli
+
+@pytest.mark.parametrize('argv', [
+    ['--json', 'stats', '--start', '2025-01-01', '--end', '2025-01-31'],
+    ['stats', '--start', '2025-01-01', '--end', '2025-01-31', '--json'],
+])
+def test_common_options_before_or_after_the_command(argv):
+    args = cli.build_parser().parse_args(argv)
+    assert args.json and not args.verbose and not args.profile_sql
+
+def test_common_options_on_nested_commands():
+    args = cli.build_parser().parse_args(['-v', 'feed', 'status', '--json'])
+    assert args.json and args.verbose and args.action == 'status'
+    args = cli.build_parser().parse_args(['feed', 'status'])
+    assert not args.json and not args.verbose
+
+def test_summary_of_an_unknown_employee_fails(capsys):
+    args = cli.build_parser().parse_args(['summary', '--employee', '999999', '--start', '2025-01-01',
+                                          '--end', '2025-01-31'])
+    assert cli.cmd_summary(args) == cli.EXIT_ERROR
+    assert "Employé inconnu: 999999" in capsys.readouterr().err
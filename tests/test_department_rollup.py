@@ -0,0 +1,44 @@
+import db_manager
+
+def _rollup(db):
+    return [dict(row) for row in db.connection.execute(
+        "SELECT department_id, day, present_count, late_count, total_hours, overtime_hours "
+        "FROM department_daily_rollup ORDER BY department_id, day")]
+
+def _add_day(db, employee_id, day, first_in, last_out):
+    db.add_attendance_log(employee_id, f"{day} {first_in}", 'IN')
+    db.add_attendance_log(employee_id, f"{day} {last_out}", 'OUT')
+
+def test_refresh_of_touched_days_matches_a_full_rebuild(db):
+    sales = db.add_department('Ventes')
+    alice = db.add_employee('E1', 'Alice', 'Martin', department_id=sales)
+    bob = db.add_employee('E2', 'Bob', 'Durand')
+    for day in ('2025-01-06', '2025-01-07', '2025-01-08', '2025-01-20'):
+        _add_day(db, alice, day, '08:55:00', '18:30:00')
+        _add_day(db, bob, day, '09:20:00', '17:00:00')
+    db.refresh_department_rollup(start_date='2025-01-01', end_date='2025-01-31')
+    expected = _rollup(db)
+
+    # Jours touchés non contigus: les jours entre les deux ne sont pas modifiés
+    db.connection.execute("UPDATE department_daily_rollup SET present_count = 99 WHERE day = '2025-01-07'")
+    db.connection.execute("DELETE FROM department_daily_rollup WHERE day IN ('2025-01-06', '2025-01-20')")
+    db.connection.commit()
+    assert db.refresh_department_rollup(['2025-01-06 08:55:00', '2025-01-20'])
+    rows = _rollup(db)
+    assert [row for row in rows if row['day'] != '2025-01-07'] == [
+        row for row in expected if row['day'] != '2025-01-07']
+    assert {row['present_count'] for row in rows if row['day'] == '2025-01-07'} == {99}
+
+def test_rollup_is_rebuilt_when_thresholds_change(db, monkeypatch):
+    employee = db.add_employee('E1', 'Alice', 'Martin')
+    _add_day(db, employee, '2025-01-06', '09:20:00', '18:20:00')
+    db.refresh_department_rollup(['2025-01-06'])
+    assert [(row['late_count'], row['overtime_hours']) for row in _rollup(db)] == [(1, 1.0)]
+
+    monkeypatch.setattr(db_manager, 'WORK_START_TIME', '09:30:00')
+    monkeypatch.setattr(db_manager, 'STANDARD_WORK_HOURS', 7)
+    reopened = db_manager.DatabaseManager()
+    try:
+        assert [(row['late_count'], row['overtime_hours']) for row in _rollup(reopened)] == [(0, 2.0)]
+    finally:
+        reopened.close()
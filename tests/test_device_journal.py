@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from attendance_manager import AttendanceManager
+from device_journal import DeviceJournal, read_frames, replay_journals
+from punch_filter import PunchDebouncer, convert_attendance_data
+
+def _punch(user_id, timestamp, status=0):
+    return SimpleNamespace(uid=int(user_id), user_id=user_id, timestamp=timestamp, status=status, punch=0)
+
+def _rows(db):
+    return [tuple(row) for row in db.connection.execute(
+        "SELECT employee_id, datetime, type FROM attendance_logs ORDER BY employee_id, datetime, type")]
+
+def _live_sync_with_journal(db, journal, days):
+    """Simuler la synchronisation: deux lectures par jour de tout l'historique de la pointeuse"""
+    attendance = AttendanceManager(db)
+    history = []
+    for day in range(days):
+        start = datetime(2025, 1, 6) + timedelta(days=day)
+        morning = [_punch('1', start.replace(hour=8)),
+                   # Doigt reposé sur le lecteur: supprimé par le filtre
+                   _punch('1', start.replace(hour=8, second=20)),
+                   _punch('2', start.replace(hour=8, minute=30), status=15)]
+        evening = [_punch('1', start.replace(hour=17), status=1),
+                   _punch('2', start.replace(hour=17, minute=30), status=1)]
+        for punches, pulled_at in ((morning, start.replace(hour=12)), (evening, start.replace(hour=18))):
+            history.extend(punches)
+            journal.record_attendance('principale', history, pulled_at=pulled_at.timestamp())
+            attendance.sync_attendance_data(convert_attendance_data(history), PunchDebouncer())
+
+def test_replay_rebuilds_live_sync(tmp_path, db):
+    journal = DeviceJournal(str(tmp_path / 'journal'))
+    _live_sync_with_journal(db, journal, days=3)
+    live = _rows(db)
+    assert len(live) == 12
+    assert not any(timestamp.endswith('08:00:20') for _, timestamp, _ in live)
+
+    files = journal.list_files()
+    assert [day for _, day, _ in files] == ['2025-01-06', '2025-01-07', '2025-01-08']
+    # Chaque jour: une trame complète puis une trame « suite »
+    frames = read_frames(files[1][2])
+    assert [skipped for _, _, skipped, _ in frames] == [0, 8]
+
+    db.connection.execute("DELETE FROM attendance_logs")
+    db.connection.commit()
+    result = replay_journals(journal=journal, db=db, workers=1)
+    assert _rows(db) == live
+    assert result['ingested'] == len(live)
+
+def test_replay_is_idempotent(tmp_path, db):
+    journal = DeviceJournal(str(tmp_path / 'journal'))
+    _live_sync_with_journal(db, journal, days=2)
+    live = _rows(db)
+    assert replay_journals(journal=journal, db=db, workers=1)['ingested'] == 0
+    assert _rows(db) == live
+
+def test_truncated_frame_is_repaired_before_append(tmp_path):
+    journal = DeviceJournal(str(tmp_path / 'journal'))
+    pulled_at = datetime(2025, 1, 6, 12).timestamp()
+    history = [_punch('1', datetime(2025, 1, 6, 8))]
+    journal.record_attendance('principale', history, pulled_at=pulled_at)
+    path = journal.path_for('principale', '2025-01-06')
+    with open(path, 'r+b') as f:
+        f.truncate(f.seek(0, 2) - 3)
+
+    # Nouveau processus: la fin du fichier est vérifiée avant le premier ajout
+    journal = DeviceJournal(str(tmp_path / 'journal'))
+    history.append(_punch('1', datetime(2025, 1, 6, 17), status=1))
+    journal.record_attendance('principale', history, pulled_at=pulled_at + 3600)
+    frames = read_frames(path)
+    assert len(frames) == 1
+    assert [record[2] for record in frames[0][3]] == ['2025-01-06T08:00:00', '2025-01-06T17:00:00']
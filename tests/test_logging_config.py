@@ -0,0 +1,27 @@
+import logging
+
+from logging_config import AppFormatter, RateLimitFilter
+
+def _record(message, *args, level=logging.INFO):
+    return logging.LogRecord('sync', level, __file__, 1, message, args, None)
+
+def test_repeated_messages_are_counted_not_rewritten():
+    rate_filter = RateLimitFilter(limit=2, interval=60)
+    passed = [rate_filter.filter(_record("Pointage de %s", n)) for n in range(5)]
+    assert passed == [True, True, False, False, False]
+
+    # Fenêtre suivante: le premier message porte le nombre de messages ignorés
+    for window in rate_filter._windows.values():
+        window[0] -= 60
+    record = _record("Pointage de %s", 'E1')
+    assert rate_filter.filter(record)
+    assert record.msg == "Pointage de %s"
+    assert record.suppressed == 3
+    assert AppFormatter('%(levelname)s %(message)s').format(record) == (
+        "INFO Pointage de E1 (3 messages similaires ignorés)")
+    assert AppFormatter('%(message)s').format(_record("Pointage")) == "Pointage"
+
+def test_warnings_and_errors_are_never_suppressed():
+    rate_filter = RateLimitFilter(limit=1, interval=60)
+    assert all(rate_filter.filter(_record("Pointeuse injoignable", level=logging.WARNING)) for _ in range(5))
+    assert all(rate_filter.filter(_record("Erreur de synchronisation", level=logging.ERROR)) for _ in range(5))
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from occupancy import OccupancyIndex
+
+def test_index_is_emptied_after_midnight_without_new_punch():
+    now = [datetime(2025, 1, 6, 17, 0)]
+    index = OccupancyIndex(clock=lambda: now[0])
+    index.apply_punch(1, 10, 'IN', '2025-01-06 08:00:00')
+    index.apply_punch(2, 20, 'IN', '2025-01-06 08:30:00')
+    index.apply_punch(2, 20, 'OUT', '2025-01-06 16:30:00')
+    assert index.is_present(1) and not index.is_present(2)
+    assert index.headcount() == 1
+    assert index.headcount_by_department() == {10: 1}
+
+    # Oubli de pointer la sortie: le lendemain, personne n'est présent
+    now[0] = datetime(2025, 1, 7, 7, 0)
+    assert not index.is_present(1)
+    assert index.headcount() == 0
+    assert index.headcount(10) == 0
+    assert index.get_last_punch(1) is None
+    assert index.day == '2025-01-07'
+
+    # Les pointages de la veille arrivés en retard sont ignorés
+    index.apply_punch(1, 10, 'IN', '2025-01-06 18:00:00')
+    index.apply_punch(2, 20, 'IN', '2025-01-07 07:00:00')
+    assert index.headcount_by_department() == {20: 1}
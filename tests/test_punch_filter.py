@@ -0,0 +1,55 @@
+import logging
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from attendance_manager import AttendanceManager
+from punch_filter import PunchDebouncer
+from stats_cache import StatsCache
+
+START = datetime(2025, 1, 6, 8, 0)
+
+def _punch(user_id, seconds, status='IN'):
+    return SimpleNamespace(user_id=user_id, timestamp=START + timedelta(seconds=seconds), status=status)
+
+def _kept(debouncer, punches):
+    return [(punch.user_id, int((punch.timestamp - START).total_seconds())) for punch in debouncer.filter(punches)]
+
+def test_punches_within_the_window_are_merged():
+    debouncer = PunchDebouncer(window_seconds=60)
+    punches = [_punch(1, 0), _punch(1, 5), _punch(1, 30, 'OUT'), _punch(2, 10), _punch(1, 200, 'OUT')]
+    assert _kept(debouncer, punches) == [(1, 0), (2, 10), (1, 200)]
+    assert (debouncer.received_count, debouncer.suppressed_count) == (5, 2)
+
+def test_window_boundary():
+    debouncer = PunchDebouncer(window_seconds=60)
+    # Exactement à la fin de la fenêtre: fusionné; juste après: conservé
+    assert _kept(debouncer, [_punch(1, 0), _punch(1, 60)]) == [(1, 0)]
+    assert _kept(debouncer, [_punch(1, 61)]) == [(1, 61)]
+    # La référence est le dernier pointage conservé, pas le dernier reçu
+    debouncer = PunchDebouncer(window_seconds=60)
+    assert _kept(debouncer, [_punch(1, 0), _punch(1, 50), _punch(1, 100)]) == [(1, 0), (1, 100)]
+
+def test_out_of_order_punches_do_not_move_the_reference():
+    debouncer = PunchDebouncer(window_seconds=60)
+    assert _kept(debouncer, [_punch(1, 300), _punch(1, 0), _punch(1, 330)]) == [(1, 300), (1, 0)]
+
+def test_state_is_carried_across_calls(caplog):
+    debouncer = PunchDebouncer(window_seconds=60)
+    with caplog.at_level(logging.INFO, logger='punch_filter'):
+        assert _kept(debouncer, [_punch(1, 0), _punch(1, 10)]) == [(1, 0)]
+        assert _kept(debouncer, [_punch(1, 20), _punch(1, 30), _punch(1, 90)]) == [(1, 90)]
+    assert (debouncer.received_count, debouncer.suppressed_count) == (5, 3)
+    # Chaque appel journalise ses propres compteurs
+    assert [record.getMessage() for record in caplog.records] == [
+        "1 pointages répétés ignorés sur 2", "2 pointages répétés ignorés sur 3"]
+
+def test_sync_logs_the_duplicates_of_each_call(db, caplog):
+    db.add_employee('E1', 'Alice', 'Martin')
+    manager = AttendanceManager(db, cache=StatsCache())
+    debouncer = PunchDebouncer(window_seconds=60)
+    with caplog.at_level(logging.INFO, logger='attendance_manager'):
+        assert manager.sync_attendance_data([_punch(1, 0), _punch(1, 10), _punch(1, 20)], debouncer) == 1
+        assert manager.sync_attendance_data([_punch(1, 500, 'OUT')], debouncer) == 1
+    assert [record.getMessage() for record in caplog.records if 'doublons' in record.getMessage()] == [
+        "1 nouveaux logs de présence synchronisés, 2 doublons ignorés",
+        "1 nouveaux logs de présence synchronisés, 0 doublons ignorés"]
@@ -0,0 +1,37 @@
+import pytest
+
+import report_jobs
+from db_manager import DatabaseManager
+
+@pytest.fixture
+def no_schema_checks(monkeypatch):
+    """Les tâches ne doivent ni vérifier le schéma ni recalculer le cumul par département"""
+    def forbidden(self):
+        raise AssertionError("vérification du schéma dans une tâche de rapport")
+    monkeypatch.setattr(DatabaseManager, '_ensure_schema', forbidden)
+    monkeypatch.setattr(DatabaseManager, '_check_rollup_thresholds', forbidden)
+
+def test_job_reads_through_a_read_only_connection(db, monkeypatch, no_schema_checks):
+    employee_id = db.add_employee('E1', 'Alice', 'Martin')
+    db.add_attendance_log(employee_id, '2025-01-06 08:00:00', 'IN')
+    job_id = db.add_report_job('monthly', 'excel', '2025-01-01', '2025-01-31')
+    connections = []
+
+    def build(manager, *args):
+        connections.append(manager.db)
+        args[-1](1)
+        return 'reports/rapport.xlsx', False
+
+    monkeypatch.setattr(report_jobs.report_cache, 'get_or_build', build)
+    assert report_jobs._run_report_job(job_id, 'monthly', 'excel', '2025-01-01', '2025-01-31') == \
+        report_jobs.JOB_COMPLETED
+    assert connections[0].read_only
+    job = db.get_report_job(job_id)
+    assert (job['status'], job['file_path']) == (report_jobs.JOB_COMPLETED, 'reports/rapport.xlsx')
+
+def test_job_cancelled_before_start(db, no_schema_checks):
+    job_id = db.add_report_job('monthly', 'excel', '2025-01-01', '2025-01-31')
+    assert db.cancel_report_job(job_id)
+    assert report_jobs._run_report_job(job_id, 'monthly', 'excel', '2025-01-01', '2025-01-31') == \
+        report_jobs.JOB_CANCELLED
+    assert db.get_report_job(job_id)['status'] == report_jobs.JOB_CANCELLED
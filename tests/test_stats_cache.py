@@ -0,0 +1,100 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from attendance_manager import AttendanceManager
+from employee_manager import EmployeeManager
+from stats_cache import StatsCache
+
+PERIOD = ('2025-01-06', '2025-01-10')
+OTHER_PERIOD = ('2025-02-03', '2025-02-07')
+
+@pytest.fixture
+def managers(db):
+    cache = StatsCache()
+    return cache, EmployeeManager(db, cache=cache), AttendanceManager(db, cache=cache)
+
+def _punch(user_id, timestamp, status):
+    return SimpleNamespace(user_id=user_id, timestamp=datetime.fromisoformat(timestamp), status=status)
+
+def test_ingest_recomputes_only_the_periods_it_touches(db, managers):
+    cache, employees, attendance = managers
+    employees.add_employee('E1', 'Alice', 'Martin')
+    employee_id = db.get_employees()[0]['id']
+    assert attendance.calculate_attendance_stats(*PERIOD)['absent_days'] == 5
+    assert attendance.calculate_attendance_stats(*OTHER_PERIOD)['absent_days'] == 5
+    assert attendance.calculate_attendance_stats(*PERIOD)['absent_days'] == 5
+    assert cache.hits == 1
+
+    attendance.sync_attendance_data([_punch(employee_id, '2025-01-06 08:00:00', 'IN'),
+                                     _punch(employee_id, '2025-01-06 17:00:00', 'OUT')])
+    hits = cache.hits
+    assert attendance.calculate_attendance_stats(*PERIOD)['absent_days'] == 4
+    assert cache.hits == hits
+    # Période sans pointage ajouté: toujours servie par le cache
+    assert attendance.calculate_attendance_stats(*OTHER_PERIOD)['absent_days'] == 5
+    assert cache.hits == hits + 1
+
+def test_employee_changes_invalidate_dependent_entries(db, managers):
+    cache, employees, attendance = managers
+    sales = db.add_department('Ventes')
+    support = db.add_department('Support')
+    employees.add_employee('E1', 'Alice', 'Martin', department_id=sales)
+    employees.add_employee('E2', 'Bob', 'Durand', department_id=support)
+    alice = next(row['id'] for row in db.get_employees() if row['employee_id'] == 'E1')
+
+    def stats(department_id=None):
+        return attendance.calculate_attendance_stats(*PERIOD, department_id=department_id)
+
+    assert stats()['total_employees'] == 2
+    assert stats(sales)['total_employees'] == 1
+    assert stats(support)['total_employees'] == 1
+
+    # Création: l'effectif de tous les employés est recalculé
+    employees.add_employee('E3', 'Chloé', 'Petit', department_id=support)
+    assert stats()['total_employees'] == 3
+    assert stats(support)['total_employees'] == 2
+
+    # Mise à jour d'un employé des ventes: l'entrée du support reste en cache
+    hits = cache.hits
+    assert employees.update_employee(alice, status='inactive')
+    assert stats(sales)['total_employees'] == 0
+    assert stats(support)['total_employees'] == 2
+    assert cache.hits == hits + 1
+
+    # Changement de département: ancien et nouveau départements recalculés
+    assert employees.update_employee(alice, department_id=support, status='active')
+    assert stats(sales)['total_employees'] == 0
+    assert stats(support)['total_employees'] == 3
+
+    assert employees.delete_employee(alice)
+    assert stats()['total_employees'] == 2
+    assert stats(support)['total_employees'] == 2
+
+def test_results_computed_before_an_invalidation_are_not_stored():
+    cache = StatsCache()
+    key = cache.make_key('stats', *PERIOD)
+    generation = cache.generation
+    cache.invalidate(['2025-01-07'])
+    cache.put(key, {'absent_days': 5}, generation)
+    assert cache.get(key) is None
+
+def test_byte_cap_evicts_least_recently_used_entries():
+    value = {'rows': list(range(50))}
+    size = StatsCache._estimate_size(value)
+    cache = StatsCache(max_entries=100, max_bytes=size * 3)
+    keys = [cache.make_key('stats', f'2025-01-0{day}', f'2025-01-0{day}') for day in range(1, 6)]
+    for key in keys[:3]:
+        cache.put(key, value)
+    cache.get(keys[0])
+    cache.put(keys[3], value)
+    assert cache.get(keys[1]) is None
+    assert all(cache.get(key) is not None for key in (keys[0], keys[2], keys[3]))
+    assert cache.current_bytes <= cache.max_bytes
+    assert cache.evictions == 1
+
+    # Un résultat plus gros que le plafond n'est pas conservé
+    cache.put(keys[4], {'rows': list(range(1000))})
+    assert cache.get(keys[4]) is None
+    assert cache.get_stats()['entries'] == 3
@@ -0,0 +1,103 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from config import AUTO_SYNC_TIME, SYNC_INTERVAL, ZK_DEVICES
+from sync_scheduler import AnySchedule, CronSchedule, DailySchedule, IntervalSchedule, JobScheduler, device_schedule
+
+class FakeDb:
+    """Dernières exécutions des tâches persistées, comme scheduler_runs"""
+
+    def __init__(self, runs=None):
+        self.runs = dict(runs or {})
+
+    def get_scheduler_runs(self):
+        return dict(self.runs)
+
+    def set_scheduler_run(self, name, last_run):
+        self.runs[name] = last_run
+
+@pytest.mark.parametrize('expression, moment, expected', [
+    # Pas et plages
+    ('*/15 * * * *', datetime(2025, 1, 6, 10, 7), datetime(2025, 1, 6, 10, 15)),
+    ('*/15 * * * *', datetime(2025, 1, 6, 10, 45), datetime(2025, 1, 6, 11, 0)),
+    ('0 8-18/2 * * *', datetime(2025, 1, 6, 18, 0), datetime(2025, 1, 7, 8, 0)),
+    # Lundi-vendredi: du vendredi soir au lundi matin
+    ('30 7 * * 1-5', datetime(2025, 1, 10, 9, 0), datetime(2025, 1, 13, 7, 30)),
+    # 7 = dimanche
+    ('0 0 * * 7', datetime(2025, 1, 6, 12, 0), datetime(2025, 1, 12, 0, 0)),
+    # Jour du mois et jour de semaine restreints: l'un ou l'autre (vendredi 10 avant le 13)
+    ('0 0 13 * 5', datetime(2025, 1, 6, 12, 0), datetime(2025, 1, 10, 0, 0)),
+    ('0 0 13 * 5', datetime(2025, 1, 10, 12, 0), datetime(2025, 1, 13, 0, 0)),
+    # 29 février
+    ('0 0 29 2 *', datetime(2025, 3, 1), datetime(2028, 2, 29)),
+])
+def test_cron_next_after(expression, moment, expected):
+    assert CronSchedule(expression).next_after(moment) == expected
+
+@pytest.mark.parametrize('expression', ['* * * *', '60 * * * *', '0 0 * 13 *', '0 0 * * 1-8', '*/0 * * * *'])
+def test_cron_rejects_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+def test_any_schedule_takes_the_earliest():
+    schedule = AnySchedule([DailySchedule('18:00'), IntervalSchedule(3600)])
+    assert schedule.next_after(datetime(2025, 1, 6, 17, 30)) == datetime(2025, 1, 6, 18, 0)
+    assert schedule.next_after(datetime(2025, 1, 6, 9, 30)) == datetime(2025, 1, 6, 10, 30)
+
+def test_default_device_syncs_every_interval_and_daily():
+    schedule = device_schedule(ZK_DEVICES[0])
+    kinds = {type(item): item for item in schedule.schedules}
+    assert kinds[IntervalSchedule].seconds == SYNC_INTERVAL
+    assert kinds[DailySchedule].at == AUTO_SYNC_TIME
+    moment = datetime(2025, 1, 6, 12, 0)
+    assert schedule.next_after(moment) == moment + timedelta(seconds=SYNC_INTERVAL)
+
+def test_device_without_schedule_falls_back_to_sync_interval():
+    schedule = device_schedule({'name': 'entrepot', 'ip': '10.0.0.2'})
+    assert [(type(item), item.seconds) for item in schedule.schedules] == [(IntervalSchedule, SYNC_INTERVAL)]
+
+def test_jitter_does_not_accumulate():
+    scheduler = JobScheduler()
+    job = scheduler.add_job('sync', IntervalSchedule(60), lambda: None, jitter=30)
+    start = job.due
+    for count in range(1, 21):
+        # Exécution à l'heure effective (échéance + délai aléatoire)
+        scheduler._reschedule(job, job.next_run)
+        assert job.due == start + timedelta(seconds=60 * count)
+        assert job.due <= job.next_run <= job.due + timedelta(seconds=30)
+
+def test_missed_deadlines_run_once_after_a_pause():
+    scheduler = JobScheduler()
+    job = scheduler.add_job('sync', IntervalSchedule(60), lambda: None)
+    # Dix échéances manquées (mise en veille): une seule exécution, puis l'intervalle normal
+    now = job.due + timedelta(minutes=10, seconds=5)
+    scheduler._reschedule(job, now)
+    assert job.next_run == now + timedelta(seconds=60)
+
+def test_missed_run_is_caught_up_once_on_start():
+    now = datetime.now()
+    db = FakeDb({'missed': (now - timedelta(hours=3)).isoformat(sep=' ', timespec='seconds'),
+                 'recent': (now - timedelta(minutes=10)).isoformat(sep=' ', timespec='seconds')})
+    scheduler = JobScheduler(db)
+    calls = []
+    done = threading.Event()
+
+    def run(name):
+        calls.append(name)
+        done.set()
+
+    missed = scheduler.add_job('missed', IntervalSchedule(3600), run, 'missed', persist=True)
+    recent = scheduler.add_job('recent', IntervalSchedule(3600), run, 'recent', persist=True)
+    assert missed.next_run - now < timedelta(seconds=5)
+    assert recent.next_run - now > timedelta(minutes=59)
+
+    scheduler.start()
+    try:
+        assert done.wait(5)
+    finally:
+        scheduler.stop()
+    assert calls == ['missed']
+    assert missed.next_run - now > timedelta(minutes=59)
+    assert datetime.fromisoformat(db.runs['missed']) >= now.replace(microsecond=0)
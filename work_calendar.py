@@ -0,0 +1,60 @@
+from datetime import date, timedelta
+from config import WORKING_DAYS, HOLIDAYS
+
+class WorkCalendar:
+    """Calendrier des jours ouvrés représenté sous forme de masques de bits.
+
+    Le bit i d'un masque correspond au i-ème jour de la période à partir de la
+    date de début, ce qui permet de croiser présences et jours ouvrés par
+    simples opérations binaires.
+    """
+
+    def __init__(self, working_days=None, holidays=None):
+        self.working_days = frozenset(WORKING_DAYS if working_days is None else working_days)
+        self.holidays = frozenset(HOLIDAYS if holidays is None else holidays)
+
+    @staticmethod
+    def _to_date(value):
+        if isinstance(value, date):
+            return value
+        return date.fromisoformat(str(value)[:10])
+
+    def period_length(self, start_date, end_date):
+        """Nombre de jours calendaires de la période (bornes incluses)"""
+        return (self._to_date(end_date) - self._to_date(start_date)).days + 1
+
+    def working_mask(self, start_date, end_date):
+        """Masque des jours ouvrés de la période (hors week-ends et jours fériés)"""
+        start = self._to_date(start_date)
+        mask = 0
+        for index in range(self.period_length(start_date, end_date)):
+            day = start + timedelta(days=index)
+            if day.weekday() in self.working_days and day.isoformat() not in self.holidays:
+                mask |= 1 << index
+        return mask
+
+    def day_bits(self, start_date, end_date):
+        """Correspondance date 'YYYY-MM-DD' -> bit du jour dans la période"""
+        start = self._to_date(start_date)
+        return {
+            (start + timedelta(days=index)).isoformat(): 1 << index
+            for index in range(self.period_length(start_date, end_date))
+        }
+
+    def dates_from_mask(self, start_date, mask):
+        """Convertir un masque en liste de dates 'YYYY-MM-DD'"""
+        start = self._to_date(start_date)
+        dates = []
+        while mask:
+            lowest = mask & -mask
+            dates.append((start + timedelta(days=lowest.bit_length() - 1)).isoformat())
+            mask ^= lowest
+        return dates
+
+    @staticmethod
+    def count_days(mask):
+        """Nombre de jours présents dans un masque"""
+        return bin(mask).count('1')
+
+# Instance globale du calendrier de travail
+work_calendar = WorkCalendar()
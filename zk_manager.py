@@ -1,17 +1,21 @@
 import socket
 from zk import ZK, const
 import logging
+from metrics import instrument_methods
+from device_journal import device_journal
+from punch_filter import convert_attendance_data
 from config import ZK_TIMEOUT
 
-# Configuration du logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+@instrument_methods('zk_call_seconds', exclude=('is_connected',))
 class ZKManager:
-    def __init__(self, ip_address=None, port=None):
+    def __init__(self, ip_address=None, port=None, name=None):
         self.zk = None
         self.ip_address = ip_address
         self.port = port
+        # Nom de la pointeuse (ZK_DEVICES), utilisé pour son journal
+        self.name = name
 
     def connect(self, ip_address=None, port=None):
         """Établir la connexion avec la pointeuse ZKTeco"""
@@ -26,7 +30,7 @@ class ZKManager:
                 
             self.zk = ZK(ip_to_use, port=port_to_use, timeout=ZK_TIMEOUT, force_udp=True)
             self.zk.connect()
-            logger.info(f"Connexion à la pointeuse ZKTeco établie ({ip_to_use}:{port_to_use})")
+            logger.info("Connexion à la pointeuse ZKTeco établie (%s:%s)", ip_to_use, port_to_use)
             return True
         except Exception as e:
             logger.error(f"Erreur de connexion à la pointeuse: {e}")
@@ -51,38 +55,16 @@ class ZKManager:
                 return []
 
             attendance_data = self.zk.get_attendance()
-            logger.info(f"Données de pointage récupérées: {len(attendance_data)} enregistrements")
+            logger.info("Données de pointage récupérées: %s enregistrements", len(attendance_data))
+            device_journal.record_attendance(self._journal_name(), attendance_data)
             
-            # Convertir les données pour avoir le format attendu par la base de données
-            converted_data = []
-            for attendance in attendance_data:
-                # Créer un nouvel objet avec le statut converti
-                converted_attendance = type('Attendance', (), {
-                    'user_id': attendance.user_id,
-                    'timestamp': attendance.timestamp,
-                    'status': self._convert_status_code(attendance.status)
-                })()
-                converted_data.append(converted_attendance)
-            
-            return converted_data
+            return convert_attendance_data(attendance_data)
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des données de pointage: {e}")
             return []
     
-    def _convert_status_code(self, status_code):
-        """Convertir le code de statut ZKTeco en type IN/OUT"""
-        # Selon la documentation ZKTeco:
-        # 0: Check-In (Entrée)
-        # 1: Check-Out (Sortie)
-        # 15: Check-In (Entrée) - valeur courante
-        if status_code in [0, 15]:
-            return 'IN'
-        elif status_code == 1:
-            return 'OUT'
-        else:
-            # Pour les autres codes, on utilise 'IN' par défaut
-            logger.warning(f"Code de statut inconnu: {status_code}, utilisation de 'IN' par défaut")
-            return 'IN'
+    def _journal_name(self):
+        return self.name or self.ip_address or 'pointeuse'
 
     def import_users(self):
         """Importer les utilisateurs depuis la pointeuse"""
@@ -92,7 +74,8 @@ class ZKManager:
                 return
 
             users = self.zk.get_users()
-            logger.info(f"Utilisateurs récupérés: {len(users)} utilisateurs")
+            logger.info("Utilisateurs récupérés: %s utilisateurs", len(users))
+            device_journal.record_users(self._journal_name(), users)
             return users
         except Exception as e:
             logger.error(f"Erreur lors de l'importation des utilisateurs: {e}")